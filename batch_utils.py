@@ -0,0 +1,223 @@
+import json
+import asyncio
+import logging
+from typing import Type
+
+import pydantic
+from google.genai import types
+
+import genai_utils
+from scheduler import WorkScheduler
+from valkey_utils import ConfigurationError
+
+# the Gemini Developer API accepts batch jobs from google-genai 2.x on, older releases
+# (as pinned in uv.lock) lack the file destination and the partially succeeded state
+BATCH_MIN_GENAI_VERSION = '2.29.0'
+
+
+def create_request_line(
+    key: str,
+    contents: list[types.Content],
+    response_schema: Type[pydantic.BaseModel] | None = None,
+    thinking_budget: int = 0,
+) -> dict:
+    """Creates a single line of a batch prediction JSONL file.
+
+    Args:
+        key: Identifier of the request, returned with its response.
+        contents: The request contents.
+        response_schema: An optional Pydantic model the JSON response has to follow.
+        thinking_budget: The token budget the model can use for thinking.
+
+    Returns:
+        dict: The JSON serializable request line.
+    """
+    generation_config = {
+        'temperature': 0,
+        'thinking_config': {'thinking_budget': thinking_budget},
+    }
+    if response_schema is not None:
+        generation_config['response_mime_type'] = 'application/json'
+        generation_config['response_json_schema'] = response_schema.model_json_schema()
+    return {
+        'key': key,
+        'request': {
+            'contents': [c.model_dump(mode='json', exclude_none=True) for c in contents],
+            'generation_config': generation_config,
+        },
+    }
+
+
+def write_jsonl(path: str, lines: list[dict]) -> None:
+    """Writes request lines to a JSONL file.
+
+    Args:
+        path: The destination path.
+        lines: The lines created by `create_request_line`.
+    """
+    with open(path, 'w') as f:
+        for line in lines:
+            f.write(json.dumps(line))
+            f.write('\n')
+
+
+def parse_result_lines(data: str) -> dict[str, types.GenerateContentResponse | str]:
+    """Parses the JSONL output of a batch prediction job.
+
+    Args:
+        data: The contents of the output file.
+
+    Returns:
+        dict[str, types.GenerateContentResponse | str]: The response (or error message) by request key.
+    """
+    results = {}
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        obj = json.loads(line)
+        if 'response' in obj:
+            results[obj['key']] = types.GenerateContentResponse.model_validate(obj['response'])
+        else:
+            results[obj['key']] = json.dumps(obj.get('error', obj.get('status', 'unknown error')))
+    return results
+
+
+class GenaiBatchBackend:
+    """Runs batch prediction jobs through the Gemini Batch API."""
+
+    SUCCEEDED_STATES = tuple(
+        getattr(types.JobState, s)
+        for s in ('JOB_STATE_SUCCEEDED', 'JOB_STATE_PARTIALLY_SUCCEEDED')
+        if hasattr(types.JobState, s)
+    )
+    FINISHED_STATES = SUCCEEDED_STATES + (
+        types.JobState.JOB_STATE_FAILED,
+        types.JobState.JOB_STATE_CANCELLED,
+        types.JobState.JOB_STATE_EXPIRED,
+    )
+
+    def __init__(
+        self,
+        gen_client: genai_utils.GenaiClient,
+        poll_interval_sec: float = 60,
+    ) -> None:
+        """Initializes the GenaiBatchBackend.
+
+        Args:
+            gen_client: The client whose API connection is used.
+            poll_interval_sec: Interval between two job status checks.
+
+        Raises:
+            ConfigurationError: If the installed google-genai release does not support
+                                batch jobs with file destinations.
+        """
+        destination = getattr(types, 'BatchJobDestination', None)
+        if (
+            not hasattr(gen_client.client.aio, 'batches')
+            or destination is None
+            or 'file_name' not in destination.model_fields
+        ):
+            raise ConfigurationError(
+                f'The Gemini Batch API backend requires google-genai>={BATCH_MIN_GENAI_VERSION}'
+            )
+        self.gen_client = gen_client
+        self.poll_interval_sec = poll_interval_sec
+
+    async def run(
+        self,
+        jsonl_path: str,
+        model: str,
+        response_schema: Type[pydantic.BaseModel] | None = None,
+    ) -> dict[str, types.GenerateContentResponse | str]:
+        """Uploads a request file, submits it as a batch job and waits for the results.
+
+        Args:
+            jsonl_path: The request file written by `write_jsonl`.
+            model: The model processing the requests.
+            response_schema: Unused, the schema is part of every request line.
+
+        Returns:
+            dict[str, types.GenerateContentResponse | str]: The response (or error message) by request key.
+
+        Raises:
+            genai_utils.GenerationError: If the job does not succeed.
+        """
+        client = self.gen_client.client.aio
+        src = await client.files.upload(
+            file=jsonl_path,
+            config=types.UploadFileConfig(mime_type='jsonl'),
+        )
+        job = await client.batches.create(
+            model=model,
+            src=src.name,
+            config=types.CreateBatchJobConfig(display_name=jsonl_path),
+        )
+        logging.info(f'Submitted batch job {job.name} ({jsonl_path})')
+        while job.state not in GenaiBatchBackend.FINISHED_STATES:
+            await asyncio.sleep(self.poll_interval_sec)
+            job = await client.batches.get(name=job.name)
+            logging.info(f'Batch job {job.name} is in state {job.state}')
+        if job.state not in GenaiBatchBackend.SUCCEEDED_STATES:
+            raise genai_utils.GenerationError(
+                f'Batch job {job.name} finished in state {job.state}, cause: {job.error}'
+            )
+        data = await client.files.download(file=job.dest.file_name)
+        return parse_result_lines(data.decode())
+
+
+class LocalBatchBackend:
+    """
+    Stand-in for the Batch API, running every request of a batch file through
+    `GenaiClient.generate`. Useful for testing and for small batches.
+    """
+
+    def __init__(
+        self,
+        gen_client: genai_utils.GenaiClient,
+        concurrency: int = 1,
+    ) -> None:
+        """Initializes the LocalBatchBackend.
+
+        Args:
+            gen_client: The client generating the responses.
+            concurrency: Number of requests in flight at the same time.
+        """
+        self.gen_client = gen_client
+        self.concurrency = concurrency
+
+    async def run(
+        self,
+        jsonl_path: str,
+        model: str,
+        response_schema: Type[pydantic.BaseModel] | None = None,
+    ) -> dict[str, types.GenerateContentResponse | str]:
+        """Runs the requests of a batch file interactively.
+
+        Args:
+            jsonl_path: The request file written by `write_jsonl`.
+            model: The model processing the requests.
+            response_schema: The Pydantic model the responses have to follow.
+
+        Returns:
+            dict[str, types.GenerateContentResponse | str]: The response (or error message) by request key.
+        """
+        with open(jsonl_path, 'r') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        results = {}
+
+        async def process(line: dict) -> None:
+            request = line['request']
+            contents = [types.Content.model_validate(c) for c in request['contents']]
+            thinking = request['generation_config'].get('thinking_config', {})
+            try:
+                results[line['key']] = await self.gen_client.generate(
+                    contents,
+                    thinking_budget=thinking.get('thinking_budget', 0),
+                    response_schema=response_schema,
+                    model=model,
+                )
+            except Exception as e:
+                results[line['key']] = str(e)
+
+        await WorkScheduler(f'batch {jsonl_path}', self.concurrency).run(lines, process)
+        return results
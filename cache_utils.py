@@ -0,0 +1,300 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+
+import valkey_utils
+from valkey_utils import ConfigurationError
+
+
+def stable_hash(*parts: str | bytes) -> str:
+    """Creates a stable content hash usable as cache key.
+
+    Args:
+        *parts: The parts identifying the cached value, hashed in order.
+
+    Returns:
+        str: The hex sha256 digest of the parts.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode() if isinstance(part, str) else part)
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+class CacheCounters:
+    """Hit/miss counters shared by the cache backends."""
+
+    def __init__(self) -> None:
+        """Initializes the counters to zero."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def summary(self) -> str:
+        """Formats the counters as a single log friendly line.
+
+        Returns:
+            str: e.g. 'hits=10 misses=5 (66.7% hit rate) evictions=0'.
+        """
+        total = self.hits + self.misses
+        rate = 0 if total == 0 else self.hits / total * 100
+        return (
+            f'hits={self.hits} misses={self.misses} ({rate:.1f}% hit rate) '
+            f'evictions={self.evictions}'
+        )
+
+
+class ValkeyCache(CacheCounters):
+    """
+    A string cache stored in Valkey with per-entry TTL and LRU eviction.
+
+    Entries are plain keys expiring on their own. With `max_entries` set, the recency
+    of every entry is tracked in a sorted set used to evict the least recently used
+    entries once the limit is exceeded; members older than the TTL are pruned from
+    it on every write, since their entries have expired already.
+    """
+
+    def __init__(
+        self,
+        client: valkey_utils.AsyncValkeyClient,
+        namespace: str,
+        ttl_sec: int | None = None,
+        max_entries: int | None = None,
+    ) -> None:
+        """Initializes the ValkeyCache.
+
+        Args:
+            client: The AsyncValkeyClient used to reach Valkey.
+            namespace: Prefix separating this cache from other caches (e.g. 'genai').
+            ttl_sec: Time to live of the entries in seconds, None to keep them until evicted.
+            max_entries: Maximum number of entries, None for no limit.
+        """
+        super().__init__()
+        self.client = client
+        self.namespace = namespace
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+
+    async def get(self, key: str) -> str | None:
+        """Looks up an entry and marks it as recently used.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            str | None: The cached value, or None on a miss.
+        """
+        value = await self.client.client.get(self.__create_key(key))
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.max_entries is not None:
+            await self.client.client.zadd(self.__create_lru_key(), {key: time.time()})
+        return value
+
+    async def put(self, key: str, value: str) -> None:
+        """Stores an entry, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key: The cache key.
+            value: The value to cache.
+        """
+        if self.max_entries is None:
+            await self.client.client.set(self.__create_key(key), value, ex=self.ttl_sec)
+            return
+        now = time.time()
+        p = self.client.client.pipeline()
+        p.set(self.__create_key(key), value, ex=self.ttl_sec)
+        if self.ttl_sec is not None:
+            # entries not used within the TTL were created before it and expired already
+            p.zremrangebyscore(self.__create_lru_key(), '-inf', now - self.ttl_sec)
+        p.zadd(self.__create_lru_key(), {key: now})
+        p.zcard(self.__create_lru_key())
+        *_, size = await p.execute()
+        if size <= self.max_entries:
+            return
+        evicted = await self.client.client.zpopmin(self.__create_lru_key(), size - self.max_entries)
+        if evicted:
+            await self.client.client.delete(*[self.__create_key(k) for k, _ in evicted])
+            self.evictions += len(evicted)
+
+    def __create_key(self, key: str) -> str:
+        """Creates the Valkey key of a cache entry."""
+        return f'cache:{self.namespace}:{key}'
+
+    def __create_lru_key(self) -> str:
+        """Creates the Valkey key of the sorted set tracking entry recency."""
+        return f'cache_lru:{self.namespace}'
+
+
+class DiskCache(CacheCounters):
+    """
+    A string cache stored as files in a local directory, with TTL and size based LRU eviction.
+
+    The modification time of an entry is its creation time (used for the TTL),
+    the access time is updated on every hit (used for LRU eviction).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl_sec: int | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        """Initializes the DiskCache, creating the directory if needed.
+
+        Args:
+            directory: The directory holding the cache entries.
+            ttl_sec: Time to live of the entries in seconds, None to keep them until evicted.
+            max_bytes: Maximum total size of the entries, None for no limit.
+        """
+        super().__init__()
+        self.directory = directory
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.__size = None
+        self.__lock = asyncio.Lock()
+
+    async def get(self, key: str) -> str | None:
+        """Looks up an entry and marks it as recently used.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            str | None: The cached value, or None on a miss (or if the entry expired).
+        """
+        value = await asyncio.to_thread(self.__read, self.__path(key))
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    async def put(self, key: str, value: str) -> None:
+        """Stores an entry, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key: The cache key.
+            value: The value to cache.
+        """
+        async with self.__lock:
+            await asyncio.to_thread(self.__write, self.__path(key), value)
+
+    def __path(self, key: str) -> str:
+        """Returns the file path of an entry (sharded by the first two key characters)."""
+        return os.path.join(self.directory, key[:2], key)
+
+    def __read(self, path: str) -> str | None:
+        """Reads an entry, deleting it if it expired."""
+        try:
+            st = os.stat(path)
+            if self.ttl_sec is not None and st.st_mtime + self.ttl_sec < time.time():
+                os.remove(path)
+                if self.__size is not None:
+                    self.__size -= st.st_size
+                return None
+            with open(path, 'r') as f:
+                value = f.read()
+            os.utime(path, (time.time(), st.st_mtime))
+            return value
+        except FileNotFoundError:
+            return None
+
+    def __write(self, path: str, value: str) -> None:
+        """Writes an entry atomically and enforces the size limit."""
+        if self.__size is None:
+            self.__size = sum(size for _, size, _ in self.__entries())
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(value)
+        os.replace(tmp, path)
+        self.__size += os.path.getsize(path)
+        if self.max_bytes is None or self.__size <= self.max_bytes:
+            return
+        entries = sorted(self.__entries(), key=lambda e: e[2])
+        self.__size = sum(size for _, size, _ in entries)
+        # evict down to 90% of the limit so that eviction does not run on every write
+        for entry_path, size, _ in entries:
+            if self.__size <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(entry_path)
+                self.__size -= size
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+
+    def __entries(self) -> list[tuple[str, int, float]]:
+        """Lists every entry as (path, size, access time)."""
+        res = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.tmp'):
+                    continue
+                st = entry.stat()
+                res.append((entry.path, st.st_size, st.st_atime))
+        return res
+
+
+def cache_from_env(
+    env_prefix: str,
+    namespace: str,
+    async_client: valkey_utils.AsyncValkeyClient | None,
+) -> ValkeyCache | DiskCache | None:
+    """Creates a cache configured through environment variables.
+
+    Reads '{env_prefix}' ('valkey', 'disk' or unset/'none'), '{env_prefix}_TTL_SEC',
+    '{env_prefix}_MAX_ENTRIES' (valkey), '{env_prefix}_DIR' and '{env_prefix}_MAX_MB' (disk).
+
+    Args:
+        env_prefix: The prefix of the environment variables (e.g. 'GENAI_CACHE').
+        namespace: The namespace of the cache, also the default directory name of disk caches.
+        async_client: The AsyncValkeyClient used by Valkey backed caches.
+
+    Returns:
+        ValkeyCache | DiskCache | None: The configured cache, or None if caching is disabled.
+
+    Raises:
+        ConfigurationError: If the variables contain invalid values.
+    """
+    backend = os.environ.get(env_prefix, 'none').lower()
+    try:
+        ttl = os.environ.get(f'{env_prefix}_TTL_SEC')
+        ttl_sec = int(ttl) if ttl else None
+        if backend == 'none':
+            return None
+        if backend == 'valkey':
+            if async_client is None:
+                raise ConfigurationError(f'{env_prefix}=valkey requires a Valkey client')
+            max_entries = os.environ.get(f'{env_prefix}_MAX_ENTRIES')
+            cache = ValkeyCache(
+                async_client,
+                namespace,
+                ttl_sec=ttl_sec,
+                max_entries=int(max_entries) if max_entries else None,
+            )
+        elif backend == 'disk':
+            directory = os.environ.get(f'{env_prefix}_DIR', os.path.join('.cache', namespace))
+            max_mb = os.environ.get(f'{env_prefix}_MAX_MB')
+            cache = DiskCache(
+                directory,
+                ttl_sec=ttl_sec,
+                max_bytes=int(max_mb) * 1024 * 1024 if max_mb else None,
+            )
+        else:
+            raise ConfigurationError(
+                f"Invalid {env_prefix}: '{backend}'. Must be one of 'valkey', 'disk' or 'none'."
+            )
+    except ValueError as e:
+        raise ConfigurationError(f'Invalid numeric value in {env_prefix} settings: {e}') from e
+    logging.info(f'Using {backend} backed {namespace} cache')
+    return cache
@@ -1,43 +1,468 @@
+import os
+import re
+import time
+import asyncio
+import logging
+import urllib.parse
+
 import aiofiles
+import httpx
+import pydantic
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
+from crawl4ai.html2text import HTML2Text
 
+import cache_utils
+from valkey_utils import ConfigurationError
 
-class Crawler:
-    """A wrapper around AsyncWebCrawler for simplified web crawling."""
+USER_AGENT = (
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/124.0 Safari/537.36'
+)
+# query parameters that never change the page contents
+TRACKING_PARAMS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'gclid')
+# responses the browser may get past (bot protection, rate limiting)
+ESCALATE_STATUS_CODES = (403, 429, 503)
+# markers of pages that only render their content with JavaScript or behind a challenge
+JS_MARKERS = (
+    'enable javascript',
+    'javascript is required',
+    'javascript is disabled',
+    '__next_data__',
+    'id="root"></div>',
+    'id="app"></div>',
+    'cf-browser-verification',
+    'just a moment...',
+)
+# static pages with less readable text than this are rendered by the browser
+MIN_STATIC_MARKDOWN_CHARS = 500
+# larger responses are not read by the static fetch (they are rarely HTML pages)
+MAX_STATIC_BYTES = 5 * 1024 * 1024
+STRIP_PATTERN = re.compile(r'<(script|style|noscript)\b.*?</\1>', re.IGNORECASE | re.DOTALL)
+
+
+class CrawlResult(pydantic.BaseModel):
+    """The parts of a crawled page used by the pipeline, cacheable as JSON."""
+
+    url: str
+    success: bool
+    status_code: int | None = None
+    markdown: str = ''
+    cleaned_html: str = ''
+    error_message: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: float = 0
+
+
+def normalize_url(url: str) -> str:
+    """Normalizes a URL so that different spellings of the same page share a cache entry.
+
+    Lowercases the scheme and host, drops default ports, fragments, tracking
+    parameters and trailing slashes.
+
+    Args:
+        url: The URL to normalize.
+
+    Returns:
+        str: The normalized URL.
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port is not None and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f'{host}:{parts.port}'
+    path = parts.path.rstrip('/') or '/'
+    query = urllib.parse.urlencode(
+        [
+            (k, v)
+            for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+            if k.lower() not in TRACKING_PARAMS
+        ]
+    )
+    return urllib.parse.urlunsplit((scheme, host, path, query, ''))
+
+
+class BrowserPool:
+    """
+    A headless browser shared by every component that renders pages.
+
+    Limits the number of pages rendered at once, overall and per host, and replaces the
+    browser after a number of rendered pages to cap the memory Chrome leaks over time.
+    A replaced browser is closed once its last open page is done.
+    """
 
     def __init__(
         self,
-        request_timeout_sec: int = 5,
+        max_pages: int = 8,
+        max_pages_per_host: int = 2,
+        recycle_after: int = 200,
     ) -> None:
-        """Initializes the Crawler with a headless Chrome browser configuration.
+        """Initializes the BrowserPool.
 
         Args:
-            request_timeout_sec: Timeout for web page requests in seconds.
-                                 Defaults to 5.
+            max_pages: Maximum number of pages rendered at the same time.
+            max_pages_per_host: Maximum number of pages of a single host rendered at the same time.
+            recycle_after: Number of rendered pages after which the browser is replaced.
+
+        Raises:
+            ConfigurationError: If any of the limits is less than 1.
         """
+        if min(max_pages, max_pages_per_host, recycle_after) < 1:
+            raise ConfigurationError('Browser pool limits must be at least 1')
         self.conf = BrowserConfig(
             browser_type='chrome',
             headless=True,
             text_mode=False,
         )
+        self.max_pages = max_pages
+        self.max_pages_per_host = max_pages_per_host
+        self.recycle_after = recycle_after
+        self.pages = asyncio.Semaphore(max_pages)
+        self.host_pages: dict[str, asyncio.Semaphore] = {}
+        self.browser = AsyncWebCrawler(config=self.conf)
+        self.browser_pages = 0
+        # open pages of the current and of replaced, not yet closed browsers
+        self.open_pages: dict[AsyncWebCrawler, int] = {}
+        self.renders = 0
+        self.recycles = 0
+        self.active = 0
+        self.peak_active = 0
+        self.wait_sec = 0.0
+
+    @staticmethod
+    def from_env() -> 'BrowserPool':
+        """Creates a BrowserPool configured through environment variables.
+
+        Reads BROWSER_MAX_PAGES, BROWSER_MAX_PAGES_PER_HOST and BROWSER_RECYCLE_AFTER,
+        unset variables keep their defaults.
+
+        Returns:
+            BrowserPool: The configured pool.
+
+        Raises:
+            ConfigurationError: If a variable is not a positive integer.
+        """
+        settings = {}
+        for name, arg in (
+            ('BROWSER_MAX_PAGES', 'max_pages'),
+            ('BROWSER_MAX_PAGES_PER_HOST', 'max_pages_per_host'),
+            ('BROWSER_RECYCLE_AFTER', 'recycle_after'),
+        ):
+            value = os.environ.get(name)
+            if not value:
+                continue
+            try:
+                settings[arg] = int(value)
+            except ValueError as e:
+                raise ConfigurationError(f'{name} must be an integer, got {value}') from e
+        return BrowserPool(**settings)
+
+    async def render(self, url: str, config: CrawlerRunConfig):
+        """Renders a page, waiting for a free page slot of its host and of the pool.
+
+        Args:
+            url: The URL of the page.
+            config: The crawl4ai run configuration.
+
+        Returns:
+            The crawl4ai result of the page.
+        """
+        host = (urllib.parse.urlsplit(url).hostname or '').lower()
+        host_pages = self.host_pages.setdefault(host, asyncio.Semaphore(self.max_pages_per_host))
+        start = time.monotonic()
+        # the host slot is taken first, so pages waiting for a busy host do not hold pool slots
+        async with host_pages, self.pages:
+            self.wait_sec += time.monotonic() - start
+            browser = await self.__checkout()
+            try:
+                return await browser.arun(url, config=config)
+            finally:
+                await self.__checkin(browser)
+
+    async def close(self) -> None:
+        """Closes the current browser and any replaced browser still open."""
+        for browser in {self.browser, *self.open_pages}:
+            await browser.close()
+        self.open_pages.clear()
+
+    def summary(self) -> str:
+        """Formats the pool utilisation counters as a single log friendly line."""
+        mean_wait = self.wait_sec / self.renders if self.renders > 0 else 0
+        return (
+            f'renders={self.renders} peak_pages={self.peak_active}/{self.max_pages} '
+            f'recycles={self.recycles} mean_wait={mean_wait:.2f}s'
+        )
+
+    async def __checkout(self) -> AsyncWebCrawler:
+        """Returns the browser to open the next page in, replacing it if it is due."""
+        if self.browser_pages >= self.recycle_after:
+            logging.info(f'Recycling browser after {self.browser_pages} pages')
+            replaced = self.browser
+            self.browser = AsyncWebCrawler(config=self.conf)
+            self.browser_pages = 0
+            self.recycles += 1
+            if self.open_pages.get(replaced, 0) == 0:
+                await self.__close_replaced(replaced)
+        browser = self.browser
+        self.browser_pages += 1
+        self.renders += 1
+        self.open_pages[browser] = self.open_pages.get(browser, 0) + 1
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        return browser
+
+    async def __checkin(self, browser: AsyncWebCrawler) -> None:
+        """Releases a page, closing its browser if it was replaced and this was its last page."""
+        self.active -= 1
+        self.open_pages[browser] -= 1
+        if browser is not self.browser and self.open_pages[browser] == 0:
+            await self.__close_replaced(browser)
+
+    async def __close_replaced(self, browser: AsyncWebCrawler) -> None:
+        """Closes a replaced browser without open pages, failures are logged and ignored."""
+        self.open_pages.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception as e:
+            logging.warning(f'Failed to close recycled browser, cause: {e}')
+
+
+class Crawler:
+    """A wrapper around a shared BrowserPool and HTTP client for simplified web crawling."""
+
+    def __init__(
+        self,
+        request_timeout_sec: int = 5,
+        cache: cache_utils.ValkeyCache | cache_utils.DiskCache | None = None,
+        cache_fresh_sec: int = 3600,
+        fast_path: bool = True,
+        browser_pool: BrowserPool | None = None,
+    ) -> None:
+        """Initializes the Crawler.
+
+        Args:
+            request_timeout_sec: Timeout for web page requests in seconds.
+                                 Defaults to 5.
+            cache: An optional cache of successful crawl results, keyed by normalized URL.
+            cache_fresh_sec: Cached results younger than this are returned as is, older ones
+                             are revalidated with a conditional GET (ETag/Last-Modified)
+                             and only crawled again if the page changed.
+            fast_path: Whether to try a plain HTTP GET first, converting static HTML to markdown
+                       locally. The browser only renders pages that are not HTML, look
+                       JavaScript rendered or empty, or were refused (403/429/503).
+            browser_pool: The pool pages are rendered in. Defaults to a new pool
+                          with the default limits.
+        """
         self.run_cfg = CrawlerRunConfig(page_timeout=request_timeout_sec * 1000, magic=True)
-        self.crawler = AsyncWebCrawler(config=self.conf)
+        self.browser_pool = BrowserPool() if browser_pool is None else browser_pool
+        self.http_client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=request_timeout_sec,
+            headers={'User-Agent': USER_AGENT},
+        )
+        self.cache = cache
+        self.cache_fresh_sec = cache_fresh_sec
+        self.fast_path = fast_path
+        self.revalidated = 0
+        self.static_fetches = 0
+        self.browser_renders = 0
 
-    async def crawl(self, url: str):
-        """Crawls the given URL using AsyncWebCrawler.
+    async def crawl(self, url: str) -> CrawlResult:
+        """Crawls the given URL, answering from the crawl cache when possible.
 
         Args:
             url: The URL of the website to crawl.
 
         Returns:
-            crawl4ai.crawler.CrawledInfo: The result of the crawl operation,
-            containing HTML, cleaned HTML, markdown, etc.
+            CrawlResult: The result of the crawl operation (success, markdown, cleaned HTML).
         """
-        return await self.crawler.arun(url, config=self.run_cfg)
+        key = None
+        if self.cache is not None:
+            key = cache_utils.stable_hash(normalize_url(url))
+            cached = await self.__cache_get(key)
+            if cached is not None and await self.__is_current(cached):
+                return cached
+        result = await self.__fetch_static(url) if self.fast_path else None
+        if result is None:
+            result = await self.__render(url)
+        if key is not None and result.success:
+            await self.__cache_put(key, result)
+        return result
 
     async def close(self) -> None:
-        """Closes the underlying web crawler and browser instance."""
-        await self.crawler.close()
+        """Closes the browser pool and the connection pool."""
+        await self.browser_pool.close()
+        await self.http_client.aclose()
+
+    def summary(self) -> str:
+        """Formats the fetch and crawl cache counters as a single log friendly line."""
+        res = f'static={self.static_fetches} browser={self.browser_renders}'
+        res += f', pool: {self.browser_pool.summary()}'
+        if self.cache is not None:
+            res += f', cache: {self.cache.summary()} revalidated={self.revalidated}'
+        return res
+
+    async def __fetch_static(self, url: str) -> CrawlResult | None:
+        """Fetches a page without the browser.
+
+        Returns None if the page has to be rendered by the browser. The body is streamed and
+        only read if the headers announce HTML of at most MAX_STATIC_BYTES, so links to PDFs
+        and other large files are not downloaded twice.
+        """
+        try:
+            async with self.http_client.stream('GET', url) as response:
+                if response.status_code in ESCALATE_STATUS_CODES:
+                    return None
+                if 'html' not in response.headers.get('content-type', ''):
+                    return None
+                length = response.headers.get('content-length', '')
+                if length.isdigit() and int(length) > MAX_STATIC_BYTES:
+                    return None
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) > MAX_STATIC_BYTES:
+                        return None
+        except httpx.HTTPError as e:
+            logging.debug(f'Static fetch of {url} failed, rendering instead, cause: {e}')
+            return None
+        html = bytes(body).decode(response.encoding or 'utf-8', errors='replace')
+        lowered = html.lower()
+        if any(marker in lowered for marker in JS_MARKERS):
+            return None
+        cleaned_html = STRIP_PATTERN.sub('', html)
+        converter = HTML2Text(baseurl=str(response.url))
+        converter.body_width = 0
+        markdown = converter.handle(cleaned_html)
+        if response.is_success and len(markdown.strip()) < MIN_STATIC_MARKDOWN_CHARS:
+            return None
+        self.static_fetches += 1
+        return CrawlResult(
+            url=url,
+            success=response.is_success,
+            status_code=response.status_code,
+            markdown=markdown,
+            cleaned_html=cleaned_html,
+            error_message=None if response.is_success else response.reason_phrase,
+            etag=response.headers.get('etag'),
+            last_modified=response.headers.get('last-modified'),
+            fetched_at=time.time(),
+        )
+
+    async def __render(self, url: str) -> CrawlResult:
+        """Crawls a URL with the headless browser."""
+        self.browser_renders += 1
+        res = await self.browser_pool.render(url, self.run_cfg)
+        headers = {k.lower(): v for k, v in (res.response_headers or {}).items()}
+        return CrawlResult(
+            url=url,
+            success=res.success,
+            status_code=res.status_code,
+            markdown=str(res.markdown or ''),
+            cleaned_html=res.cleaned_html or '',
+            error_message=res.error_message,
+            etag=headers.get('etag'),
+            last_modified=headers.get('last-modified'),
+            fetched_at=time.time(),
+        )
+
+    async def __is_current(self, cached: CrawlResult) -> bool:
+        """Checks whether a cached result can be used, revalidating it if it is stale."""
+        if time.time() - cached.fetched_at < self.cache_fresh_sec:
+            return True
+        if cached.etag is None and cached.last_modified is None:
+            return False
+        headers = {}
+        if cached.etag is not None:
+            headers['If-None-Match'] = cached.etag
+        if cached.last_modified is not None:
+            headers['If-Modified-Since'] = cached.last_modified
+        try:
+            response = await self.http_client.get(cached.url, headers=headers)
+        except httpx.HTTPError:
+            return False
+        if response.status_code != 304:
+            return False
+        self.revalidated += 1
+        cached.fetched_at = time.time()
+        await self.__cache_put(cache_utils.stable_hash(normalize_url(cached.url)), cached)
+        return True
+
+    async def __cache_get(self, key: str) -> CrawlResult | None:
+        """Looks up a cached result, cache failures are logged and treated as misses."""
+        try:
+            cached = await self.cache.get(key)
+            return None if cached is None else CrawlResult.model_validate_json(cached)
+        except Exception as e:
+            logging.warning(f'Failed to read crawl cache, cause: {e}')
+            return None
+
+    async def __cache_put(self, key: str, result: CrawlResult) -> None:
+        """Caches a result, cache failures are logged and ignored."""
+        try:
+            await self.cache.put(key, result.model_dump_json())
+        except Exception as e:
+            logging.warning(f'Failed to write crawl cache, cause: {e}')
+
+
+class LinkValidator:
+    """
+    Checks whether links are alive with lightweight HTTP requests.
+
+    Uses HEAD (or a GET of the first byte where HEAD is not supported) through the
+    crawler's shared connection pool, following redirects. Only responses that look
+    like bot protection are checked again with a full browser crawl.
+    """
+
+    BOT_PROTECTION_STATUS_CODES = (401, 403, 429, 503)
+    # answers of servers refusing HEAD requests, these are retried with a ranged GET
+    HEAD_REFUSED_STATUS_CODES = (400, 403, 405, 501)
+
+    def __init__(self, crawler: Crawler, concurrency: int = 20) -> None:
+        """Initializes the LinkValidator.
+
+        Args:
+            crawler: The crawler whose connection pool (and browser, as fallback) is used.
+            concurrency: Maximum number of links checked at the same time.
+        """
+        self.crawler = crawler
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.browser_fallbacks = 0
+
+    async def validate(self, url: str) -> bool:
+        """Checks whether a link is alive.
+
+        Args:
+            url: The link to check.
+
+        Returns:
+            bool: True if the link (after redirects) answers with a success status.
+        """
+        async with self.semaphore:
+            try:
+                status = await self.__status(url)
+            except httpx.HTTPError as e:
+                logging.debug(f'Link validation of {url} failed, cause: {e}')
+                return False
+        if 200 <= status < 300:
+            return True
+        if status in LinkValidator.BOT_PROTECTION_STATUS_CODES:
+            self.browser_fallbacks += 1
+            try:
+                return (await self.crawler.crawl(url)).success
+            except Exception:
+                return False
+        return False
+
+    async def __status(self, url: str) -> int:
+        """Returns the final status code of a HEAD, or of a single byte GET if HEAD is refused."""
+        response = await self.crawler.http_client.head(url)
+        if response.status_code not in LinkValidator.HEAD_REFUSED_STATUS_CODES:
+            return response.status_code
+        async with self.crawler.http_client.stream(
+            'GET', url, headers={'Range': 'bytes=0-0'}
+        ) as response:
+            return response.status_code
 
 
 class HTMLDownloader:
@@ -45,9 +470,15 @@ class HTMLDownloader:
 
     def __init__(
         self,
+        crawler: Crawler | None = None,
     ) -> None:
-        """Initializes the HTMLDownloader with a Crawler instance."""
-        self.crawler = Crawler()
+        """Initializes the HTMLDownloader.
+
+        Args:
+            crawler: The crawler used for downloading, shared with the other components.
+                     Defaults to a new Crawler.
+        """
+        self.crawler = Crawler() if crawler is None else crawler
 
     async def download(self, url: str, filename: str) -> None:
         """Downloads the cleaned HTML content of a URL and saves it to a file.
@@ -62,12 +493,8 @@ class HTMLDownloader:
 
 
 if __name__ == '__main__':
-    import asyncio
-
     crawler = Crawler()
     res = asyncio.run(crawler.crawl('https://www.adeccogroup.com/investors/annual-report'))
-    with open('scratchpad/page.html', 'w') as f:
-        print(res.html, file=f)
     with open('scratchpad/page-cleaned.html', 'w') as f:
         print(res.cleaned_html, file=f)
     with open('scratchpad/markdown.html', 'w') as f:
@@ -75,13 +75,14 @@ class DataExporter:
         """
         self.discovery_df = self.discovery_df.sort_values(by=['ID', 'TYPE'])
         companies = self.discovery_df.drop_duplicates(subset=['ID'])
-        for idx, row in companies.iterrows():
-            company: str = row['NAME']
-
+        names = companies['NAME'].tolist()
+        report_links = self.report_link_store.get_many(names)
+        report_infos = self.report_info_store.get_many(names)
+        sites = self.site_store.get_many(names)
+        for (idx, _), report_link, report_info, site in zip(
+            companies.iterrows(), report_links, report_infos, sites
+        ):
             # fill in financial report link
-            report_link = self.report_link_store.get(company)
-            report_info = self.report_info_store.get(company)
-
             report_url = None
             report_refyear = None
             if report_link is not None:
@@ -99,8 +100,6 @@ class DataExporter:
                 self.discovery_df.loc[idx, 'REFYEAR'] = report_refyear
 
             # fill in site data
-            site = self.site_store.get(company)
-
             site_link = None
             if site is not None:
                 site_link = (
@@ -133,14 +132,16 @@ class DataExporter:
         companies = self.extraction_df.drop_duplicates(subset=['ID']).set_index('ID')
         self.extraction_df = self.extraction_df.set_index(['ID', 'VARIABLE']).sort_index()
         current_year = dt.datetime.today().year
-        for id, row in companies.iterrows():
+        names = companies['NAME'].tolist()
+        report_links = self.report_link_store.get_many(names)
+        report_infos = self.report_info_store.get_many(names)
+        sites = self.site_store.get_many(names)
+        naces = self.nace_store.get_many(names)
+        for (id, row), report_link, report_info, site, nace in zip(
+            companies.iterrows(), report_links, report_infos, sites, naces
+        ):
             company: str = row['NAME']
 
-            report_link = self.report_link_store.get(company)
-            report_info = self.report_info_store.get(company)
-            site = self.site_store.get(company)
-            nace = self.nace_store.get(company)
-
             report_refyear = None
             report_src = None
             turnover = None
@@ -1,15 +1,39 @@
+import os
 import json
-import logging
+import mmap
+import pydantic
 import asyncio
-import aiofiles
+import hashlib
+import logging
+import datetime
 
 from google.genai import types
 
 import genai_utils
 import models
+import normalizer
+import pdf_utils
 import valkey_stores
 
-from utils import batched
+from scheduler import MemoryBudget, WorkScheduler
+
+# estimated peak memory of an extraction per byte of report: the raw bytes,
+# their base64 encoding and the serialized request holding it
+MEMORY_PER_REPORT_BYTE = 3
+# fields extracted together by the fan-out mode, each group is a separate, smaller request
+EXTRACTION_GROUPS = {
+    'financials': (
+        'assets_value',
+        'net_turnover',
+        'currency_code_assets',
+        'currency_code_turnover',
+        'reference_year',
+    ),
+    'headcount': ('employee_count',),
+    'country_activity': ('country_code', 'main_activity_description'),
+}
+# uploaded files expire after 48 hours, their handles are dropped this much earlier
+UPLOAD_EXPIRY_MARGIN_SEC = 3600
 
 
 class FinDataExtractor:
@@ -27,6 +51,12 @@ class FinDataExtractor:
         report_info_store: valkey_stores.AnnualReportInfoStore,
         report_directory: str,
         concurrent_threads: int = 1,
+        max_report_pages: int | None = 20,
+        memory_budget_mb: int = 1024,
+        uploaded_file_store: valkey_stores.UploadedFileStore | None = None,
+        upload_threshold_mb: int = 10,
+        fan_out: bool = False,
+        max_group_retries: int = 1,
     ) -> None:
         """Initializes the FinDataExtractor.
 
@@ -37,6 +67,19 @@ class FinDataExtractor:
             report_info_store: Store for storing the extracted financial data.
             report_directory: Directory where report files are stored locally.
             concurrent_threads: Number of concurrent threads for processing companies.
+            max_report_pages: Longer PDF reports are trimmed to the pages most likely holding
+                              the extracted figures before they are sent to the model
+                              (requires pypdf). None sends the reports whole.
+            memory_budget_mb: Memory the concurrently processed reports may take. A new
+                              extraction only starts when its report fits into the budget.
+            uploaded_file_store: Store of the uploaded report handles. If set, large reports
+                                 are uploaded once through the file API and referenced by
+                                 every later request, instead of being sent inline.
+            upload_threshold_mb: Reports of at least this size (on disk) are uploaded.
+            fan_out: Whether to extract the field groups of EXTRACTION_GROUPS with separate,
+                     concurrent requests and merge the results. In this mode every report is
+                     uploaded (if the store is set), as it is referenced by several requests.
+            max_group_retries: How many times a failed field group is retried in fan-out mode.
         """
         self.gen_client = gen_client
         self.report_link_store = report_link_store
@@ -44,17 +87,32 @@ class FinDataExtractor:
         self.report_directory = report_directory
         self.report_info_store = report_info_store
         self.concurrent_threads = concurrent_threads
+        self.max_report_pages = max_report_pages
+        if max_report_pages is not None and not pdf_utils.is_available():
+            logging.warning('pypdf is not installed, reports are sent to the model untrimmed')
+        self.memory_budget = MemoryBudget(memory_budget_mb * 1024 * 1024)
+        self.uploaded_file_store = uploaded_file_store
+        self.upload_threshold_bytes = upload_threshold_mb * 1024 * 1024
+        self.fan_out = fan_out
+        self.max_group_retries = max_group_retries
+        info_fields = models.AnnualReportInfo.model_fields
+        self.group_models = {
+            group: pydantic.create_model(
+                f'AnnualReportInfo_{group}',
+                **{f: (info_fields[f].annotation, info_fields[f]) for f in fields},
+            )
+            for group, fields in EXTRACTION_GROUPS.items()
+        }
 
     async def run(self) -> None:
         """
         Runs the data extraction pipeline for all companies that have reports in db.
-        It processes companies in batches concurrently.
+        It processes companies concurrently, keeping `concurrent_threads` of them in flight.
         """
-        companies = self.report_link_store.get_companies()
+        companies = await self.report_link_store.aget_companies()
 
-        for company_batch in batched(companies, self.concurrent_threads):
-            tasks = [self.process_company(c) for c in company_batch]
-            await asyncio.gather(*tasks)
+        scheduler = WorkScheduler('extract-data', self.concurrent_threads)
+        await scheduler.run(companies, self.process_company)
 
     async def process_company(self, company: str) -> None:
         """
@@ -68,35 +126,194 @@ class FinDataExtractor:
         Args:
             company: The name of the company to process.
         """
-        extracted_data = self.report_info_store.get(company)
+        extracted_data = await self.report_info_store.aget(company)
         if extracted_data is not None:
             return
-        link = self.report_link_store.get(company)
+        link = await self.report_link_store.aget(company)
         if link is None or link.link is None:
             logging.warning(f'Annual report link is missing for company {company}')
             return
-        attached_report = None
-        if isinstance(link, models.AnnualReportLinkWithPaths) and link.local_path is not None:
+        if not isinstance(link, models.AnnualReportLinkWithPaths) or link.local_path is None:
+            await self.__extract(company, link.link)
+            return
+        try:
+            size = os.path.getsize(link.local_path)
+        except OSError:
+            logging.error(
+                f'Failed to read report from disk for company {company}, falling back to url context'
+            )
+            await self.__extract(company, link.link)
+            return
+        if self.uploaded_file_store is not None and (
+            self.fan_out or size >= self.upload_threshold_bytes
+        ):
+            uploaded_report = await self.__get_uploaded_report(company, link.local_path, size)
+            if uploaded_report is not None:
+                await self.__extract(company, uploaded_report)
+                return
+        async with self.memory_budget.reserve(size * MEMORY_PER_REPORT_BYTE):
             try:
-                buffer = None
-                async with aiofiles.open(link.local_path, 'rb') as f:
-                    buffer = await f.read()
-
-                mime = 'application/pdf' if link.local_path.endswith('.pdf') else 'text/html'
-                attached_report = types.Part.from_bytes(data=buffer, mime_type=mime)
+                attached_report = await asyncio.to_thread(self.__load_report, link.local_path)
             except Exception:
                 logging.error(
                     f'Failed to read report from disk for company {company}, falling back to url context'
                 )
-        try:
-            if attached_report is None:
                 attached_report = link.link
-            report = await self.extract_data_from_report(company, attached_report)
-            self.report_info_store.store(company, report)
+            await self.__extract(company, attached_report)
 
+    async def __extract(self, company: str, report: types.Part | str) -> None:
+        """Extracts and stores the data of a report, logging failures."""
+        try:
+            if self.fan_out and not isinstance(report, str):
+                info = await self.extract_data_fan_out(company, report)
+            else:
+                info = await self.extract_data_from_report(company, report)
+            await self.report_info_store.astore(company, info)
         except Exception as e:
             logging.error(f'Failed to extract data from report for company: {company}, cause {e}')
 
+    async def __get_uploaded_report(
+        self,
+        company: str,
+        path: str,
+        size: int,
+    ) -> types.Part | None:
+        """Returns a reference to the uploaded report, uploading it if it was not uploaded yet.
+
+        Returns None if the upload fails, the report is then sent inline.
+        """
+        try:
+            content_hash = await asyncio.to_thread(self.__hash_report, path)
+            file = await self.uploaded_file_store.aget(path, content_hash)
+            if file is None:
+                async with self.memory_budget.reserve(size * MEMORY_PER_REPORT_BYTE):
+                    report = await asyncio.to_thread(self.__load_report, path)
+                    file = await self.gen_client.upload_file(
+                        report.inline_data.data,
+                        report.inline_data.mime_type,
+                        display_name=os.path.basename(path),
+                    )
+                ttl_sec = 47 * 3600
+                if file.expiration_time is not None:
+                    remaining = file.expiration_time - datetime.datetime.now(datetime.timezone.utc)
+                    ttl_sec = int(remaining.total_seconds()) - UPLOAD_EXPIRY_MARGIN_SEC
+                if ttl_sec > 0:
+                    await self.uploaded_file_store.astore(path, content_hash, file, ttl_sec)
+                logging.info(f'Uploaded report of {company} as {file.name}')
+            return types.Part.from_uri(file_uri=file.uri, mime_type=file.mime_type)
+        except Exception as e:
+            logging.warning(f'Failed to upload report of {company}, sending it inline, cause: {e}')
+            return None
+
+    def __hash_report(self, path: str) -> str:
+        """Hashes a report in chunks (blocking, run in a worker thread).
+
+        The trimming setting is part of the hash, as it changes the uploaded contents.
+        """
+        h = hashlib.sha256(f'max_pages={self.max_report_pages}'.encode())
+        with open(path, 'rb') as f:
+            while chunk := f.read(1024 * 1024):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def __load_report(self, path: str) -> types.Part:
+        """Loads a report from disk (blocking, run in a worker thread).
+
+        PDFs are memory mapped while they are trimmed, so only the trimmed copy
+        is held in memory. Untrimmed reports are read with a single allocation.
+        """
+        mime = 'application/pdf' if path.endswith('.pdf') else 'text/html'
+        with open(path, 'rb') as f:
+            if mime == 'application/pdf' and self.max_report_pages is not None:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    trimmed = pdf_utils.trim_pdf(m, self.max_report_pages)
+                if trimmed is not None:
+                    return types.Part.from_bytes(data=trimmed, mime_type=mime)
+            # read() of a regular file allocates the buffer once, sized by fstat
+            buffer = f.read()
+        return types.Part.from_bytes(data=buffer, mime_type=mime)
+
+    async def extract_data_fan_out(
+        self,
+        company: str,
+        report: types.Part,
+    ) -> models.AnnualReportInfo:
+        """
+        Extracts financial data from a report with one smaller request per field group.
+
+        The groups of EXTRACTION_GROUPS are extracted concurrently and merged into
+        a single AnnualReportInfo. A failing group (e.g. an invalid country code) is
+        retried on its own, if it keeps failing its fields are left empty.
+
+        Args:
+            company: The name of the company.
+            report: The report file as a `google.genai.types.Part` (inline or uploaded).
+
+        Returns:
+            models.AnnualReportInfo: The merged information of the successful groups.
+
+        Raises:
+            genai_utils.GenerationError: If every group failed.
+        """
+        pending = list(EXTRACTION_GROUPS.keys())
+        merged = {}
+        for attempt in range(self.max_group_retries + 1):
+            results = await asyncio.gather(
+                *[self.__extract_group(company, report, group, attempt) for group in pending],
+                return_exceptions=True,
+            )
+            failed = []
+            for group, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    logging.warning(
+                        f'Extraction of {group} failed for {company} '
+                        f'(attempt {attempt + 1}), cause: {result}'
+                    )
+                    failed.append(group)
+                else:
+                    merged.update(result.model_dump())
+            pending = failed
+            if not pending:
+                break
+        if len(pending) == len(EXTRACTION_GROUPS):
+            raise genai_utils.GenerationError(f'Every field group failed for {company}')
+        return models.AnnualReportInfo.model_validate(merged)
+
+    async def __extract_group(
+        self,
+        company: str,
+        report: types.Part,
+        group: str,
+        attempt: int = 0,
+    ) -> pydantic.BaseModel:
+        """Extracts a single field group of EXTRACTION_GROUPS, retries bypass the cache."""
+        schema = self.group_models[group]
+        prompt = f"""Extract the following fields from the attached annual report according to specified in the format: {', '.join(EXTRACTION_GROUPS[group])}.
+        
+        Notes:
+        - Make sure to extract asset values/net turnover in their most expanded integer form. (If the report specifies them in thousands or millions/billions etc, make sure to input the full value)
+        - Similarly for employee count, extract the expanded integer forms.
+        - Only extract information you explicitly found in the attached document, base your answer on facts.
+        - Avoid repeating marketing slop when summarizing the main activity. Look at the facts and collect the main industries and sectors the company participates in (if possible order them by priority).
+        """
+        msg = self.gen_client.get_simple_message(prompt)
+        msg[0].parts.append(report)
+        res = await self.gen_client.generate(
+            msg,
+            thinking_budget=1024,
+            model=genai_utils.PRO,
+            response_schema=schema,
+            use_cache=attempt == 0,
+        )
+        if res.candidates is None:
+            raise genai_utils.GenerationError('Failed to generate response')
+        await self.conversation_store.astore(
+            company,
+            f'info_extract_{group}',
+            self.gen_client.get_simple_message(prompt) + [res.candidates[0].content],
+        )
+        return normalizer.parse_report_info(res.text, schema)
+
     async def extract_data_from_report(
         self,
         company: str,
@@ -120,8 +337,10 @@ class FinDataExtractor:
 
         Raises:
             genai_utils.GenerationError: If the AI model fails to generate a response.
+            normalizer.RepairError: If the AI's response contains no JSON object (twice).
             pydantic.ValidationError: If the AI's response cannot be validated
-                                      against the AnnualReportInfo schema.
+                                      against the AnnualReportInfo schema, even after
+                                      repairing it (twice).
         """
         prompt = """Extract the relevant financial data from the attached annual report according to specified in the format.
         
@@ -143,27 +362,34 @@ class FinDataExtractor:
         #    raise ValueError('report must be types.Part or str')
         #
         msg = self.gen_client.get_simple_message(prompt)
-        self.conversation_store.store(
+        await self.conversation_store.astore(
             company,
             'info_extract',
             msg,
         )
         if not use_url_context:
             msg[0].parts.append(report)
-        res = await self.gen_client.generate(
-            msg,
-            thinking_budget=2048,
-            model=genai_utils.PRO if not use_url_context else 'gemini-2.5-pro-preview-05-06',
-            response_schema=models.AnnualReportInfo if not use_url_context else None,
-            url_context=use_url_context,
-        )
-        if res.candidates is None:
-            raise genai_utils.GenerationError('Failed to generate response')
-        msg.append(res.candidates[0].content)
-        self.conversation_store.store(
-            company,
-            'info_extract',
-            msg,
-        )
-        clean_res = res.text.removeprefix('```json\n').removesuffix('\n```')
-        return models.AnnualReportInfo.model_validate_json(clean_res)
+        # answers are repaired locally, only an unusable answer costs a second call
+        # (bypassing the response cache, which would return the same answer)
+        for attempt in range(2):
+            res = await self.gen_client.generate(
+                msg,
+                thinking_budget=2048,
+                model=genai_utils.PRO if not use_url_context else 'gemini-2.5-pro-preview-05-06',
+                response_schema=models.AnnualReportInfo if not use_url_context else None,
+                url_context=use_url_context,
+                use_cache=attempt == 0,
+            )
+            if res.candidates is None:
+                raise genai_utils.GenerationError('Failed to generate response')
+            await self.conversation_store.astore(
+                company,
+                'info_extract',
+                msg + [res.candidates[0].content],
+            )
+            try:
+                return normalizer.parse_report_info(res.text)
+            except (normalizer.RepairError, pydantic.ValidationError) as e:
+                if attempt == 1:
+                    raise
+                logging.warning(f'Unusable extraction answer for {company}, retrying, cause: {e}')
@@ -1,13 +1,26 @@
+import heapq
 import asyncio
 import logging
+import itertools
 import datetime as dt
 
+import pydantic
+
 import crawler
 import genai_utils
+import link_ranker
+import markdown_utils
+import sitemap_utils
 import valkey_stores
 
-from utils import batched
-from models import ModelActionResponse, ModelActionResponseWithMetadata, AnnualReportLink
+from scheduler import WorkScheduler
+from models import (
+    FrontierActionResponse,
+    ModelActionResponse,
+    ModelActionResponseWithMetadata,
+    AnnualReportLink,
+    ReportLinkConfirmation,
+)
 from valkey_utils import ConfigurationError
 
 
@@ -26,6 +39,8 @@ class CrawlState:
         current_url: str,
         action_history: list[ModelActionResponseWithMetadata],
         url_history: list[str],
+        seen_blocks: dict[str, str] | None = None,
+        candidate_links: list[str] | None = None,
     ) -> None:
         """Initializes the crawling state.
 
@@ -34,10 +49,16 @@ class CrawlState:
             action_history: A list of actions (ModelActionResponseWithMetadata)
                             taken by the model so far.
             url_history: A list of URLs visited in sequence, forming a navigation stack.
+            seen_blocks: Hashes of the markdown blocks of the visited pages, mapped to the page
+                         they were first seen on (used to drop repeated menus and footers).
+            candidate_links: Likely report links found without crawling (e.g. in the sitemap),
+                             shown to the model on every page.
         """
         self.current_url = current_url
         self.action_history = action_history
         self.url_history = url_history
+        self.seen_blocks = {} if seen_blocks is None else seen_blocks
+        self.candidate_links = candidate_links
 
 
 class FinRepFinder:
@@ -57,6 +78,11 @@ class FinRepFinder:
         companies: list[str] | None = None,
         max_tries_per_company: int = 10,
         concurrent_threads: int = 1,
+        prune_pages: bool = True,
+        link_ranker: link_ranker.LinkRanker | None = None,
+        frontier_width: int = 0,
+        sitemap_discovery: sitemap_utils.SitemapDiscovery | None = None,
+        resume: bool = False,
     ) -> None:
         """Initializes the FinRepFinder.
 
@@ -75,9 +101,27 @@ class FinRepFinder:
                                    in an attempt to find a report. Defaults to 10.
             concurrent_threads: Number of concurrent threads for processing companies.
                                 Must be >= 1.
+            prune_pages: Whether to strip boilerplate and repeated blocks from the crawled pages
+                         and to show their links as a numbered link table.
+            link_ranker: An optional ranker scoring the links of every page before the model is
+                         asked. Obvious annual report links are accepted directly, likely ones
+                         are confirmed with a single FLASH call.
+            frontier_width: If positive, websites are searched best-first instead of following
+                            one link at a time: the model names this many candidate links per
+                            page, they are crawled concurrently and the most promising crawled
+                            page is evaluated next. `max_tries_per_company` then limits the
+                            evaluated pages.
+            sitemap_discovery: An optional discovery of the PDFs listed in the sitemaps of the
+                               websites. A confirmed candidate skips the navigation, otherwise
+                               the best candidates are shown to the model while navigating.
+            resume: Whether an interrupted crawl continues from the stored model actions
+                    instead of starting over. Applies to the sequential navigation, the
+                    best-first search always starts over. Crawls that used up
+                    `max_tries_per_company` pages start over too.
 
         Raises:
-            ConfigurationError: If `concurrent_threads` is less than 1.
+            ConfigurationError: If `concurrent_threads` is less than 1 or `frontier_width`
+                                is negative.
         """
         self.crawler = crawler
         self.gen_client = gen_client
@@ -91,23 +135,29 @@ class FinRepFinder:
         if concurrent_threads < 1:
             raise ConfigurationError('concurrent_threads must be >= 1')
         self.concurrent_threads = concurrent_threads
+        self.prune_pages = prune_pages
+        self.link_ranker = link_ranker
+        if frontier_width < 0:
+            raise ConfigurationError('frontier_width must be >= 0')
+        self.frontier_width = frontier_width
+        self.sitemap_discovery = sitemap_discovery
+        self.resume = resume
 
     async def run(self) -> None:
         """Runs the financial report finding process for the specified companies.
 
-        Processes companies in batches using concurrent threads. If no specific
-        companies are provided during initialization, it retrieves them from the
-        `site_store`.
+        Processes companies concurrently, keeping `concurrent_threads` of them in flight.
+        If no specific companies are provided during initialization, it retrieves them
+        from the `site_store`.
         """
         companies = self.companies
         if companies is None:
-            companies = self.site_store.get_companies()
+            companies = await self.site_store.aget_companies()
         if len(companies) == 0:
             return
 
-        for company_batch in batched(companies, self.concurrent_threads):
-            tasks = [self.process_company(c) for c in company_batch]
-            await asyncio.gather(*tasks)
+        scheduler = WorkScheduler('find-reports', self.concurrent_threads)
+        await scheduler.run(companies, self.process_company)
 
     async def process_company(
         self,
@@ -122,14 +172,14 @@ class FinRepFinder:
         Args:
             company: The name of the company to process.
         """
-        existing_report = self.annual_report_link_store.get(company)
+        existing_report = await self.annual_report_link_store.aget(company)
         if existing_report is not None and existing_report.link is not None:
             return
         res = await self.find_annual_report(company)
         if res is None or res.link is None:
             logging.warning(f'Could not find report link for {company}')
             return
-        self.annual_report_link_store.store(company, res)
+        await self.annual_report_link_store.astore(company, res)
 
     async def find_annual_report(self, company: str) -> AnnualReportLink | None:
         """Finds the annual report for a company by crawling its websites.
@@ -147,7 +197,7 @@ class FinRepFinder:
             AnnualReportLink | None: The found annual report link and reference year,
                                      or None if not found or if crawling was aborted.
         """
-        done = self.model_action_store.get_done_action(company)
+        done = await self.model_action_store.aget_done_action(company)
         if done is not None:
             if done.action != 'done':  # aborted
                 return None
@@ -159,7 +209,7 @@ class FinRepFinder:
         start_urls = []
 
         # get starting points
-        site = self.site_store.get(company)
+        site = await self.site_store.aget(company)
         if site is None:
             logging.error(f'Annual report called on company with no site in db {company}')
         if site.investor_relations_page is not None:
@@ -173,9 +223,17 @@ class FinRepFinder:
             )
             return None
 
+        candidate_links = None
+        if self.sitemap_discovery is not None:
+            report, candidate_links = await self.__discover_from_sitemaps(company, start_urls)
+            if report is not None:
+                return report
+
         for url in start_urls:
             try:
-                return await self.crawl_to_report(company, url)
+                if self.frontier_width > 0:
+                    return await self.explore_to_report(company, url, candidate_links)
+                return await self.crawl_to_report(company, url, candidate_links)
             except ValueError as e:
                 logging.error(str(e))
         return None
@@ -203,11 +261,51 @@ class FinRepFinder:
             h += f'URL: {a.taken_at_url}, Action: {action_json}\n'
         return h
 
+    def format_candidates_prompt(self, candidate_links: list[str] | None) -> str:
+        """Formats the likely report links found without crawling for the LLM prompt.
+
+        Args:
+            candidate_links: The candidate links, best first.
+
+        Returns:
+            str: The formatted candidates, or an empty string if there are none.
+        """
+        if not candidate_links:
+            return ''
+        return (
+            '\nThese pdf links were found in the sitemap of the website and may be the report '
+            '(verify the year before choosing one):\n' + '\n'.join(candidate_links) + '\n'
+        )
+
+    def format_links_prompt(
+        self,
+        webpage_markdown: str,
+        links: markdown_utils.LinkTable | None,
+    ) -> str:
+        """Appends the link table of a pruned page to the page for the LLM prompt.
+
+        Args:
+            webpage_markdown: Markdown content of the current webpage.
+            links: The link table of the page, None if the page was not pruned.
+
+        Returns:
+            str: The page with its link table, or the page as is without a link table.
+        """
+        if links is None:
+            return webpage_markdown
+        return (
+            'Links are shown as their number in brackets, e.g. [3], see the link table '
+            'after the page. You may answer with the number of a link instead of its url.'
+            f'\n\n{webpage_markdown}\n\nlink table:\n{links.format()}'
+        )
+
     def format_crawl_prompt(
         self,
         webpage_markdown: str,
         history: list[ModelActionResponseWithMetadata] | None,
         urlqueue: list[str],
+        links: markdown_utils.LinkTable | None = None,
+        candidate_links: list[str] | None = None,
     ) -> str:
         """Formats the main prompt for the LLM to guide its web crawling action.
 
@@ -219,11 +317,15 @@ class FinRepFinder:
             webpage_markdown: Markdown content of the current webpage.
             history: Optional list of previous model actions and their outcomes.
             urlqueue: Current navigation stack (list of URLs visited).
+            links: The link table of a pruned page, appended after the page.
+            candidate_links: Likely report links found without crawling.
 
         Returns:
             str: The complete prompt string for the LLM.
         """
         history_reminder = '' if history is None else self.format_history_prompt(history, urlqueue)
+        history_reminder += self.format_candidates_prompt(candidate_links)
+        webpage_markdown = self.format_links_prompt(webpage_markdown, links)
         return f"""Extract the direct link to the latest annual financial report (pdf if available, only stop at html for private companies) from the markdownified webpage below.
 
         If you found it. output: {{"action":"done", "annual_report":"link goes here", "reference_year":"YYYY-MM-DD"}}.
@@ -238,11 +340,97 @@ class FinRepFinder:
 
         webpage:\n{webpage_markdown}"""
 
+    def format_explore_prompt(
+        self,
+        webpage_markdown: str,
+        history: list[ModelActionResponseWithMetadata] | None,
+        visited: list[str],
+        links: markdown_utils.LinkTable | None = None,
+        candidate_links: list[str] | None = None,
+    ) -> str:
+        """Formats the prompt of the best-first search, asking for several candidate links.
+
+        Args:
+            webpage_markdown: Markdown content of the current webpage.
+            history: Optional list of previous model actions and their outcomes.
+            visited: The URLs evaluated so far, in order.
+            links: The link table of a pruned page, appended after the page.
+            candidate_links: Likely report links found without crawling.
+
+        Returns:
+            str: The complete prompt string for the LLM.
+        """
+        history_reminder = '' if history is None else self.format_history_prompt(history, visited)
+        history_reminder += self.format_candidates_prompt(candidate_links)
+        webpage_markdown = self.format_links_prompt(webpage_markdown, links)
+        return f"""Extract the direct link to the latest annual financial report (pdf if available, only stop at html for private companies) from the markdownified webpage below.
+
+        If you found it. output: {{"action":"done", "link":"link goes here", "reference_year":"YYYY-MM-DD"}}.
+
+        If you did not find a direct link, output up to {self.frontier_width} links of this page that may lead there, most promising first: {{"action":"visit", "links_to_visit":["link goes here"]}}. They are visited in parallel, and other pages seen earlier may be evaluated next.
+
+        If this page is a dead end, output {{"action":"back", "note":"very brief message about what you found (2 sentences max)"}}
+
+        If you think there is a problem or there is no chance of finding the annual report on this website, output {{"action":"abort", "error":"error message here"}}
+
+        {history_reminder}
+
+        webpage:\n{webpage_markdown}"""
+
+    async def __ask_model(
+        self,
+        company: str,
+        prompt: str,
+        state: CrawlState,
+        response_schema: type[ModelActionResponse],
+        links: markdown_utils.LinkTable | None,
+    ) -> ModelActionResponse:
+        """Asks the PRO model for its action on the current page and records the action.
+
+        Link numbers in the answer are mapped back to their URLs, the conversation and the
+        action are stored and the action is appended to the state.
+
+        Raises:
+            genai_utils.GenerationError: If the LLM fails to generate a response.
+            pydantic.ValidationError: If the response is malformed.
+        """
+        conversation = self.gen_client.get_simple_message(prompt)
+
+        await self.conversation_store.astore(company, 'report_find', conversation)
+        generation_res = await self.gen_client.generate(
+            conversation,
+            thinking_budget=1024,
+            response_schema=response_schema,
+            model=genai_utils.PRO,
+        )
+        conversation.append(generation_res.candidates[0].content)
+        await self.conversation_store.astore(company, 'report_find', conversation)
+        response = response_schema.model_validate_json(generation_res.text)
+        if links is not None:
+            response.link = links.resolve(response.link)
+            response.link_to_visit = links.resolve(response.link_to_visit)
+
+        state.url_history.append(state.current_url)
+        action = ModelActionResponseWithMetadata(
+            **response.model_dump(),
+            taken_at_url=state.current_url,
+            action_ts_ms=int(dt.datetime.now().timestamp() * 1000),
+        )
+        await self.model_action_store.astore(
+            company,
+            state.current_url,
+            action,
+            (action.action == 'done' or action.action == 'abort'),
+        )
+        state.action_history.append(action)
+        return response
+
     async def __handle_model_interaction(
         self,
         company: str,
         page_markdown: str,
         state: CrawlState,
+        links: markdown_utils.LinkTable | None = None,
     ) -> AnnualReportLink | None:
         """Manages a single interaction with the LLM for a webpage.
 
@@ -257,6 +445,8 @@ class FinRepFinder:
             company: The name of the company being processed.
             page_markdown: Markdown content of the current webpage.
             state: The current `CrawlState` object for this company's crawl session.
+            links: The link table of a pruned page, link numbers in the answer are mapped
+                   back to their URLs.
 
         Returns:
             AnnualReportLink | None: An `AnnualReportLink` if the 'done' action is
@@ -272,33 +462,11 @@ class FinRepFinder:
             page_markdown,
             state.action_history,
             state.url_history,
+            links,
+            state.candidate_links,
         )
-        conversation = self.gen_client.get_simple_message(prompt)
-
-        self.conversation_store.store(company, 'report_find', conversation)
-        generation_res = await self.gen_client.generate(
-            conversation,
-            thinking_budget=1024,
-            response_schema=ModelActionResponse,
-            model=genai_utils.PRO,
-        )
-        conversation.append(generation_res.candidates[0].content)
-        self.conversation_store.store(company, 'report_find', conversation)
-        response = ModelActionResponse.model_validate_json(generation_res.text)
-
-        state.url_history.append(state.current_url)
-        action = ModelActionResponseWithMetadata(
-            **response.model_dump(),
-            taken_at_url=state.current_url,
-            action_ts_ms=int(dt.datetime.now().timestamp() * 1000),
-        )
-        self.model_action_store.store(
-            company,
-            state.current_url,
-            action,
-            (action.action == 'done' or action.action == 'abort'),
-        )
-        state.action_history.append(action)
+        response = await self.__ask_model(company, prompt, state, ModelActionResponse, links)
+        action = state.action_history[-1]
         if response.action == 'done':
             refyear = (
                 int(response.reference_year.split('-')[0])
@@ -318,7 +486,172 @@ class FinRepFinder:
             state.current_url = state.url_history[-2]
         return None
 
-    async def crawl_to_report(self, company: str, start_url: str) -> AnnualReportLink | None:
+    async def __discover_from_sitemaps(
+        self,
+        company: str,
+        start_urls: list[str],
+    ) -> tuple[AnnualReportLink | None, list[str] | None]:
+        """Looks for the annual report among the PDFs listed in the sitemaps of the websites.
+
+        Args:
+            company: The name of the company being processed.
+            start_urls: The websites of the company.
+
+        Returns:
+            tuple[AnnualReportLink | None, list[str] | None]: The report link if a candidate was
+                accepted or confirmed, and the candidates worth showing to the model otherwise.
+        """
+        ranker = self.sitemap_discovery.ranker
+        # only candidates above the confirm threshold cost a FLASH call or reach the prompt
+        candidates = ranker.candidates(await self.sitemap_discovery.discover(start_urls))
+        if not candidates:
+            return None, None
+        links = markdown_utils.LinkTable()
+        for c in candidates:
+            links.add(c.url, c.text)
+        state = CrawlState(start_urls[0], action_history=[], url_history=[])
+        report = await self.__rank_links(company, state, links, ranker)
+        return report, [c.url for c in candidates]
+
+    async def __rank_links(
+        self,
+        company: str,
+        state: CrawlState,
+        links: markdown_utils.LinkTable,
+        ranker: link_ranker.LinkRanker | None = None,
+    ) -> AnnualReportLink | None:
+        """Looks for the annual report among the links of a page without asking the PRO model.
+
+        The best link is accepted if the ranker is certain enough, otherwise the best
+        candidates (if any) are shown to the FLASH model to pick from.
+
+        Args:
+            company: The name of the company being processed.
+            state: The current `CrawlState` object for this company's crawl session.
+            links: The link table of the current page.
+            ranker: The ranker scoring the links. Defaults to the ranker of the finder.
+
+        Returns:
+            AnnualReportLink | None: The report link, or None if the model has to navigate on.
+        """
+        ranker = self.link_ranker if ranker is None else ranker
+        ranked = ranker.rank(links)
+        if ranker.is_accepted(ranked):
+            best = ranked[0]
+            # only the year is known, the closing date is left to the extraction
+            reference_year = None if best.year is None else f'{best.year}-12-31'
+            note = f'Accepted by the link ranker with score {best.score}'
+        else:
+            candidates = ranker.candidates(ranked)
+            if not candidates:
+                return None
+            confirmation = await self.__confirm_links(company, candidates)
+            if confirmation is None or confirmation.choice is None:
+                return None
+            if not 1 <= confirmation.choice <= len(candidates):
+                return None
+            best = candidates[confirmation.choice - 1]
+            reference_year = confirmation.reference_year
+            note = f'Confirmed by {genai_utils.FLASH} with link ranker score {best.score}'
+        logging.info(f'Found report link for {company} without navigation: {best.url}')
+        state.url_history.append(state.current_url)
+        action = ModelActionResponseWithMetadata(
+            action='done',
+            link=best.url,
+            reference_year=reference_year,
+            note=note,
+            taken_at_url=state.current_url,
+            action_ts_ms=int(dt.datetime.now().timestamp() * 1000),
+        )
+        await self.model_action_store.astore(company, state.current_url, action, True)
+        state.action_history.append(action)
+        refyear = int(reference_year.split('-')[0]) if reference_year is not None else None
+        return AnnualReportLink(link=best.url, refyear=refyear)
+
+    async def __confirm_links(
+        self,
+        company: str,
+        candidates: list[link_ranker.RankedLink],
+    ) -> ReportLinkConfirmation | None:
+        """Asks the FLASH model which of the candidate links is the latest annual report.
+
+        Returns None if the model call fails, the page is then left to the PRO model.
+        """
+        listing = '\n'.join(
+            f'{i}. {c.text or "(no link text)"}: {c.url}' for i, c in enumerate(candidates, start=1)
+        )
+        prompt = f"""Which of the links below, found on the website of {company}, points to the latest full annual financial report of the company (not an interim, sustainability or summary document)?
+
+        {listing}
+
+        Answer with the number of the link, or null if none of them does."""
+        try:
+            res = await self.gen_client.generate(
+                self.gen_client.get_simple_message(prompt),
+                response_schema=ReportLinkConfirmation,
+                model=genai_utils.FLASH,
+            )
+            return ReportLinkConfirmation.model_validate_json(res.text)
+        except (genai_utils.GenerationError, pydantic.ValidationError) as e:
+            logging.warning(f'Failed to confirm report links for {company}, cause: {e}')
+            return None
+
+    async def restore_state(
+        self,
+        company: str,
+        start_url: str,
+        candidate_links: list[str] | None = None,
+    ) -> CrawlState | None:
+        """Rebuilds the crawl state of an interrupted crawl from the stored model actions.
+
+        The stored steps are replayed in order the same way the crawl applies them,
+        yielding the action history, the navigation stack and the page to continue at.
+        Finished crawls (done/abort) and crawls that used up `max_tries_per_company`
+        pages are not resumed, the latter start over.
+
+        Args:
+            company: The name of the company.
+            start_url: The URL the crawl starts from. Stored crawls started elsewhere
+                       are not resumed.
+            candidate_links: Likely report links found without crawling, shown to the model.
+
+        Returns:
+            CrawlState | None: The restored state, or None if there is no unfinished crawl
+                               from `start_url` to resume.
+        """
+        actions = await self.model_action_store.aget_steps(company)
+        if not actions or actions[0].taken_at_url != start_url:
+            return None
+        if len(actions) >= self.max_pages_per_company:
+            logging.info(f'Stored crawl of {company} used up its pages, starting over')
+            return None
+        state = CrawlState(
+            start_url,
+            action_history=[],
+            url_history=[],
+            candidate_links=candidate_links,
+        )
+        for action in actions:
+            if action.taken_at_url != state.current_url:
+                logging.warning(f'Stored crawl of {company} is inconsistent, starting over')
+                return None
+            state.url_history.append(action.taken_at_url)
+            state.action_history.append(action)
+            if action.action == 'visit' and action.link_to_visit is not None:
+                state.current_url = action.link_to_visit
+            elif action.action == 'back' and len(state.url_history) >= 2:
+                state.current_url = state.url_history[-2]
+            elif action.action != 'back':
+                # finished (done/abort) or unusable crawls are not resumed
+                return None
+        return state
+
+    async def crawl_to_report(
+        self,
+        company: str,
+        start_url: str,
+        candidate_links: list[str] | None = None,
+    ) -> AnnualReportLink | None:
         """Crawls websites starting from a given URL to find an annual report.
 
         This method iteratively:
@@ -331,37 +664,61 @@ class FinRepFinder:
         Args:
             company: The name of the company.
             start_url: The initial URL to start crawling from.
+            candidate_links: Likely report links found without crawling, shown to the model.
 
         Returns:
             AnnualReportLink | None: The found annual report link, or None if not
                                      found within limits or due to abort/error.
         """
-        state = CrawlState(
-            start_url,
-            action_history=[],
-            url_history=[],
-        )
+        state = None
+        if self.resume:
+            state = await self.restore_state(company, start_url, candidate_links)
+        if state is None:
+            await self.model_action_store.adel_all(company)
+            state = CrawlState(
+                start_url,
+                action_history=[],
+                url_history=[],
+                candidate_links=candidate_links,
+            )
+        else:
+            logging.info(
+                f'Resuming crawl of {company} after {len(state.action_history)} steps '
+                f'at {state.current_url}'
+            )
         report = None
-        page_visits = 0
+        # restored steps count towards the page limit
+        page_visits = len(state.action_history)
         retried = False
-        self.model_action_store.del_all(company)
 
         while page_visits < self.max_pages_per_company:
             res = await self.crawler.crawl(state.current_url)
-            if not res.success:
-                if retried and page_visits == 0:
-                    break
-                if retried:
-                    markdown = f'Failed to crawl {state.current_url}'
+            if not res.success and not retried:
                 retried = True
                 continue
-            markdown = res.markdown
+            if not res.success and page_visits == 0:
+                break
+            retried = False
+            if res.success:
+                markdown, links = markdown_utils.prune_markdown(
+                    res.markdown, state.current_url, state.seen_blocks
+                )
+                if self.link_ranker is not None:
+                    report = await self.__rank_links(company, state, links)
+                    if report is not None:
+                        return report
+                if not self.prune_pages:
+                    markdown, links = res.markdown, None
+            else:
+                # let the model go back or choose another link
+                markdown, links = f'Failed to crawl {state.current_url}', None
 
             try:
                 report = await self.__handle_model_interaction(
                     company,
                     markdown,
                     state,
+                    links,
                 )
                 if report is not None:
                     return report
@@ -372,3 +729,100 @@ class FinRepFinder:
             page_visits += 1
 
         return report
+
+    async def explore_to_report(
+        self,
+        company: str,
+        start_url: str,
+        candidate_links: list[str] | None = None,
+    ) -> AnnualReportLink | None:
+        """Searches a website best-first for the annual report.
+
+        Every evaluated page yields up to `frontier_width` candidate links from the model.
+        The candidates are crawled concurrently into a frontier of crawled pages, and the
+        most promising page of the frontier is evaluated next. Pages are ranked by the
+        order the model named them in, their depth and (if configured) the link ranker
+        score, so a dead end falls back to the next best page without a 'back' step.
+        Explorations are not resumable: the stored actions of the company are deleted
+        first, including those of an interrupted sequential crawl.
+
+        Args:
+            company: The name of the company.
+            start_url: The initial URL to start exploring from.
+            candidate_links: Likely report links found without crawling, shown to the model.
+
+        Returns:
+            AnnualReportLink | None: The found annual report link, or None if not
+                                     found within limits or due to abort/error.
+        """
+        state = CrawlState(
+            start_url,
+            action_history=[],
+            url_history=[],
+            candidate_links=candidate_links,
+        )
+        await self.model_action_store.adel_all(company)
+        res = await self.crawler.crawl(start_url)
+        if not res.success:
+            return None
+        seen = {crawler.normalize_url(start_url)}
+        order = itertools.count()
+        # (negated priority, insertion order, depth, url, crawl result)
+        frontier = [(0.0, next(order), 0, start_url, res)]
+        evaluated = 0
+
+        while frontier and evaluated < self.max_pages_per_company:
+            _, _, depth, state.current_url, res = heapq.heappop(frontier)
+            markdown, links = markdown_utils.prune_markdown(
+                res.markdown, state.current_url, state.seen_blocks
+            )
+            if self.link_ranker is not None:
+                report = await self.__rank_links(company, state, links)
+                if report is not None:
+                    return report
+            if not self.prune_pages:
+                markdown, links = res.markdown, None
+
+            prompt = self.format_explore_prompt(
+                markdown, state.action_history, state.url_history, links, state.candidate_links
+            )
+            response = await self.__ask_model(company, prompt, state, FrontierActionResponse, links)
+            evaluated += 1
+            if response.action == 'done':
+                refyear = (
+                    int(response.reference_year.split('-')[0])
+                    if response.reference_year is not None
+                    else None
+                )
+                return AnnualReportLink(link=response.link, refyear=refyear)
+            if response.action == 'abort':
+                logging.info(f'LLM decided to abort exploring to report for company {company}')
+                return None
+            if response.action != 'visit':
+                continue
+
+            candidates = response.links_to_visit or [response.link_to_visit]
+            targets = []
+            for link in candidates:
+                if link is None:
+                    continue
+                url = link if links is None else links.resolve(link)
+                if crawler.normalize_url(url) in seen:
+                    continue
+                seen.add(crawler.normalize_url(url))
+                targets.append(url)
+            targets = targets[: self.frontier_width]
+            results = await asyncio.gather(
+                *[self.crawler.crawl(url) for url in targets], return_exceptions=True
+            )
+            for rank, (url, res) in enumerate(zip(targets, results)):
+                if isinstance(res, BaseException) or not res.success:
+                    logging.debug(f'Dropping {url} from the frontier of {company}')
+                    continue
+                priority = -rank - depth
+                if self.link_ranker is not None:
+                    number = None if links is None else links.numbers.get(url)
+                    text = '' if number is None else links.texts[number - 1]
+                    priority += self.link_ranker.score(url, text).score
+                heapq.heappush(frontier, (-priority, next(order), depth + 1, url, res))
+        return None
@@ -172,6 +172,26 @@ class GCSBatchUploader:
         except Exception as e:
             return e
 
+    def upload_blob(self, local_path: str, destination_name: str) -> str | Exception:
+        """
+        Uploads a single file to GCS from the calling thread.
+
+        Meant to be called from worker threads (e.g. via asyncio.to_thread), each
+        thread reuses its own GCSClient just like the batch upload workers.
+
+        Args:
+            local_path: The local file path to upload.
+            destination_name: The destination blob name in GCS.
+
+        Returns:
+            str | Exception: The full GCS HTTP URL of the uploaded file on success,
+                             or the Exception object encountered during upload on failure.
+        """
+        res = self.__upload_worker((local_path, destination_name))
+        if type(res) is not str:
+            return res
+        return f'https://storage.cloud.google.com/{self.bucket_name}/{destination_name}'
+
     def upload_dir(
         self,
         directory: str,
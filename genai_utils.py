@@ -1,13 +1,21 @@
+import io
 import os
+import json
+import time
+import random
+import asyncio
+import logging
 from typing import Literal, Type
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 import pydantic
 
+import cache_utils
 from valkey_utils import ConfigurationError
 
 FLASH = 'gemini-2.5-flash-preview-04-17'
 PRO = 'gemini-2.5-pro-preview-03-25'
+EMBEDDING = 'gemini-embedding-001'
 
 
 class GenerationError(Exception):
@@ -17,6 +25,332 @@ class GenerationError(Exception):
         super().__init__(*args)
 
 
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `capacity_per_min` per minute.
+
+    The balance may go negative when the actual cost of a call turns out higher
+    than its estimate, later callers then wait until the debt is paid back.
+    """
+
+    def __init__(self, capacity_per_min: float) -> None:
+        """Initializes a full TokenBucket.
+
+        Args:
+            capacity_per_min: The bucket size, also the amount refilled per minute.
+        """
+        self.capacity = capacity_per_min
+        self.tokens = capacity_per_min
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, amount: float) -> None:
+        """Waits until `amount` tokens are available and takes them.
+
+        Callers are served in arrival order. Requests larger than the capacity
+        are capped to it, otherwise they could never be served.
+
+        Args:
+            amount: The number of tokens to take.
+        """
+        amount = min(amount, self.capacity)
+        async with self.lock:
+            while True:
+                self.__refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.capacity * 60)
+
+    def debit(self, amount: float) -> None:
+        """Takes tokens without waiting, e.g. to correct an estimate after the fact.
+
+        Args:
+            amount: The number of tokens to take, negative values refund tokens.
+        """
+        self.__refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def __refill(self) -> None:
+        """Adds the tokens accumulated since the last refill."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+
+class ModelRateLimiter:
+    """
+    Request and token budget of a single model, with adaptive backoff.
+
+    A quota error outside of a cooldown doubles the cooldown every caller of the model
+    has to wait (with jitter), a successful call resets it. Errors of concurrent calls
+    during a running cooldown do not escalate it further.
+    """
+
+    def __init__(
+        self,
+        rpm: int | None = None,
+        tpm: int | None = None,
+        base_backoff_sec: float = 2,
+        max_backoff_sec: float = 120,
+    ) -> None:
+        """Initializes the ModelRateLimiter.
+
+        Args:
+            rpm: Allowed requests per minute, None for no limit.
+            tpm: Allowed (estimated) tokens per minute, None for no limit.
+            base_backoff_sec: The cooldown after the first quota error.
+            max_backoff_sec: The upper bound of the cooldown.
+        """
+        self.requests = None if rpm is None else TokenBucket(rpm)
+        self.tokens = None if tpm is None else TokenBucket(tpm)
+        self.base_backoff_sec = base_backoff_sec
+        self.max_backoff_sec = max_backoff_sec
+        self.backoff_sec = 0.0
+        self.cooldown_until = 0.0
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        """Waits for the cooldown and until the request fits into the budget.
+
+        Args:
+            estimated_tokens: The estimated token cost of the request.
+        """
+        while (wait := self.cooldown_until - time.monotonic()) > 0:
+            await asyncio.sleep(wait)
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.tokens is not None:
+            await self.tokens.acquire(estimated_tokens)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int | None) -> None:
+        """Records a successful call, correcting the token estimate and resetting the backoff.
+
+        Args:
+            estimated_tokens: The estimate the budget was acquired with.
+            actual_tokens: The tokens reported by the API, None if unknown.
+        """
+        self.backoff_sec = 0
+        if self.tokens is not None and actual_tokens is not None:
+            self.tokens.debit(actual_tokens - min(estimated_tokens, self.tokens.capacity))
+
+    def penalize(self) -> float:
+        """Records a quota error and starts a cooldown for every caller of the model.
+
+        Returns:
+            float: The cooldown in seconds.
+        """
+        now = time.monotonic()
+        if now < self.cooldown_until:
+            # the calls sent before the cooldown started fail together, count them once
+            return self.cooldown_until - now
+        self.backoff_sec = min(
+            self.max_backoff_sec,
+            self.base_backoff_sec if self.backoff_sec == 0 else self.backoff_sec * 2,
+        )
+        cooldown = self.backoff_sec * random.uniform(0.5, 1.5)
+        self.cooldown_until = now + cooldown
+        return cooldown
+
+
+class RateLimiter:
+    """Per model rate limiters, created on first use."""
+
+    RETRYABLE_CODES = (429, 503)
+
+    def __init__(
+        self,
+        limits: dict[str, tuple[int | None, int | None]] | None = None,
+        max_retries: int = 5,
+    ) -> None:
+        """Initializes the RateLimiter.
+
+        Args:
+            limits: (requests per minute, tokens per minute) by model name. Models
+                    without an entry are not throttled, but still back off on quota errors.
+            max_retries: How many times a call failing with a quota error is retried.
+        """
+        self.limits = limits or {}
+        self.max_retries = max_retries
+        self.models: dict[str, ModelRateLimiter] = {}
+
+    @staticmethod
+    def from_env() -> 'RateLimiter':
+        """Creates a RateLimiter configured through environment variables.
+
+        Reads GEMINI_PRO_RPM, GEMINI_PRO_TPM, GEMINI_FLASH_RPM, GEMINI_FLASH_TPM
+        and GEMINI_MAX_RETRIES. Unset limits are not enforced.
+
+        Returns:
+            RateLimiter: The configured rate limiter.
+
+        Raises:
+            ConfigurationError: If a variable is not an integer.
+        """
+
+        def read(name: str) -> int | None:
+            value = os.environ.get(name)
+            if not value:
+                return None
+            try:
+                return int(value)
+            except ValueError as e:
+                raise ConfigurationError(f'{name} must be an integer, got {value}') from e
+
+        limits = {
+            PRO: (read('GEMINI_PRO_RPM'), read('GEMINI_PRO_TPM')),
+            FLASH: (read('GEMINI_FLASH_RPM'), read('GEMINI_FLASH_TPM')),
+        }
+        max_retries = read('GEMINI_MAX_RETRIES')
+        return RateLimiter(limits, max_retries=5 if max_retries is None else max_retries)
+
+    def for_model(self, model: str) -> ModelRateLimiter:
+        """Returns the limiter of a model.
+
+        Args:
+            model: The model name.
+
+        Returns:
+            ModelRateLimiter: The limiter shared by every call to the model.
+        """
+        if model not in self.models:
+            rpm, tpm = self.limits.get(model, (None, None))
+            self.models[model] = ModelRateLimiter(rpm, tpm)
+        return self.models[model]
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """Checks whether an error is a quota or overload error worth retrying."""
+        return isinstance(error, errors.APIError) and error.code in RateLimiter.RETRYABLE_CODES
+
+    @staticmethod
+    def estimate_tokens(contents: list[types.Content], thinking_budget: int = 0) -> int:
+        """Roughly estimates the token cost of a request.
+
+        Text is counted as 4 characters per token, inline documents as 150 bytes per token.
+
+        Args:
+            contents: The request contents.
+            thinking_budget: The thinking budget of the request, counted as spent.
+
+        Returns:
+            int: The estimated number of tokens.
+        """
+        estimate = thinking_budget
+        for content in contents:
+            for part in content.parts or []:
+                if part.text:
+                    estimate += len(part.text) // 4
+                elif part.inline_data is not None and part.inline_data.data:
+                    estimate += len(part.inline_data.data) // 150
+        return max(1, estimate)
+
+
+class ContextCache:
+    """
+    An explicit (server side) context cache holding a static prompt prefix.
+
+    The cache is created on first use and its TTL is extended shortly before it
+    expires, so it can be reused by every call of a long run.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        contents: list[types.Content],
+        system_instruction: str | None = None,
+        display_name: str | None = None,
+        ttl_sec: int = 3600,
+        refresh_margin_sec: int = 300,
+    ) -> None:
+        """Initializes the ContextCache, without creating it yet.
+
+        Args:
+            model: The model the cache is created for, calls using it must use this model.
+            contents: The static contents to cache.
+            system_instruction: An optional system instruction to cache.
+            display_name: An optional display name of the cache.
+            ttl_sec: The lifetime of the cache, extended on every refresh.
+            refresh_margin_sec: How long before expiry the cache is refreshed.
+        """
+        self.model = model
+        self.contents = contents
+        self.system_instruction = system_instruction
+        self.display_name = display_name
+        self.ttl_sec = ttl_sec
+        self.refresh_margin_sec = refresh_margin_sec
+        self.name: str | None = None
+        self.expires_at = 0.0
+        self.lock = asyncio.Lock()
+        self.fingerprint = cache_utils.stable_hash(
+            model,
+            system_instruction or '',
+            json.dumps(
+                [c.model_dump(mode='json', exclude_none=True) for c in contents],
+                sort_keys=True,
+            ),
+        )
+
+    async def get_name(self, client: genai.Client) -> str:
+        """Returns the name of the cache, creating or refreshing it if needed.
+
+        Args:
+            client: The client used to manage the cache.
+
+        Returns:
+            str: The cache name to pass as `cached_content`.
+
+        Raises:
+            GenerationError: If the cache can not be created.
+        """
+        async with self.lock:
+            if (
+                self.name is not None
+                and time.monotonic() < self.expires_at - self.refresh_margin_sec
+            ):
+                return self.name
+            if self.name is not None:
+                try:
+                    await client.aio.caches.update(
+                        name=self.name,
+                        config=types.UpdateCachedContentConfig(ttl=f'{self.ttl_sec}s'),
+                    )
+                    self.expires_at = time.monotonic() + self.ttl_sec
+                    return self.name
+                except Exception as e:
+                    logging.warning(f'Failed to refresh context cache {self.name}, cause: {e}')
+            try:
+                cache = await client.aio.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        contents=self.contents,
+                        system_instruction=self.system_instruction,
+                        display_name=self.display_name,
+                        ttl=f'{self.ttl_sec}s',
+                    ),
+                )
+            except Exception as e:
+                raise GenerationError('Failed to create context cache') from e
+            self.name = cache.name
+            self.expires_at = time.monotonic() + self.ttl_sec
+            logging.info(f'Created context cache {self.name} ({self.display_name})')
+            return self.name
+
+    async def delete(self, client: genai.Client) -> None:
+        """Deletes the cache if it was created, failures are logged and ignored.
+
+        Args:
+            client: The client used to manage the cache.
+        """
+        async with self.lock:
+            if self.name is None:
+                return
+            try:
+                await client.aio.caches.delete(name=self.name)
+            except Exception as e:
+                logging.warning(f'Failed to delete context cache {self.name}, cause: {e}')
+            self.name = None
+
+
 class GenaiClient:
     """Client for interacting with Google's Generative AI models (e.g., Gemini)."""
 
@@ -34,6 +368,8 @@ class GenaiClient:
         api_key: str,
         model: str = PRO,
         harm_block: types.HarmBlockThreshold = types.HarmBlockThreshold.OFF,
+        cache: cache_utils.ValkeyCache | cache_utils.DiskCache | None = None,
+        rate_limiter: RateLimiter | None = None,
     ) -> None:
         """Initializes the GenaiClient.
 
@@ -43,8 +379,14 @@ class GenaiClient:
         Args:
             api_key: The Google Generative AI API key.
             model: The name of the model to use (e.g., 'gemini-1.5-pro-preview-0514'). Defaults to PRO.
-            harm_block: The safety threshold for blocking harmful content. Defaults to OFF."""
+            harm_block: The safety threshold for blocking harmful content. Defaults to OFF.
+            cache: An optional response cache. Deterministic (temperature 0) requests are
+                   answered from the cache when an identical request was made before.
+            rate_limiter: An optional client side rate limiter, throttling calls to the
+                          model quota and retrying quota errors."""
         self.model = model
+        self.cache = cache
+        self.rate_limiter = rate_limiter
         self.client = genai.Client(
             api_key=api_key,
         )
@@ -58,11 +400,16 @@ class GenaiClient:
         self.safety_settings = safety_settings
 
     @staticmethod
-    def new(model: str = PRO) -> 'GenaiClient':
+    def new(
+        model: str = PRO,
+        cache: cache_utils.ValkeyCache | cache_utils.DiskCache | None = None,
+    ) -> 'GenaiClient':
         """Creates a new GenaiClient instance using the API key from environment variables.
 
         Args:
             model: The name of the generative model to use. Defaults to the PRO model constant.
+            cache: An optional response cache (see `cache_utils.cache_from_env`).
+                   The rate limits are read from the environment (see `RateLimiter.from_env`).
 
         Returns:
             A configured GenaiClient instance.
@@ -73,7 +420,12 @@ class GenaiClient:
         api_key = os.environ.get('GEMINI_API_TOKEN')
         if api_key is None:
             raise ConfigurationError('GEMINI_API_TOKEN variable not set, failed to init client')
-        return GenaiClient(api_key=api_key, model=model)
+        return GenaiClient(
+            api_key=api_key,
+            model=model,
+            cache=cache,
+            rate_limiter=RateLimiter.from_env(),
+        )
 
     @staticmethod
     def get_simple_message(
@@ -121,6 +473,8 @@ class GenaiClient:
         url_context: bool = False,
         model: str | None = None,
         temperature: float = 0,
+        use_cache: bool = True,
+        context_cache: ContextCache | None = None,
     ) -> types.GenerateContentResponse:
         """Generates content using the Google Generative AI API.
 
@@ -133,7 +487,10 @@ class GenaiClient:
             google_search: Whether to enable the Browsing tool (replaces Google Search explicitly).
             model: An optional model name to override the client's default model
                    for this specific call.
-
+            temperature: The sampling temperature. Only temperature 0 responses are cached.
+            use_cache: Whether the response cache may be used for this call.
+            context_cache: An optional context cache holding the prefix of `contents`.
+                           The call uses the model of the context cache.
 
         Returns:
             The `google.generai.types.GenerateContentResponse` object from the API.
@@ -148,6 +505,11 @@ class GenaiClient:
         if url_context:
             tools.append(types.Tool(url_context=types.UrlContext()))
 
+        model = self.model if model is None else model
+        cached_content = None
+        if context_cache is not None:
+            model = context_cache.model
+            cached_content = await context_cache.get_name(self.client)
         generate_content_config = types.GenerateContentConfig(
             thinking_config=types.ThinkingConfig(
                 thinking_budget=thinking_budget,
@@ -156,13 +518,197 @@ class GenaiClient:
             response_schema=response_schema,
             temperature=temperature,
             tools=tools if tools else None,
+            cached_content=cached_content,
         )
+        cache_key = None
+        if self.cache is not None and use_cache and temperature == 0:
+            cache_key = GenaiClient.__cache_key(
+                model,
+                contents,
+                thinking_budget,
+                response_schema,
+                google_search,
+                url_context,
+                None if context_cache is None else context_cache.fingerprint,
+            )
+            cached = await self.__cache_get(cache_key)
+            if cached is not None:
+                return cached
+        try:
+            response = await self.__generate_limited(
+                model,
+                contents,
+                generate_content_config,
+                thinking_budget,
+            )
+        except Exception as e:
+            raise GenerationError('Failed to generate content') from e
+        if cache_key is not None and response.candidates:
+            await self.__cache_put(cache_key, response)
+        return response
+
+    async def upload_file(
+        self,
+        data: bytes,
+        mime_type: str,
+        display_name: str | None = None,
+        poll_interval_sec: float = 2,
+    ) -> types.File:
+        """Uploads a file through the file API, so requests can reference it instead of inlining it.
+
+        Args:
+            data: The file contents.
+            mime_type: The mime type of the file (e.g. 'application/pdf').
+            display_name: An optional display name of the file.
+            poll_interval_sec: Interval between two checks of the file processing state.
+
+        Returns:
+            types.File: The handle of the active file, usable with `types.Part.from_uri`.
+
+        Raises:
+            GenerationError: If the upload or the processing of the file fails.
+        """
         try:
-            response = await self.client.aio.models.generate_content(
-                model=self.model if model is None else model,
+            file = await self.client.aio.files.upload(
+                file=io.BytesIO(data),
+                config=types.UploadFileConfig(mime_type=mime_type, display_name=display_name),
+            )
+            while file.state == types.FileState.PROCESSING:
+                await asyncio.sleep(poll_interval_sec)
+                file = await self.client.aio.files.get(name=file.name)
+        except Exception as e:
+            raise GenerationError('Failed to upload file') from e
+        if file.state == types.FileState.FAILED:
+            raise GenerationError(f'Processing of uploaded file {file.name} failed: {file.error}')
+        return file
+
+    async def embed(
+        self,
+        texts: list[str],
+        model: str = EMBEDDING,
+        task_type: str = 'CLASSIFICATION',
+        batch_size: int = 100,
+    ) -> list[list[float]]:
+        """Embeds texts with an embedding model.
+
+        Args:
+            texts: The texts to embed.
+            model: The embedding model. Defaults to EMBEDDING.
+            task_type: The task the embeddings are optimized for (e.g. 'CLASSIFICATION').
+            batch_size: Maximum number of texts sent in a single request.
+
+        Returns:
+            list[list[float]]: One embedding per text, in input order.
+
+        Raises:
+            GenerationError: If the embedding API call fails.
+        """
+        embeddings = []
+        for i in range(0, len(texts), batch_size):
+            batch = texts[i : i + batch_size]
+            try:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.for_model(model).acquire(
+                        sum(len(t) for t in batch) // 4
+                    )
+                response = await self.client.aio.models.embed_content(
+                    model=model,
+                    contents=batch,
+                    config=types.EmbedContentConfig(task_type=task_type),
+                )
+            except Exception as e:
+                raise GenerationError('Failed to embed content') from e
+            if response.embeddings is None or len(response.embeddings) != len(batch):
+                raise GenerationError('Embedding response does not match the number of texts')
+            embeddings.extend(e.values for e in response.embeddings)
+        return embeddings
+
+    async def __generate_limited(
+        self,
+        model: str,
+        contents: list[types.Content],
+        config: types.GenerateContentConfig,
+        thinking_budget: int,
+    ) -> types.GenerateContentResponse:
+        """Calls the API within the rate limits, retrying quota errors with backoff."""
+        if self.rate_limiter is None:
+            return await self.client.aio.models.generate_content(
+                model=model,
                 contents=contents,
-                config=generate_content_config,
+                config=config,
             )
+        limiter = self.rate_limiter.for_model(model)
+        estimate = RateLimiter.estimate_tokens(contents, thinking_budget)
+        attempt = 0
+        while True:
+            await limiter.acquire(estimate)
+            try:
+                response = await self.client.aio.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=config,
+                )
+            except Exception as e:
+                if not RateLimiter.is_retryable(e) or attempt >= self.rate_limiter.max_retries:
+                    raise
+                attempt += 1
+                cooldown = limiter.penalize()
+                logging.warning(
+                    f'{model} returned {e.code}, retry {attempt}/{self.rate_limiter.max_retries} '
+                    f'after {cooldown:.1f}s cooldown'
+                )
+                continue
+            usage = response.usage_metadata
+            limiter.settle(estimate, None if usage is None else usage.total_token_count)
             return response
+
+    async def __cache_get(self, key: str) -> types.GenerateContentResponse | None:
+        """Looks up a cached response, cache failures are logged and treated as misses."""
+        try:
+            cached = await self.cache.get(key)
+            if cached is None:
+                return None
+            return types.GenerateContentResponse.model_validate_json(cached)
         except Exception as e:
-            raise GenerationError('Failed to generate content') from e
+            logging.warning(f'Failed to read response cache, cause: {e}')
+            return None
+
+    async def __cache_put(self, key: str, response: types.GenerateContentResponse) -> None:
+        """Caches a response, cache failures are logged and ignored."""
+        try:
+            await self.cache.put(key, response.model_dump_json(exclude_none=True))
+        except Exception as e:
+            logging.warning(f'Failed to write response cache, cause: {e}')
+
+    @staticmethod
+    def __cache_key(
+        model: str,
+        contents: list[types.Content],
+        thinking_budget: int,
+        response_schema: Type[pydantic.BaseModel] | None,
+        google_search: bool,
+        url_context: bool,
+        context_fingerprint: str | None,
+    ) -> str:
+        """Creates the content address of a request from everything that affects the response.
+
+        Context caches are identified by a fingerprint of their contents, not by their
+        name, so the key stays the same when a cache is recreated.
+        """
+        config = {
+            'context': context_fingerprint,
+            'thinking_budget': thinking_budget,
+            'response_schema': None
+            if response_schema is None
+            else response_schema.model_json_schema(),
+            'google_search': google_search,
+            'url_context': url_context,
+        }
+        return cache_utils.stable_hash(
+            model,
+            json.dumps(
+                [c.model_dump(mode='json', exclude_none=True) for c in contents],
+                sort_keys=True,
+            ),
+            json.dumps(config, sort_keys=True),
+        )
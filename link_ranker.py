@@ -0,0 +1,213 @@
+import re
+import datetime as dt
+import urllib.parse
+
+import markdown_utils
+
+# names of the annual (financial) report in the most common report languages
+REPORT_KEYWORDS = (
+    'annual report',
+    'annual financial report',
+    'integrated report',
+    'universal registration document',
+    'registration document',
+    'annual accounts',
+    'financial statements',
+    '10 k',
+    '20 f',
+    'geschäftsbericht',
+    'geschaftsbericht',
+    'jahresbericht',
+    'jahresabschluss',
+    'jahresfinanzbericht',
+    'rapport annuel',
+    'rapport financier annuel',
+    "document d'enregistrement universel",
+    'comptes annuels',
+    'relazione finanziaria annuale',
+    'bilancio',
+    'informe anual',
+    'cuentas anuales',
+    'relatório anual',
+    'relatorio anual',
+    'jaarverslag',
+    'jaarrekening',
+    'årsredovisning',
+    'arsredovisning',
+    'årsrapport',
+    'vuosikertomus',
+    'raport roczny',
+    'výroční zpráva',
+    'éves jelentés',
+)
+# documents that often sit next to the annual report but are not it
+EXCLUDE_KEYWORDS = (
+    'half year',
+    'halfyear',
+    'halbjahr',
+    'interim',
+    'quarter',
+    'q1',
+    'q2',
+    'q3',
+    'h1',
+    'sustainability',
+    'nachhaltigkeit',
+    'esg',
+    'remuneration',
+    'vergütung',
+    'governance',
+    'presentation',
+    'präsentation',
+    'proxy',
+    'press release',
+    'summary',
+    'kurzfassung',
+    'factsheet',
+    'fact sheet',
+    'agm',
+    'invitation',
+)
+PDF_SCORE = 3
+PDF_TEXT_SCORE = 1
+KEYWORD_TEXT_SCORE = 5
+KEYWORD_URL_SCORE = 3
+EXCLUDE_SCORE = -6
+RECENT_YEAR_SCORE = 2
+OLD_YEAR_SCORE = -3
+# links known by their URL only (e.g. from sitemaps) score at most PDF + URL keyword +
+# recent year, their thresholds are lowered accordingly
+URL_ONLY_ACCEPT_SCORE = PDF_SCORE + KEYWORD_URL_SCORE + RECENT_YEAR_SCORE
+URL_ONLY_CONFIRM_SCORE = PDF_SCORE + KEYWORD_URL_SCORE
+
+SEPARATOR_PATTERN = re.compile(r'[\s\-_/.+%,;:()\[\]]+')
+YEAR_PATTERN = re.compile(r'(?<!\d)(20\d{2})(?!\d)')
+
+
+def normalize(text: str) -> str:
+    """Lowercases a text and replaces separators (dashes, slashes, dots...) with spaces."""
+    return ' ' + SEPARATOR_PATTERN.sub(' ', urllib.parse.unquote(text).lower()).strip() + ' '
+
+
+def contains(normalized: str, keywords: tuple[str, ...]) -> bool:
+    """Checks whether a normalized text contains any of the keywords as whole words."""
+    return any(f' {normalize(k).strip()} ' in normalized for k in keywords)
+
+
+class RankedLink:
+    """A candidate annual report link with its score."""
+
+    def __init__(self, url: str, text: str, score: float, year: int | None) -> None:
+        """Initializes the RankedLink.
+
+        Args:
+            url: The URL of the link.
+            text: The text of the link.
+            score: The score of the link, higher is more likely the latest annual report.
+            year: The latest year mentioned in the text or URL of the link, if any.
+        """
+        self.url = url
+        self.text = text
+        self.score = score
+        self.year = year
+        self.is_pdf = urllib.parse.urlsplit(url).path.lower().endswith('.pdf')
+
+
+class LinkRanker:
+    """
+    Scores the links of a page by how likely they point to the latest annual report.
+
+    The score combines the anchor text, the tokens of the URL path, the file extension,
+    the recency of the mentioned year and report keywords of several languages.
+    """
+
+    def __init__(
+        self,
+        accept_score: float = 11,
+        confirm_score: float = 7,
+        min_margin: float = 2,
+        current_year: int | None = None,
+    ) -> None:
+        """Initializes the LinkRanker.
+
+        Args:
+            accept_score: PDF links scoring at least this much, with a margin over the second
+                          best link, are accepted without asking the model.
+            confirm_score: The best links scoring at least this much (but not accepted) are
+                           worth confirming with a cheap model call.
+            min_margin: The score margin the best link needs over the second best to be accepted.
+            current_year: The year recency is measured to. Defaults to the current year.
+        """
+        self.accept_score = accept_score
+        self.confirm_score = confirm_score
+        self.min_margin = min_margin
+        self.current_year = dt.date.today().year if current_year is None else current_year
+
+    def score(self, url: str, text: str) -> RankedLink:
+        """Scores a single link.
+
+        Args:
+            url: The absolute URL of the link.
+            text: The text of the link.
+
+        Returns:
+            RankedLink: The scored link.
+        """
+        path = normalize(urllib.parse.urlsplit(url).path)
+        anchor = normalize(text)
+        score = 0
+        if path.endswith(' pdf '):
+            score += PDF_SCORE
+        if ' pdf ' in anchor:
+            score += PDF_TEXT_SCORE
+        if contains(anchor, REPORT_KEYWORDS):
+            score += KEYWORD_TEXT_SCORE
+        if contains(path, REPORT_KEYWORDS):
+            score += KEYWORD_URL_SCORE
+        if contains(anchor, EXCLUDE_KEYWORDS) or contains(path, EXCLUDE_KEYWORDS):
+            score += EXCLUDE_SCORE
+        years = [int(y) for y in YEAR_PATTERN.findall(f'{text} {path}')]
+        years = [y for y in years if y <= self.current_year]
+        year = max(years) if years else None
+        if year is not None:
+            score += RECENT_YEAR_SCORE if self.current_year - year <= 1 else 0
+            score += OLD_YEAR_SCORE if self.current_year - year > 2 else 0
+        return RankedLink(url, text, score, year)
+
+    def rank(self, links: markdown_utils.LinkTable) -> list[RankedLink]:
+        """Scores every link of a page.
+
+        Args:
+            links: The link table of the page.
+
+        Returns:
+            list[RankedLink]: The scored links, best first.
+        """
+        ranked = [self.score(url, text) for url, text in zip(links.urls, links.texts)]
+        return sorted(ranked, key=lambda r: r.score, reverse=True)
+
+    def is_accepted(self, ranked: list[RankedLink]) -> bool:
+        """Checks whether the best link is certain enough to be accepted as is.
+
+        Args:
+            ranked: The scored links, best first.
+
+        Returns:
+            bool: True if the best link is a PDF scoring above the accept threshold with a
+                  margin over the second best link.
+        """
+        if not ranked or not ranked[0].is_pdf or ranked[0].score < self.accept_score:
+            return False
+        return len(ranked) < 2 or ranked[0].score - ranked[1].score >= self.min_margin
+
+    def candidates(self, ranked: list[RankedLink], k: int = 3) -> list[RankedLink]:
+        """Selects the links worth confirming with the model.
+
+        Args:
+            ranked: The scored links, best first.
+            k: The maximum number of candidates.
+
+        Returns:
+            list[RankedLink]: Up to k links scoring above the confirm threshold, best first.
+        """
+        return [r for r in ranked[:k] if r.score >= self.confirm_score]
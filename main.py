@@ -1,3 +1,4 @@
+import os
 import asyncio
 import logging
 import pandas as pd
@@ -6,16 +7,22 @@ from dotenv import load_dotenv
 from pathlib import Path
 from typing import Annotated
 
+import batch_utils
+import cache_utils
 import crawler
 import nace_classifier
 import report_downloader
 import report_uploader
 import site_finder
 import fin_rep_finder
+import link_ranker
+import sitemap_utils
 import fin_data_extractor
 import data_exporter
 import genai_utils
+import pipeline
 import valkey_utils
+import valkey_stores
 from valkey_stores import (
     AnnualReportInfoStore,
     AnnualReportLinkStore,
@@ -23,6 +30,7 @@ from valkey_stores import (
     CompanySiteStore,
     ModelActionStore,
     NaceClassificationStore,
+    UploadedFileStore,
 )
 
 # Configure logging at the module level
@@ -41,19 +49,12 @@ DEFAULT_EXTR_CSV = Path('extra_starting_kit/extraction.csv')
 DEFAULT_PDF_DIR = Path('./pdf_downloads/')
 DEFAULT_OUTPUT_DIR = Path('.')
 DEFAULT_DISCO_CONTAINS_REPORTS = False
+DEFAULT_STREAMING = False
 
 
 # --- Helper function for initialization ---
-async def initialize_services(
-    concurrency: int,
-    discovery_csv_path: Path,
-    extraction_csv_path: Path | None,
-    output_dir: Path | None,
-    pdf_download_dir: Path,
-    env_file: Path | None,
-    discovery_contains_reports: bool = False,
-):
-    """Initializes all common services and clients."""
+def load_environment(env_file: Path | None) -> None:
+    """Loads the environment variables from the given or the default .env file."""
     if env_file and env_file.exists():
         load_dotenv(dotenv_path=env_file, override=True)
         logging.info(f'Loaded environment variables from: {env_file}')
@@ -73,6 +74,35 @@ async def initialize_services(
             load_dotenv(override=True)  # Fallback to system env vars if no .env found
             logging.info('Loaded environment variables from system or no .env file found.')
 
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Reads an on/off environment variable ('1', 'true' and 'yes' are on, any case).
+
+    Args:
+        name: The name of the variable.
+        default: The value used when the variable is unset or empty.
+
+    Returns:
+        bool: Whether the flag is on.
+    """
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes')
+
+
+async def initialize_services(
+    concurrency: int,
+    discovery_csv_path: Path,
+    extraction_csv_path: Path | None,
+    output_dir: Path | None,
+    pdf_download_dir: Path,
+    env_file: Path | None,
+    discovery_contains_reports: bool = False,
+):
+    """Initializes all common services and clients."""
+    load_environment(env_file)
+
     if not discovery_csv_path.exists():
         logging.error(f'Input CSV file not found: {discovery_csv_path}')
         raise typer.BadParameter(
@@ -97,17 +127,30 @@ async def initialize_services(
     logging.info(f'Initializing clients with concurrency: {concurrency}...')
     # Error handling for client/store initialization is within the try-except block
     # of each command or the run_all_pipeline function.
-    gen_client = genai_utils.GenaiClient.new(model=genai_utils.PRO)
     valkey_client = valkey_utils.ValkeyClient.new()
-
-    convo_store = ConversationStore(valkey_client)
-    site_store = CompanySiteStore(valkey_client)
-    report_link_store = AnnualReportLinkStore(valkey_client)
-    model_action_store = ModelActionStore(valkey_client)
-    report_store = AnnualReportInfoStore(valkey_client)
-    nace_store = NaceClassificationStore(valkey_client)
-
-    simple_crawler = crawler.Crawler(request_timeout_sec=7)
+    valkey_stores.mark_indexes_built_if_empty(valkey_client)
+    # the stages use the async client, so slow round trips never block the event loop
+    async_valkey_client = await valkey_utils.AsyncValkeyClient.new(
+        max_connections=max(50, concurrency * 5)
+    )
+    response_cache = cache_utils.cache_from_env('GENAI_CACHE', 'genai', async_valkey_client)
+    gen_client = genai_utils.GenaiClient.new(model=genai_utils.PRO, cache=response_cache)
+
+    convo_store = ConversationStore(valkey_client, async_valkey_client)
+    site_store = CompanySiteStore(valkey_client, async_valkey_client)
+    report_link_store = AnnualReportLinkStore(valkey_client, async_valkey_client)
+    model_action_store = ModelActionStore(valkey_client, async_valkey_client)
+    report_store = AnnualReportInfoStore(valkey_client, async_valkey_client)
+    nace_store = NaceClassificationStore(valkey_client, async_valkey_client)
+    uploaded_file_store = UploadedFileStore(valkey_client, async_valkey_client)
+
+    crawl_cache = cache_utils.cache_from_env('CRAWL_CACHE', 'crawl', async_valkey_client)
+    # a single browser pool bounds the rendered pages of every stage
+    simple_crawler = crawler.Crawler(
+        request_timeout_sec=7,
+        cache=crawl_cache,
+        browser_pool=crawler.BrowserPool.from_env(),
+    )
 
     sf = site_finder.SiteFinder(
         gen_client,
@@ -116,6 +159,7 @@ async def initialize_services(
         sf_company_list,
         simple_crawler,
         concurrent_threads=concurrency,
+        link_validator=crawler.LinkValidator(simple_crawler, concurrency=concurrency * 2),
     )
     finfinder = fin_rep_finder.FinRepFinder(
         simple_crawler,
@@ -126,12 +170,21 @@ async def initialize_services(
         report_link_store,
         report_download_directory=pdf_dir_str,
         concurrent_threads=concurrency,
+        link_ranker=(link_ranker.LinkRanker() if env_flag('REPORT_LINK_RANKER') else None),
+        frontier_width=int(os.environ.get('REPORT_FINDER_FRONTIER_WIDTH', 0)),
+        sitemap_discovery=(
+            sitemap_utils.SitemapDiscovery(simple_crawler.http_client)
+            if env_flag('REPORT_SITEMAP_DISCOVERY')
+            else None
+        ),
+        resume=env_flag('REPORT_FINDER_RESUME'),
     )
     rep_dler = report_downloader.ReportDownloader(
         report_link_store=report_link_store,
         report_download_directory=pdf_dir_str,
         concurrent_threads=concurrency,
         report_link_csv_path=discovery_csv_path.as_posix() if discovery_contains_reports else None,
+        crawler=simple_crawler,
     )
     rep_uploader = report_uploader.ReportUploader(
         report_link_store,
@@ -145,6 +198,9 @@ async def initialize_services(
         report_info_store=report_store,
         report_directory=pdf_dir_str,
         concurrent_threads=concurrency,
+        memory_budget_mb=int(os.environ.get('REPORT_MEMORY_BUDGET_MB', 1024)),
+        uploaded_file_store=uploaded_file_store,
+        fan_out=env_flag('EXTRACTION_FAN_OUT'),
     )
     nace_class = nace_classifier.NaceClassifier(
         gen_client=gen_client,
@@ -152,10 +208,12 @@ async def initialize_services(
         conversation_store=convo_store,
         nace_classification_store=nace_store,
         concurrent_threads=concurrency,
+        **nace_classifier_settings(),
     )
     services = {
         'gen_client': gen_client,
         'valkey_client': valkey_client,
+        'async_valkey_client': async_valkey_client,
         'simple_crawler': simple_crawler,
         'sf': sf,
         'finfinder': finfinder,
@@ -179,14 +237,47 @@ async def initialize_services(
     return services
 
 
+def nace_classifier_settings() -> dict:
+    """Reads the optional settings of the NaceClassifier from the environment.
+
+    NACE_ONE_SHOT=1 enables single call classification, NACE_CONTEXT_CACHE=1 keeps the code
+    tables in a server side context cache. NACE_EMBEDDINGS=1 enables the
+    embedding pre-classification, NACE_EMBEDDING_MIN_SCORE and NACE_EMBEDDING_MIN_MARGIN
+    override its acceptance thresholds.
+    """
+    settings = {}
+    if env_flag('NACE_ONE_SHOT'):
+        settings['one_shot'] = True
+    if env_flag('NACE_CONTEXT_CACHE'):
+        settings['context_caching'] = True
+    if not env_flag('NACE_EMBEDDINGS'):
+        return settings
+    settings['embedding_index_path'] = './data/nace/nace2lvl2_embeddings.npz'
+    try:
+        if min_score := os.environ.get('NACE_EMBEDDING_MIN_SCORE'):
+            settings['embedding_min_score'] = float(min_score)
+        if min_margin := os.environ.get('NACE_EMBEDDING_MIN_MARGIN'):
+            settings['embedding_min_margin'] = float(min_margin)
+    except ValueError as e:
+        raise valkey_utils.ConfigurationError(f'Invalid NACE embedding threshold: {e}') from e
+    return settings
+
+
 async def cleanup_services(services: dict | None):
     """Cleans up resources like database connections and crawlers."""
     if not services:
         return
+    if 'gen_client' in services and services['gen_client'].cache is not None:
+        logging.info(f'LLM response cache: {services["gen_client"].cache.summary()}')
+    if 'nace_class' in services and services['nace_class']:
+        await services['nace_class'].close()
     if 'valkey_client' in services and services['valkey_client']:
         logging.info('Closing valkey connection...')
         services['valkey_client'].close()
+    if 'async_valkey_client' in services and services['async_valkey_client']:
+        await services['async_valkey_client'].close()
     if 'simple_crawler' in services and services['simple_crawler']:
+        logging.info(f'Crawler: {services["simple_crawler"].summary()}')
         logging.info('Closing crawler connection...')
         await services['simple_crawler'].close()
     logging.info('Service cleanup complete.')
@@ -237,6 +328,50 @@ DiscoveryContainsReportsOption = Annotated[
     ),
 ]
 
+# --- classify-nace CLI options
+BatchOption = Annotated[
+    str | None,
+    typer.Option(
+        '--batch',
+        help="Classify all companies in two offline batch rounds. 'genai' submits them to the "
+        "Gemini Batch API, 'local' runs the batch files through the interactive API",
+    ),
+]
+
+# --- all CLI options
+StreamingOption = Annotated[
+    bool,
+    typer.Option(
+        '--streaming',
+        help='Run the stages concurrently, passing each company on to the next stage as soon as it is processed',
+    ),
+]
+
+
+def build_streaming_pipeline(services: dict, concurrency: int) -> pipeline.StreamingPipeline:
+    """Creates the streaming pipeline from the initialized services (without export)."""
+    return pipeline.StreamingPipeline(
+        [
+            pipeline.PipelineStage('find-sites', services['sf'].process_company, concurrency),
+            pipeline.PipelineStage(
+                'find-reports', services['finfinder'].process_company, concurrency
+            ),
+            pipeline.PipelineStage(
+                'download-reports', services['rep_dler'].process_company, concurrency
+            ),
+            pipeline.PipelineStage(
+                'upload-reports', services['rep_uploader'].process_company, concurrency
+            ),
+            pipeline.PipelineStage(
+                'extract-data', services['data_extractor'].process_company, concurrency
+            ),
+            pipeline.PipelineStage(
+                'classify-nace', services['nace_class'].process_company, concurrency
+            ),
+        ],
+        queue_size=concurrency * 10,
+    )
+
 
 # --- Typer Commands ---
 
@@ -355,11 +490,11 @@ def upload_reports(
     """
     Uploads downloaded financial reports.
     """
-    services = None
-    try:
-        # Async initialization
-        async def _init_services_async():
-            nonlocal services
+
+    # a single event loop for init and cleanup, the async valkey pool is bound to it
+    async def _run():
+        services = None
+        try:
             services = await initialize_services(
                 concurrency,
                 discovery_csv,
@@ -368,25 +503,17 @@ def upload_reports(
                 pdf_dir,
                 env_file,
             )
-
-        asyncio.run(_init_services_async())
-
-        if not services:
-            # This case should ideally be caught by exceptions in initialize_services
-            logging.error('Service initialization failed for upload_reports.')
+            logging.info('Starting report uploader...')
+            services['rep_uploader'].run()  # Synchronous call
+            logging.info('Report uploading completed.')
+        except Exception as e:
+            logging.error(f'Error in upload_reports: {e}', exc_info=True)
+            typer.echo(f'Error during report uploading: {e}', err=True)
             raise typer.Exit(code=1)
+        finally:
+            await cleanup_services(services)
 
-        logging.info('Starting report uploader...')
-        services['rep_uploader'].run()  # Synchronous call
-        logging.info('Report uploading completed.')
-    except Exception as e:
-        logging.error(f'Error in upload_reports: {e}', exc_info=True)
-        typer.echo(f'Error during report uploading: {e}', err=True)
-        raise typer.Exit(code=1)
-    finally:
-        if services:
-            # Async cleanup
-            asyncio.run(cleanup_services(services))
+    asyncio.run(_run())
 
 
 @app.command()
@@ -428,8 +555,12 @@ def classify_nace(
     env_file: EnvFileOption = None,
     discovery_csv: DiscoCsvOption = DEFAULT_DISCO_CSV,  # Needed for company context in init
     pdf_dir: PdfDirOption = DEFAULT_PDF_DIR,  # Needed for consistency in initialize_services
+    batch: BatchOption = None,
 ):
     """Classifies companies using NACE codes based on extracted data."""
+    if batch not in (None, 'genai', 'local'):
+        typer.echo(f"Invalid --batch value '{batch}', must be 'genai' or 'local'", err=True)
+        raise typer.Exit(code=1)
 
     async def _run():
         services = None
@@ -443,7 +574,14 @@ def classify_nace(
                 env_file,
             )
             logging.info('Starting NACE classifier...')
-            await services['nace_class'].run()
+            if batch == 'genai':
+                backend = batch_utils.GenaiBatchBackend(services['gen_client'])
+                await services['nace_class'].run_batch(backend)
+            elif batch == 'local':
+                backend = batch_utils.LocalBatchBackend(services['gen_client'], concurrency)
+                await services['nace_class'].run_batch(backend)
+            else:
+                await services['nace_class'].run()
             logging.info('NACE classification completed.')
         except Exception as e:
             logging.error(f'Error in classify_nace: {e}', exc_info=True)
@@ -490,6 +628,29 @@ def export_data(
     asyncio.run(_run())
 
 
+@app.command()
+def build_indexes(
+    env_file: EnvFileOption = None,
+):
+    """Builds the company indexes of an existing database (needed once after upgrading)."""
+    valkey_client = None
+    try:
+        load_environment(env_file)
+        valkey_client = valkey_utils.ValkeyClient.new()
+        logging.info('Building indexes...')
+        counts = valkey_stores.build_indexes(valkey_client)
+        for store, count in counts.items():
+            typer.echo(f'Indexed {count} entries of {store}')
+        logging.info('Index building completed.')
+    except Exception as e:
+        logging.error(f'Error in build_indexes: {e}', exc_info=True)
+        typer.echo(f'Error during index building: {e}', err=True)
+        raise typer.Exit(code=1)
+    finally:
+        if valkey_client is not None:
+            valkey_client.close()
+
+
 @app.command(name='all', short_help='Runs the entire data processing pipeline.')
 def run_all_pipeline(
     concurrency: ConcurrencyOption = DEFAULT_CONCURRENCY,
@@ -498,6 +659,7 @@ def run_all_pipeline(
     extraction_csv: ExtCsvOption = DEFAULT_EXTR_CSV,
     output_directory: OutputDirectory = DEFAULT_OUTPUT_DIR,
     pdf_dir: PdfDirOption = DEFAULT_PDF_DIR,
+    streaming: StreamingOption = DEFAULT_STREAMING,
 ):
     """
     Runs the entire data processing pipeline:
@@ -508,6 +670,9 @@ def run_all_pipeline(
     5. Extract Data
     6. Classify NACE
     7. Export to CSV
+
+    With --streaming, steps 1-6 run concurrently and companies flow from step to step
+    as soon as they are processed. Export runs once every company passed all steps.
     """
 
     async def _run_all():
@@ -529,6 +694,19 @@ def run_all_pipeline(
             if env_file:
                 typer.echo(f'Using env file: {env_file}')
 
+            if streaming:
+                logging.info('Steps 1-6: Running streaming pipeline...')
+                await build_streaming_pipeline(services, concurrency).run(
+                    services['sf'].company_names
+                )
+                typer.echo('✅ Streaming pipeline complete.')
+
+                logging.info('Step 7: Exporting to CSV...')
+                services['data_exporter'].run()
+
+                typer.echo('🚀 Pipeline completed successfully.')
+                return
+
             logging.info('Step 1: Finding sites...')
             await services['sf'].run()
             logging.info('Site finding completed.')
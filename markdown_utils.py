@@ -0,0 +1,165 @@
+import re
+import hashlib
+import logging
+import urllib.parse
+
+IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+LINK_PATTERN = re.compile(r'\[([^\]]*)\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)')
+BULLET_PATTERN = re.compile(r'^\s*(?:[*+-]|\d+\.)\s*')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# short blocks containing these are cookie banners, skip links and footers
+BOILERPLATE_KEYWORDS = (
+    'cookie',
+    'consent',
+    'accept all',
+    'reject all',
+    'privacy preferences',
+    'skip to content',
+    'skip to main content',
+    'all rights reserved',
+    '©',
+)
+BOILERPLATE_MAX_CHARS = 500
+# blocks where at least this share of the lines are only links are navigation menus
+NAV_LINK_LINE_RATIO = 0.8
+NAV_MIN_LINES = 3
+SKIPPED_SCHEMES = ('javascript:', 'mailto:', 'tel:', 'data:')
+
+
+class LinkTable:
+    """The numbered links of a page, the model refers to links by their number."""
+
+    def __init__(self, max_links: int = 300) -> None:
+        """Initializes the LinkTable.
+
+        Args:
+            max_links: Maximum number of links kept, further links are dropped.
+        """
+        self.max_links = max_links
+        self.urls: list[str] = []
+        self.texts: list[str] = []
+        self.numbers: dict[str, int] = {}
+
+    def add(self, url: str, text: str) -> int | None:
+        """Adds a link, links already in the table keep their number.
+
+        Args:
+            url: The absolute URL of the link.
+            text: The text of the link.
+
+        Returns:
+            int | None: The number of the link, or None if the table is full.
+        """
+        if url in self.numbers:
+            number = self.numbers[url]
+            if not self.texts[number - 1] and text:
+                self.texts[number - 1] = text
+            return number
+        if len(self.urls) >= self.max_links:
+            return None
+        self.urls.append(url)
+        self.texts.append(text)
+        self.numbers[url] = len(self.urls)
+        return len(self.urls)
+
+    def resolve(self, ref: str | None) -> str | None:
+        """Maps a link number given by the model ('12', '[12]') back to its URL.
+
+        Args:
+            ref: The answer of the model, a link number or a URL.
+
+        Returns:
+            str | None: The URL of the numbered link, other answers are returned as is.
+        """
+        if ref is None:
+            return None
+        number = ref.strip().strip('[]')
+        if number.isdigit() and 1 <= int(number) <= len(self.urls):
+            return self.urls[int(number) - 1]
+        return ref
+
+    def format(self) -> str:
+        """Formats the table with one '[n] text: url' line per link."""
+        return '\n'.join(
+            f'[{i}] {text}: {url}' if text else f'[{i}] {url}'
+            for i, (text, url) in enumerate(zip(self.texts, self.urls), start=1)
+        )
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+
+def is_boilerplate(block: str) -> bool:
+    """Checks whether a block is a cookie banner, skip link or footer line."""
+    if len(block) > BOILERPLATE_MAX_CHARS:
+        return False
+    lowered = block.lower()
+    return any(k in lowered for k in BOILERPLATE_KEYWORDS)
+
+
+def is_navigation(block: str) -> bool:
+    """Checks whether a block is a menu, i.e. mostly lines holding nothing but links."""
+    lines = [line for line in block.splitlines() if line.strip()]
+    if len(lines) < NAV_MIN_LINES:
+        return False
+    link_lines = sum(
+        1
+        for line in lines
+        if LINK_PATTERN.search(line)
+        and not LINK_PATTERN.sub('', BULLET_PATTERN.sub('', line)).strip(' |/·•')
+    )
+    return link_lines / len(lines) >= NAV_LINK_LINE_RATIO
+
+
+def prune_markdown(
+    markdown: str,
+    base_url: str,
+    seen_blocks: dict[str, str] | None = None,
+    max_links: int = 300,
+) -> tuple[str, LinkTable]:
+    """Strips a crawled page down to its content and a numbered table of its links.
+
+    Images, cookie banners, footers, menus and blocks already seen on another page of
+    the same site are removed, but the links of every block are kept in the table.
+    Links in the remaining text are replaced by their number.
+
+    Args:
+        markdown: The markdown of the page.
+        base_url: The URL of the page, relative links are resolved against it.
+        seen_blocks: The hashes of the blocks of earlier pages of the site, mapped to the
+                     page they were first seen on. Updated with the blocks of this page.
+        max_links: Maximum number of links in the table.
+
+    Returns:
+        tuple[str, LinkTable]: The pruned content and its link table.
+    """
+    seen_blocks = {} if seen_blocks is None else seen_blocks
+    links = LinkTable(max_links)
+    content = []
+
+    def number_link(match: re.Match) -> str:
+        text = WHITESPACE_PATTERN.sub(' ', match.group(1)).strip()
+        url = match.group(2)
+        if url.startswith('#') or url.lower().startswith(SKIPPED_SCHEMES):
+            return text
+        number = links.add(urllib.parse.urljoin(base_url, url), text)
+        return text if number is None else f'{text} [{number}]'
+
+    for block in re.split(r'\n\s*\n', IMAGE_PATTERN.sub('', markdown)):
+        block = block.strip()
+        if not block:
+            continue
+        # links are numbered before any block is dropped, a footer may link the report
+        numbered = LINK_PATTERN.sub(number_link, block)
+        if is_boilerplate(block):
+            continue
+        key = hashlib.sha256(WHITESPACE_PATTERN.sub(' ', block).encode()).hexdigest()
+        first_seen = seen_blocks.setdefault(key, base_url)
+        if first_seen != base_url or is_navigation(block):
+            continue
+        content.append(numbered)
+    res = '\n\n'.join(content)
+    logging.debug(
+        f'Pruned {base_url} from {len(markdown)} to {len(res)} chars and {len(links)} links'
+    )
+    return res, links
@@ -49,6 +49,21 @@ class ModelActionResponse(pydantic.BaseModel):
     ]
 
 
+class FrontierActionResponse(ModelActionResponse):
+    """
+    Extends ModelActionResponse with the candidate links of the best-first search
+    through a company website.
+    """
+
+    links_to_visit: Annotated[
+        list[str] | None,
+        pydantic.Field(
+            description='The urls worth visiting next, most promising first (only fill in case of action=visit)',
+            default=None,
+        ),
+    ]
+
+
 class ModelActionResponseWithMetadata(ModelActionResponse):
     """
     Extends ModelActionResponse with metadata about when and where (URL)
@@ -206,3 +221,22 @@ class Lvl2ClassificationResponse(pydantic.BaseModel):
             description='The level 2 NACE class the company belongs to (2 digit code)',
         ),
     ]
+
+
+class ReportLinkConfirmation(pydantic.BaseModel):
+    """Represents the choice of the LLM among the best candidate annual report links."""
+
+    choice: Annotated[
+        int | None,
+        pydantic.Field(
+            description='The number of the link pointing to the latest annual financial report, null if none of them does',
+            default=None,
+        ),
+    ]
+    reference_year: Annotated[
+        str | None,
+        pydantic.Field(
+            description='The reference date of the chosen report. Supply as format YYYY-MM-DD',
+            default=None,
+        ),
+    ]
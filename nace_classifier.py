@@ -1,12 +1,20 @@
+import os
+import enum
 import json
+import time
 import asyncio
 import logging
 
+import pydantic
+from google.genai import types
+
+import batch_utils
 import genai_utils
 import models
 import valkey_stores
 
-from utils import batched
+from scheduler import WorkScheduler
+from vector_index import VectorIndex
 
 
 class ClassificationError(Exception):
@@ -28,6 +36,11 @@ class NaceClassifier:
         concurrent_threads: int = 1,
         nace_lvl1_json_path: str = './data/nace/nace2lvl1.json',
         nace_lvl2_json_path: str = './data/nace/nace2lvl2.json',
+        embedding_index_path: str | None = None,
+        embedding_min_score: float = 0.75,
+        embedding_min_margin: float = 0.05,
+        one_shot: bool = False,
+        context_caching: bool = False,
     ) -> None:
         """Initializes the NaceClassifier.
 
@@ -39,6 +52,15 @@ class NaceClassifier:
             concurrent_threads: Number of concurrent threads for processing.
             nace_lvl1_json_path: Path to the JSON file containing NACE level 1 codes.
             nace_lvl2_json_path: Path to the JSON file containing NACE level 2 codes.
+            embedding_index_path: Path of the persisted embedding index of the level 2
+                                  descriptions. If set, companies whose description clearly
+                                  matches a single level 2 code are classified without the LLM.
+            embedding_min_score: Minimum cosine similarity of an accepted embedding match.
+            embedding_min_margin: Minimum similarity lead of an accepted match over the runner-up.
+            one_shot: Whether to classify with a single call constrained to the valid level 2
+                      codes, using the two-step classification only as fallback.
+            context_caching: Whether to keep the NACE code tables in a server side context
+                             cache instead of sending them with every classification.
         """
         self.gen_client = gen_client
         self.report_info_store = report_info_store
@@ -49,20 +71,54 @@ class NaceClassifier:
             self.nace_lvl1 = json.load(f)
         with open(nace_lvl2_json_path, 'r') as f:
             self.nace_lvl2 = json.load(f)
+        self.embedding_index_path = embedding_index_path
+        self.embedding_min_score = embedding_min_score
+        self.embedding_min_margin = embedding_min_margin
+        self.__embedding_index = None
+        self.__embedding_index_lock = asyncio.Lock()
+        self.one_shot = one_shot
+        self.lvl2_to_lvl1 = {
+            lvl2: lvl1 for lvl1, codes in self.nace_lvl2.items() for lvl2 in codes.keys()
+        }
+        lvl2_code = enum.Enum(
+            'NaceLvl2Code',
+            {f'CODE_{code}': code for code in self.lvl2_to_lvl1.keys()},
+            type=str,
+        )
+        self.one_shot_schema = pydantic.create_model(
+            'OneShotClassificationResponse',
+            classification=(
+                lvl2_code,
+                pydantic.Field(description='The level 2 NACE class the company belongs to'),
+            ),
+        )
+        self.context_cache = None
+        if context_caching:
+            self.context_cache = genai_utils.ContextCache(
+                genai_utils.FLASH,
+                self.gen_client.get_simple_message(
+                    f"""You classify companies by the NACE code of their main activity.
+            level 1 nace codes (sections) and their descriptions:
+                {json.dumps(self.nace_lvl1, indent='  ')}
+            level 2 nace codes and their descriptions, grouped by their level 1 sections:
+                {json.dumps(self.nace_lvl2, indent='  ')}
+            """
+                ),
+                display_name='nace-code-tables',
+            )
 
     async def run(self) -> None:
-        """Processes companies in batches to classify their NACE codes.
+        """Classifies the NACE codes of all companies with extracted report information.
 
         Retrieves companies from the report_info_store and processes them
-        concurrently based on the configured number of threads.
+        concurrently, keeping the configured number of classifications in flight.
         """
-        companies = self.report_info_store.get_companies()
+        companies = await self.report_info_store.aget_companies()
         if len(companies) == 0:
             return
 
-        for company_batch in batched(companies, self.concurrent_threads):
-            tasks = [self.process_company(c) for c in company_batch]
-            await asyncio.gather(*tasks)
+        scheduler = WorkScheduler('classify-nace', self.concurrent_threads)
+        await scheduler.run(companies, self.process_company)
 
     async def process_company(
         self,
@@ -76,10 +132,10 @@ class NaceClassifier:
         Args:
             company: The name of the company to process.
         """
-        existing_classification = self.classification_store.get(company)
+        existing_classification = await self.classification_store.aget(company)
         if existing_classification is not None:
             return
-        info = self.report_info_store.get(company)
+        info = await self.report_info_store.aget(company)
         if info is None:
             logging.warning(
                 f'Could not find information for {company}, skipping nace classification'
@@ -96,7 +152,7 @@ class NaceClassifier:
                 company,
                 info.main_activity_description,
             )
-            self.classification_store.store(company, classification)
+            await self.classification_store.astore(company, classification)
         except Exception as e:
             logging.error(
                 f'Failed to classify nace code of company {company}, cause:{e}', exc_info=True
@@ -110,6 +166,8 @@ class NaceClassifier:
         2. Determine the Level 2 NACE code based on the Level 1 result.
 
         If Level 2 classification fails, it falls back to using only Level 1.
+        In one-shot mode the level 2 code is requested directly in a single call,
+        the two-step process only runs if that fails.
 
         Args:
             company: The name of the company.
@@ -123,43 +181,45 @@ class NaceClassifier:
             ClassificationError: If the model fails to classify the company at Level 1.
             genai_utils.GenerationError: If AI model generation fails at any step.
         """
-        prompt = f"""Determine the level 1 nace code based on the below description of the company:
-            possible nace codes and their descriptions:
-                {json.dumps(self.nace_lvl1, indent='  ')}
-            company_description:
-                {activity_description}
-            """
-        msgs = self.gen_client.get_simple_message(prompt)
-        self.conversation_store.store(company, 'nace_classifiy', msgs)
+        code = await self.preclassify(company, activity_description)
+        if code is not None:
+            return code
+        if self.one_shot:
+            try:
+                return await self.__classify_one_shot(company, activity_description)
+            except Exception as e:
+                logging.warning(
+                    f'One-shot nace classification failed for {company}, '
+                    f'falling back to two steps, cause: {e}'
+                )
+        context_cache = await self.__get_context_cache()
+        msgs = self.__lvl1_messages(activity_description, context_cache is not None)
+        await self.conversation_store.astore(company, 'nace_classify', msgs)
         response = await self.gen_client.generate(
             msgs,
             model=genai_utils.FLASH,
             response_schema=models.Lvl1ClassificationResponse,
+            context_cache=context_cache,
         )
         if response.candidates is None:
             raise genai_utils.GenerationError(
                 f'Failed to generate a single candidate for nace classification (lvl1) for {company}'
             )
         msgs.append(response.candidates[0].content)
-        self.conversation_store.store(company, 'nace_classify', msgs)
+        await self.conversation_store.astore(company, 'nace_classify', msgs)
         res = models.Lvl1ClassificationResponse.model_validate_json(response.text)
         next_levels = self.nace_lvl2.get(res.classification)
         if next_levels is None:
             raise ClassificationError(f'The model failed to classify the company {company}')
 
         try:
-            prompt = f"""
-            Now choose the level 2 classification based on the previously seen description of their activities.
-            
-            Possible nace codes and their descriptions:
-                {json.dumps(next_levels, indent='  ')}
-            """
-            msgs = msgs + self.gen_client.get_simple_message(prompt)
+            msgs = msgs + self.__lvl2_messages(next_levels)
 
             response = await self.gen_client.generate(
                 msgs,
                 model=genai_utils.FLASH,
                 response_schema=models.Lvl2ClassificationResponse,
+                context_cache=context_cache,
             )
 
             if response.candidates is None:
@@ -167,7 +227,7 @@ class NaceClassifier:
                     f'Failed to generate a single candidate for nace classification (lvl2) for {company}'
                 )
             msgs.append(response.candidates[0].content)
-            self.conversation_store.store(company, 'nace_classify', msgs)
+            await self.conversation_store.astore(company, 'nace_classify', msgs)
             res2 = models.Lvl2ClassificationResponse.model_validate_json(response.text)
             return f'{res.classification}{res2.classification}'
         except Exception as e:
@@ -175,3 +235,244 @@ class NaceClassifier:
                 f'Lvl2 nace classification failed for {company} keeping lvl1, cause: {e}'
             )
             return res.classification
+
+    async def run_batch(
+        self,
+        backend: batch_utils.GenaiBatchBackend | batch_utils.LocalBatchBackend,
+        work_dir: str = './batch_jobs',
+    ) -> None:
+        """Classifies every unclassified company in two batch rounds.
+
+        The level 1 requests of all companies are written to a single JSONL file and
+        submitted as one batch, the level 2 round is built from its results and
+        submitted as a second batch. Companies whose level 2 classification fails
+        keep their level 1 code, like in `classify_company`.
+
+        Args:
+            backend: The backend running the batches.
+            work_dir: Directory the batch request files are written to.
+        """
+        companies = await self.report_info_store.aget_companies()
+        existing = await self.classification_store.aget_many(companies)
+        companies = [c for c, code in zip(companies, existing) if code is None]
+        infos = await self.report_info_store.aget_many(companies)
+        descriptions = {
+            c: info.main_activity_description
+            for c, info in zip(companies, infos)
+            if info is not None and info.main_activity_description is not None
+        }
+        if len(descriptions) == 0:
+            return
+        for company, description in list(descriptions.items()):
+            code = await self.preclassify(company, description)
+            if code is not None:
+                await self.classification_store.astore(company, code)
+                del descriptions[company]
+        if len(descriptions) == 0:
+            return
+        os.makedirs(work_dir, exist_ok=True)
+        batch_id = int(time.time())
+
+        lvl1_msgs = {c: self.__lvl1_messages(d, False) for c, d in descriptions.items()}
+        lvl1_path = os.path.join(work_dir, f'nace_lvl1_{batch_id}.jsonl')
+        batch_utils.write_jsonl(
+            lvl1_path,
+            [
+                batch_utils.create_request_line(c, msgs, models.Lvl1ClassificationResponse)
+                for c, msgs in lvl1_msgs.items()
+            ],
+        )
+        logging.info(f'Classifying level 1 nace codes of {len(lvl1_msgs)} companies in batch')
+        lvl1_results = await backend.run(
+            lvl1_path, genai_utils.FLASH, models.Lvl1ClassificationResponse
+        )
+
+        lvl1_codes = {}
+        lvl2_msgs = {}
+        for company, msgs in lvl1_msgs.items():
+            try:
+                response = self.__check_result(company, lvl1_results.get(company))
+                res = models.Lvl1ClassificationResponse.model_validate_json(response.text)
+                next_levels = self.nace_lvl2.get(res.classification)
+                if next_levels is None:
+                    raise ClassificationError(f'The model failed to classify the company {company}')
+                msgs = msgs + [response.candidates[0].content]
+                await self.conversation_store.astore(company, 'nace_classify', msgs)
+                lvl1_codes[company] = res.classification
+                lvl2_msgs[company] = msgs + self.__lvl2_messages(next_levels)
+            except Exception as e:
+                logging.error(f'Failed to classify nace code of company {company}, cause:{e}')
+        if len(lvl2_msgs) == 0:
+            return
+
+        lvl2_path = os.path.join(work_dir, f'nace_lvl2_{batch_id}.jsonl')
+        batch_utils.write_jsonl(
+            lvl2_path,
+            [
+                batch_utils.create_request_line(c, msgs, models.Lvl2ClassificationResponse)
+                for c, msgs in lvl2_msgs.items()
+            ],
+        )
+        logging.info(f'Classifying level 2 nace codes of {len(lvl2_msgs)} companies in batch')
+        lvl2_results = await backend.run(
+            lvl2_path, genai_utils.FLASH, models.Lvl2ClassificationResponse
+        )
+
+        for company, msgs in lvl2_msgs.items():
+            code = lvl1_codes[company]
+            try:
+                response = self.__check_result(company, lvl2_results.get(company))
+                res2 = models.Lvl2ClassificationResponse.model_validate_json(response.text)
+                await self.conversation_store.astore(
+                    company, 'nace_classify', msgs + [response.candidates[0].content]
+                )
+                code = f'{code}{res2.classification}'
+            except Exception as e:
+                logging.warning(
+                    f'Lvl2 nace classification failed for {company} keeping lvl1, cause: {e}'
+                )
+            await self.classification_store.astore(company, code)
+
+    async def preclassify(self, company: str, activity_description: str) -> str | None:
+        """Classifies a company by embedding similarity, if the match is unambiguous.
+
+        Args:
+            company: The name of the company.
+            activity_description: Description of the company's main activity.
+
+        Returns:
+            str | None: The level 2 NACE code (e.g. 'C10'), or None if the embedding
+                        index is disabled, fails, or the best match is not clear enough.
+        """
+        if self.embedding_index_path is None:
+            return None
+        try:
+            index = await self.__get_embedding_index()
+            [vector] = await self.gen_client.embed([activity_description])
+        except Exception as e:
+            logging.warning(f'Embedding pre-classification failed for {company}, cause: {e}')
+            return None
+        (best, best_score), (_, second_score) = index.query(vector, k=2)
+        if (
+            best_score < self.embedding_min_score
+            or best_score - second_score < self.embedding_min_margin
+        ):
+            return None
+        logging.info(f'Classified {company} as {best} by embedding similarity ({best_score:.3f})')
+        return best
+
+    async def __classify_one_shot(self, company: str, activity_description: str) -> str:
+        """Classifies a company with a single call, deriving the level 1 letter locally."""
+        context_cache = await self.__get_context_cache()
+        if context_cache is None:
+            prompt = f"""Determine the level 2 nace code based on the below description of the company:
+            possible nace codes and their descriptions, grouped by their level 1 sections:
+                {json.dumps(self.nace_lvl1, indent='  ')}
+                {json.dumps(self.nace_lvl2, indent='  ')}
+            company_description:
+                {activity_description}
+            """
+        else:
+            prompt = f"""Determine the level 2 nace code (one of the level 2 codes listed above) based on the below description of the company:
+            company_description:
+                {activity_description}
+            """
+        msgs = self.gen_client.get_simple_message(prompt)
+        response = await self.gen_client.generate(
+            msgs,
+            model=genai_utils.FLASH,
+            response_schema=self.one_shot_schema,
+            context_cache=context_cache,
+        )
+        if response.candidates is None:
+            raise genai_utils.GenerationError(
+                f'Failed to generate a single candidate for nace classification for {company}'
+            )
+        msgs.append(response.candidates[0].content)
+        await self.conversation_store.astore(company, 'nace_classify', msgs)
+        lvl2 = self.one_shot_schema.model_validate_json(response.text).classification.value
+        return f'{self.lvl2_to_lvl1[lvl2]}{lvl2}'
+
+    async def __get_embedding_index(self) -> VectorIndex:
+        """Loads (or builds on first use) the embedding index of the level 2 descriptions."""
+        async with self.__embedding_index_lock:
+            if self.__embedding_index is None:
+                texts = {
+                    f'{lvl1}{lvl2}': f'{self.nace_lvl1.get(lvl1, "")}: {description}'
+                    for lvl1, codes in self.nace_lvl2.items()
+                    for lvl2, description in codes.items()
+                }
+                self.__embedding_index = await VectorIndex.load_or_build(
+                    self.embedding_index_path,
+                    texts,
+                    self.gen_client,
+                )
+            return self.__embedding_index
+
+    def __lvl1_messages(
+        self, activity_description: str, cached_tables: bool
+    ) -> list[types.Content]:
+        """Creates the prompt of the level 1 classification.
+
+        If the code tables are in the context cache, they are not repeated in the prompt.
+        """
+        if cached_tables:
+            prompt = f"""Determine the level 1 nace code (one of the sections listed above) based on the below description of the company:
+            company_description:
+                {activity_description}
+            """
+        else:
+            prompt = f"""Determine the level 1 nace code based on the below description of the company:
+            possible nace codes and their descriptions:
+                {json.dumps(self.nace_lvl1, indent='  ')}
+            company_description:
+                {activity_description}
+            """
+        return self.gen_client.get_simple_message(prompt)
+
+    async def __get_context_cache(self) -> genai_utils.ContextCache | None:
+        """Returns the context cache of the code tables, or None if caching is off or unavailable.
+
+        If the cache can not be created (e.g. the model does not support caching),
+        caching is disabled for the rest of the run and the tables are sent inline.
+        """
+        if self.context_cache is None:
+            return None
+        try:
+            await self.context_cache.get_name(self.gen_client.client)
+            return self.context_cache
+        except Exception as e:
+            logging.warning(f'Context caching of the nace tables disabled, cause: {e}')
+            self.context_cache = None
+            return None
+
+    async def close(self) -> None:
+        """Deletes the context cache of the code tables, if it was created."""
+        if self.context_cache is not None:
+            await self.context_cache.delete(self.gen_client.client)
+
+    def __lvl2_messages(self, next_levels: dict) -> list[types.Content]:
+        """Creates the follow-up prompt of the level 2 classification."""
+        prompt = f"""
+            Now choose the level 2 classification based on the previously seen description of their activities.
+            
+            Possible nace codes and their descriptions:
+                {json.dumps(next_levels, indent='  ')}
+            """
+        return self.gen_client.get_simple_message(prompt)
+
+    @staticmethod
+    def __check_result(
+        company: str,
+        result: types.GenerateContentResponse | str | None,
+    ) -> types.GenerateContentResponse:
+        """Returns a batch response, raising if the request failed or has no candidate."""
+        if result is None:
+            raise genai_utils.GenerationError(f'Batch returned no result for {company}')
+        if isinstance(result, str):
+            raise genai_utils.GenerationError(f'Batch request of {company} failed: {result}')
+        if not result.candidates:
+            raise genai_utils.GenerationError(
+                f'Failed to generate a single candidate for nace classification for {company}'
+            )
+        return result
@@ -0,0 +1,268 @@
+import re
+import json
+import logging
+
+import pydantic
+
+import models
+
+COUNTRY_CODES = {
+    # ISO 3166-1 alpha-3 codes
+    'AUT': 'AT', 'BEL': 'BE', 'BGR': 'BG', 'HRV': 'HR', 'CYP': 'CY', 'CZE': 'CZ', 'DNK': 'DK',
+    'EST': 'EE', 'FIN': 'FI', 'FRA': 'FR', 'DEU': 'DE', 'GRC': 'GR', 'HUN': 'HU', 'IRL': 'IE',
+    'ITA': 'IT', 'LVA': 'LV', 'LTU': 'LT', 'LUX': 'LU', 'MLT': 'MT', 'NLD': 'NL', 'POL': 'PL',
+    'PRT': 'PT', 'ROU': 'RO', 'SVK': 'SK', 'SVN': 'SI', 'ESP': 'ES', 'SWE': 'SE', 'NOR': 'NO',
+    'ISL': 'IS', 'LIE': 'LI', 'CHE': 'CH', 'GBR': 'GB', 'USA': 'US', 'CAN': 'CA', 'JPN': 'JP',
+    'CHN': 'CN', 'KOR': 'KR', 'IND': 'IN', 'AUS': 'AU', 'BRA': 'BR', 'TUR': 'TR', 'ISR': 'IL',
+    # common non ISO spellings
+    'UK': 'GB', 'EL': 'GR',
+    # English and native country names
+    'AUSTRIA': 'AT', 'ÖSTERREICH': 'AT', 'BELGIUM': 'BE', 'BELGIQUE': 'BE', 'BELGIË': 'BE',
+    'BULGARIA': 'BG', 'CROATIA': 'HR', 'HRVATSKA': 'HR', 'CYPRUS': 'CY', 'CZECHIA': 'CZ',
+    'CZECH REPUBLIC': 'CZ', 'DENMARK': 'DK', 'DANMARK': 'DK', 'ESTONIA': 'EE', 'FINLAND': 'FI',
+    'SUOMI': 'FI', 'FRANCE': 'FR', 'GERMANY': 'DE', 'DEUTSCHLAND': 'DE', 'GREECE': 'GR',
+    'HUNGARY': 'HU', 'MAGYARORSZÁG': 'HU', 'IRELAND': 'IE', 'ITALY': 'IT', 'ITALIA': 'IT',
+    'LATVIA': 'LV', 'LITHUANIA': 'LT', 'LUXEMBOURG': 'LU', 'MALTA': 'MT', 'NETHERLANDS': 'NL',
+    'THE NETHERLANDS': 'NL', 'NEDERLAND': 'NL', 'HOLLAND': 'NL', 'POLAND': 'PL', 'POLSKA': 'PL',
+    'PORTUGAL': 'PT', 'ROMANIA': 'RO', 'ROMÂNIA': 'RO', 'SLOVAKIA': 'SK', 'SLOVENIA': 'SI',
+    'SPAIN': 'ES', 'ESPAÑA': 'ES', 'SWEDEN': 'SE', 'SVERIGE': 'SE', 'NORWAY': 'NO',
+    'NORGE': 'NO', 'ICELAND': 'IS', 'LIECHTENSTEIN': 'LI', 'SWITZERLAND': 'CH', 'SCHWEIZ': 'CH',
+    'SUISSE': 'CH', 'UNITED KINGDOM': 'GB', 'GREAT BRITAIN': 'GB', 'ENGLAND': 'GB',
+    'UNITED STATES': 'US', 'UNITED STATES OF AMERICA': 'US', 'CANADA': 'CA', 'JAPAN': 'JP',
+    'CHINA': 'CN', 'SOUTH KOREA': 'KR', 'INDIA': 'IN', 'AUSTRALIA': 'AU', 'BRAZIL': 'BR',
+    'TURKEY': 'TR', 'TÜRKIYE': 'TR', 'ISRAEL': 'IL',
+}  # fmt: skip
+
+CURRENCY_CODES = {
+    '€': 'EUR', 'EURO': 'EUR', 'EUROS': 'EUR', '$': 'USD', 'US$': 'USD', 'USD$': 'USD',
+    'DOLLAR': 'USD', 'DOLLARS': 'USD', 'US DOLLAR': 'USD', 'US DOLLARS': 'USD', '£': 'GBP',
+    'POUND': 'GBP', 'POUNDS': 'GBP', 'POUND STERLING': 'GBP', 'STERLING': 'GBP', '¥': 'JPY',
+    'YEN': 'JPY', 'CHF': 'CHF', 'SWISS FRANC': 'CHF', 'SWISS FRANCS': 'CHF', 'ZŁ': 'PLN',
+    'ZLOTY': 'PLN', 'ZŁOTY': 'PLN', 'KČ': 'CZK', 'CZECH KORUNA': 'CZK', 'FT': 'HUF',
+    'FORINT': 'HUF', 'LEI': 'RON', 'LEU': 'RON', 'LEV': 'BGN', 'LEVA': 'BGN',
+    'SWEDISH KRONA': 'SEK', 'SWEDISH KRONOR': 'SEK', 'DANISH KRONE': 'DKK',
+    'DANISH KRONER': 'DKK', 'NORWEGIAN KRONE': 'NOK', 'NORWEGIAN KRONER': 'NOK',
+    'ICELANDIC KRONA': 'ISK',
+}  # fmt: skip
+
+MULTIPLIERS = {
+    'thousand': 10**3, 'thousands': 10**3, 'k': 10**3, 'tsd': 10**3, 'teur': 10**3,
+    'million': 10**6, 'millions': 10**6, 'mn': 10**6, 'm': 10**6, 'mio': 10**6, 'mil': 10**6,
+    'meur': 10**6, 'billion': 10**9, 'billions': 10**9, 'bn': 10**9, 'b': 10**9,
+    'mrd': 10**9, 'milliard': 10**9, 'milliarden': 10**9,
+}  # fmt: skip
+# multipliers also read when written before the number, single letters are too ambiguous there
+PREFIX_MULTIPLIERS = tuple(k for k in MULTIPLIERS if len(k) > 1 or k == 'm')
+
+INTEGER_FIELDS = ('employee_count', 'assets_value', 'net_turnover')
+CURRENCY_FIELDS = ('currency_code_assets', 'currency_code_turnover')
+
+NUMBER_PATTERN = re.compile(r'-?\d[\d\s.,\'  ]*')
+YEAR_PATTERN = re.compile(r'(?<!\d)((?:19|20)\d{2})(?:\s*[/-]\s*(\d{2,4}))?(?!\d)')
+
+
+class RepairError(Exception):
+    """Custom exception for answers that can not be repaired into a valid model."""
+
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
+
+
+def parse_json_answer(text: str) -> dict:
+    """Parses the JSON object of a model answer, tolerating code fences and surrounding text.
+
+    Args:
+        text: The text of the answer.
+
+    Returns:
+        dict: The parsed object.
+
+    Raises:
+        RepairError: If the answer contains no JSON object.
+    """
+    text = text.strip().removeprefix('```json').removeprefix('```').removesuffix('```').strip()
+    try:
+        obj = json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find('{'), text.rfind('}')
+        if start == -1 or end <= start:
+            raise RepairError('The answer contains no JSON object')
+        try:
+            obj = json.loads(text[start : end + 1])
+        except json.JSONDecodeError as e:
+            raise RepairError(f'The answer contains invalid JSON: {e}') from e
+    if not isinstance(obj, dict):
+        raise RepairError('The answer is not a JSON object')
+    return obj
+
+
+def parse_number(value: object) -> int | None:
+    """Parses an integer written in the many ways reports write them.
+
+    Handles thousands separators ('1,234,567', '1.234.567', '1 234 567', "1'234"),
+    decimal commas, currency symbols and unit multipliers written after ('12.5 million',
+    '3,4 Mrd', '1.2k') or before the number ('TEUR 1,234', 'EUR m 12.5').
+
+    A single separator followed by three digits is a thousands separator ('1.234'),
+    unless a multiplier follows a point, where it is the decimal point ('3.456 million').
+
+    Args:
+        value: The raw value of the answer.
+
+    Returns:
+        int | None: The parsed integer, or None if no number can be read.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return round(value)
+    if not isinstance(value, str):
+        return None
+    text = value.strip().lower()
+    match = NUMBER_PATTERN.search(text)
+    if match is None:
+        return None
+    after = re.findall(r'[a-z]+', text[match.end() :])[:2]
+    before = re.findall(r'[a-z]+', text[: match.start()])[-3:]
+    multiplier = next(
+        (MULTIPLIERS[w] for w in after if w in MULTIPLIERS),
+        next((MULTIPLIERS[w] for w in reversed(before) if w in PREFIX_MULTIPLIERS), 1),
+    )
+    raw = re.sub(r'[\s\'  ]', '', match.group(0)).rstrip('.,')
+    if ',' in raw and '.' in raw:
+        decimal = ',' if raw.rfind(',') > raw.rfind('.') else '.'
+        thousands = '.' if decimal == ',' else ','
+        raw = raw.replace(thousands, '').replace(decimal, '.')
+    elif ',' in raw or '.' in raw:
+        sep = ',' if ',' in raw else '.'
+        parts = raw.split(sep)
+        is_grouped = len(parts) > 2 or len(parts[-1]) == 3
+        if is_grouped and not (sep == '.' and len(parts) == 2 and multiplier > 1):
+            raw = raw.replace(sep, '')
+        else:
+            raw = raw.replace(sep, '.')
+    try:
+        number = float(raw)
+    except ValueError:
+        return None
+    return round(number * multiplier)
+
+
+def normalize_country(value: object) -> str | None:
+    """Normalizes a country to its ISO 3166-1 alpha-2 code.
+
+    Args:
+        value: The raw value of the answer (code or name, any case).
+
+    Returns:
+        str | None: The alpha-2 code, or None if the country is not recognized.
+    """
+    if not isinstance(value, str):
+        return None
+    text = ' '.join(value.replace('.', '').split()).upper()
+    if text in COUNTRY_CODES:
+        return COUNTRY_CODES[text]
+    if re.fullmatch(r'[A-Z]{2}', text):
+        return text
+    return None
+
+
+def normalize_currency(value: object) -> str | None:
+    """Normalizes a currency to its ISO 4217 code.
+
+    Args:
+        value: The raw value of the answer (code, symbol or name, any case).
+
+    Returns:
+        str | None: The currency code, or None if the currency is not recognized.
+    """
+    if not isinstance(value, str):
+        return None
+    text = ' '.join(value.split()).upper()
+    if text in CURRENCY_CODES:
+        return CURRENCY_CODES[text]
+    if re.fullmatch(r'[A-Z]{3}', text):
+        return text
+    # e.g. 'EUR thousands', 'in EUR'
+    codes = [w for w in re.findall(r'\b[A-Z]{3}\b', text) if w not in ('THE',)]
+    if len(codes) == 1:
+        return codes[0]
+    return None
+
+
+def parse_year(value: object) -> int | None:
+    """Parses the reference year, using the closing year of split financial years.
+
+    Args:
+        value: The raw value of the answer (e.g. 2023, 'FY2023', '2023/24').
+
+    Returns:
+        int | None: The year, or None if no year can be read.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if not isinstance(value, str):
+        return None
+    match = YEAR_PATTERN.search(value)
+    if match is None:
+        return None
+    year, closing = int(match.group(1)), match.group(2)
+    if closing is None:
+        return year
+    closing_year = int(closing) if len(closing) == 4 else year // 100 * 100 + int(closing)
+    return closing_year if closing_year in (year, year + 1) else year
+
+
+def repair_report_info(raw: dict) -> dict:
+    """Normalizes the fields of an AnnualReportInfo answer before validation.
+
+    Unknown keys are kept (the model rejects or ignores them), values that can not be
+    normalized are set to None, so a single malformed field does not invalidate the rest.
+
+    Args:
+        raw: The parsed answer, possibly containing only some of the fields.
+
+    Returns:
+        dict: The repaired answer.
+    """
+    repaired = dict(raw)
+    for field in INTEGER_FIELDS:
+        if field in repaired:
+            repaired[field] = parse_number(repaired[field])
+    for field in CURRENCY_FIELDS:
+        if field in repaired:
+            repaired[field] = normalize_currency(repaired[field])
+    if 'country_code' in repaired:
+        repaired['country_code'] = normalize_country(repaired['country_code'])
+    if 'reference_year' in repaired:
+        repaired['reference_year'] = parse_year(repaired['reference_year'])
+    if 'main_activity_description' in repaired:
+        description = repaired['main_activity_description']
+        if not isinstance(description, str) or not description.strip():
+            repaired['main_activity_description'] = None
+        else:
+            repaired['main_activity_description'] = description.strip()
+    changed = [k for k in repaired if repaired[k] != raw.get(k)]
+    if changed:
+        logging.debug(f'Repaired fields {changed} of the extracted report info')
+    return repaired
+
+
+def parse_report_info(
+    text: str,
+    model: type[pydantic.BaseModel] = models.AnnualReportInfo,
+) -> pydantic.BaseModel:
+    """Parses, repairs and validates a model answer.
+
+    Args:
+        text: The text of the answer.
+        model: The model to validate against (AnnualReportInfo or a subset of its fields).
+
+    Returns:
+        pydantic.BaseModel: The validated model.
+
+    Raises:
+        RepairError: If the answer is not a JSON object.
+        pydantic.ValidationError: If the repaired answer is still invalid.
+    """
+    return model.model_validate(repair_report_info(parse_json_answer(text)))
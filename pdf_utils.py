@@ -0,0 +1,154 @@
+import io
+import re
+import logging
+from typing import BinaryIO
+
+try:
+    import pypdf
+except ImportError:  # optional dependency, install the 'pdf' extra to trim reports
+    pypdf = None
+
+# keywords of the pages holding the extracted figures, in the most common report languages
+SECTION_KEYWORDS = {
+    'balance_sheet': (
+        'balance sheet',
+        'statement of financial position',
+        'total assets',
+        'total equity and liabilities',
+        'bilanz',
+        'aktiva',
+        'summe der aktiva',
+        'bilan',
+        'total actif',
+        'stato patrimoniale',
+        'balance general',
+        'balans',
+    ),
+    'income_statement': (
+        'income statement',
+        'profit and loss',
+        'statement of comprehensive income',
+        'net turnover',
+        'revenue',
+        'gewinn- und verlustrechnung',
+        'umsatzerlöse',
+        'compte de résultat',
+        "chiffre d'affaires",
+        'conto economico',
+        'cuenta de pérdidas y ganancias',
+        'winst-en-verliesrekening',
+    ),
+    'employees': (
+        'employees',
+        'number of staff',
+        'headcount',
+        'workforce',
+        'full-time equivalent',
+        'mitarbeiter',
+        'beschäftigte',
+        'effectif',
+        'salariés',
+        'dipendenti',
+        'empleados',
+        'werknemers',
+    ),
+}
+# pages identifying the company (name, country, reporting period)
+LEADING_PAGES = 2
+
+NUMBER_PATTERN = re.compile(r'\d[\d.,\s]*\d|\d')
+
+
+def is_available() -> bool:
+    """Checks whether the optional pypdf dependency is installed."""
+    return pypdf is not None
+
+
+def score_page(text: str) -> dict[str, float]:
+    """Scores how likely a page holds each of the extracted sections.
+
+    The score of a section is the number of its keywords on the page, weighted by
+    the density of numbers on the page (financial statements are mostly numbers).
+
+    Args:
+        text: The extracted text of the page.
+
+    Returns:
+        dict[str, float]: The score of every section in SECTION_KEYWORDS.
+    """
+    lowered = text.lower()
+    words = max(1, len(lowered.split()))
+    density = len(NUMBER_PATTERN.findall(lowered)) / words
+    return {
+        section: sum(lowered.count(k) for k in keywords) * (1 + 5 * density)
+        for section, keywords in SECTION_KEYWORDS.items()
+    }
+
+
+def select_pages(page_texts: list[str], max_pages: int, pages_per_section: int = 3) -> list[int]:
+    """Selects the pages worth sending to the model.
+
+    Keeps the leading pages, and the best scoring pages of every section together
+    with the page following them (statements often continue on the next page).
+
+    Args:
+        page_texts: The extracted text of every page.
+        max_pages: The maximum number of selected pages.
+        pages_per_section: The number of best scoring pages kept per section.
+
+    Returns:
+        list[int]: The selected page indices in document order.
+    """
+    scores = [score_page(text) for text in page_texts]
+    selected = list(range(min(LEADING_PAGES, len(page_texts))))
+    candidates = []
+    for section in SECTION_KEYWORDS:
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i][section], reverse=True)
+        candidates.extend(i for i in ranked[:pages_per_section] if scores[i][section] > 0)
+    for i in candidates:
+        for page in (i, i + 1):
+            if len(selected) >= max_pages:
+                break
+            if page < len(page_texts) and page not in selected:
+                selected.append(page)
+    return sorted(selected)
+
+
+def trim_pdf(
+    data: bytes | BinaryIO,
+    max_pages: int = 20,
+    min_text_chars: int = 1000,
+) -> bytes | None:
+    """Creates a smaller PDF containing only the relevant pages of a report.
+
+    Args:
+        data: The original PDF, as bytes or as a seekable binary stream (e.g. an mmap,
+              which avoids loading the whole report into memory).
+        max_pages: The maximum number of pages kept. Reports not longer than this are not trimmed.
+        min_text_chars: The minimum amount of extractable text. Scanned reports without a
+                        text layer can not be scored and are not trimmed.
+
+    Returns:
+        bytes | None: The trimmed PDF, or None if the report should be sent as is
+                      (pypdf is not installed, the report is short, unreadable or scanned).
+    """
+    if pypdf is None:
+        return None
+    try:
+        reader = pypdf.PdfReader(io.BytesIO(data) if isinstance(data, bytes) else data)
+        if len(reader.pages) <= max_pages:
+            return None
+        page_texts = [page.extract_text() or '' for page in reader.pages]
+        if sum(len(t) for t in page_texts) < min_text_chars:
+            return None
+        pages = select_pages(page_texts, max_pages)
+        writer = pypdf.PdfWriter()
+        for i in pages:
+            writer.add_page(reader.pages[i])
+        out = io.BytesIO()
+        writer.write(out)
+    except Exception as e:
+        logging.warning(f'Failed to trim pdf, sending it whole, cause: {e}')
+        return None
+    logging.info(f'Trimmed pdf from {len(reader.pages)} to {len(pages)} pages: {pages}')
+    return out.getvalue()
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable
+
+from scheduler import StageStats, WorkScheduler
+from valkey_utils import ConfigurationError
+
+
+class PipelineStage:
+    """A single step of the streaming pipeline, processing one company at a time."""
+
+    def __init__(
+        self,
+        name: str,
+        process_company: Callable[[str], Awaitable[None]],
+        concurrency: int,
+    ) -> None:
+        """Initializes the PipelineStage.
+
+        Args:
+            name: Name of the stage, used for logging.
+            process_company: Coroutine function processing a single company
+                             (e.g. `SiteFinder.process_company`).
+            concurrency: Number of companies processed by this stage at the same time.
+        """
+        self.name = name
+        self.process_company = process_company
+        self.concurrency = concurrency
+
+
+class StreamingPipeline:
+    """
+    Runs pipeline stages concurrently, passing companies from stage to stage
+    through bounded async queues.
+
+    A company is handed to the next stage as soon as the previous stage is done with it,
+    so downloads start while other companies are still being crawled, extraction starts
+    while other reports are still downloading, and so on. Every stage decides on its own
+    (based on the stores) whether there is anything to do for a company it receives.
+    """
+
+    __END = object()
+
+    def __init__(
+        self,
+        stages: list[PipelineStage],
+        queue_size: int = 100,
+    ) -> None:
+        """Initializes the StreamingPipeline.
+
+        Args:
+            stages: The stages in execution order.
+            queue_size: Maximum number of companies waiting between two stages. A full
+                        queue applies backpressure on the upstream stage.
+
+        Raises:
+            ConfigurationError: If no stages are given or `queue_size` is less than 1.
+        """
+        if not stages:
+            raise ConfigurationError('at least one pipeline stage is required')
+        if queue_size < 1:
+            raise ConfigurationError('queue_size must be >= 1')
+        self.stages = stages
+        self.queue_size = queue_size
+
+    async def run(self, companies: list[str]) -> list[StageStats]:
+        """Streams all companies through every stage.
+
+        Args:
+            companies: The companies fed into the first stage.
+
+        Returns:
+            list[StageStats]: The final statistics of each stage, in stage order.
+        """
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages[1:]]
+        tasks = []
+        for i, stage in enumerate(self.stages):
+            source = companies if i == 0 else self.__drain(queues[i - 1])
+            sink = queues[i] if i < len(queues) else None
+            tasks.append(self.__run_stage(stage, source, sink))
+        logging.info(f'Streaming pipeline started with {len(companies)} companies')
+        stats = await asyncio.gather(*tasks)
+        logging.info('Streaming pipeline finished')
+        return stats
+
+    async def __run_stage(
+        self,
+        stage: PipelineStage,
+        source: list[str] | AsyncIterator[str],
+        sink: asyncio.Queue | None,
+    ) -> StageStats:
+        """Runs one stage and forwards every processed company to the next stage.
+
+        Companies are forwarded even if processing failed, the downstream stages
+        skip companies that have no data for them.
+        """
+
+        async def process(company: str) -> None:
+            try:
+                await stage.process_company(company)
+            finally:
+                if sink is not None:
+                    await sink.put(company)
+
+        try:
+            return await WorkScheduler(stage.name, stage.concurrency).run(source, process)
+        finally:
+            if sink is not None:
+                await sink.put(StreamingPipeline.__END)
+
+    @staticmethod
+    async def __drain(queue: asyncio.Queue) -> AsyncIterator[str]:
+        """Yields companies from an inter-stage queue until the upstream stage finishes."""
+        while True:
+            company = await queue.get()
+            if company is StreamingPipeline.__END:
+                return
+            yield company
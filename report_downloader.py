@@ -1,14 +1,13 @@
 import os
 import httpx
 import logging
-import asyncio
 import pandas as pd
 
 import valkey_stores
 
-from utils import batched
+from scheduler import WorkScheduler
 from models import AnnualReportLink, AnnualReportLinkWithPaths
-from crawler import HTMLDownloader
+from crawler import Crawler, HTMLDownloader
 from pdf_downloader import PDFDownloader
 
 
@@ -28,6 +27,7 @@ class ReportDownloader:
         report_download_directory: str,
         concurrent_threads: int = 1,
         report_link_csv_path: str | None = None,
+        crawler: Crawler | None = None,
     ) -> None:
         """Initializes the ReportDownloader.
 
@@ -37,6 +37,8 @@ class ReportDownloader:
             concurrent_threads: Number of concurrent threads for downloading files.
             report_link_csv_path: Path to a csv containing companies annual financial report data
                                   (expected to be in the format of discovery.csv)
+            crawler: The crawler used for downloading HTML reports, shared with the other
+                     components. Defaults to a new Crawler.
         """
         self.report_link_store = report_link_store
         self.report_download_directory = report_download_directory
@@ -61,21 +63,20 @@ class ReportDownloader:
             'user-agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36',
         }
         self.pdf_downloader = PDFDownloader(default_headers=headers)
-        self.html_downloader = HTMLDownloader()
+        self.html_downloader = HTMLDownloader(crawler)
 
     async def run(self) -> None:
-        """Downloads annual reports for companies in batches.
+        """Downloads annual reports for all companies with a known report link.
 
         Retrieves companies from the report_link_store and processes them
-        concurrently based on the configured number of threads.
+        concurrently, keeping the configured number of downloads in flight.
         """
-        companies = self.report_link_store.get_companies()
+        companies = await self.report_link_store.aget_companies()
         if len(companies) == 0:
             return
 
-        for company_batch in batched(companies, self.concurrent_threads):
-            tasks = [self.process_company(c) for c in company_batch]
-            await asyncio.gather(*tasks)
+        scheduler = WorkScheduler('download-reports', self.concurrent_threads)
+        await scheduler.run(companies, self.process_company)
 
     async def process_company(
         self,
@@ -91,7 +92,7 @@ class ReportDownloader:
             company: The name of the company to process.
         """
         try:
-            report_link = self.report_link_store.get(company)
+            report_link = await self.report_link_store.aget(company)
             if report_link is None:
                 logging.error(f'Report link is missing for company {company}, skipping download')
                 return
@@ -106,7 +107,7 @@ class ReportDownloader:
                     return
             logging.info(f'Downloading report for {company}...')
             fname = await self.download_annual_report(report_link, company)
-            self.report_link_store.add_local_path(company, fname)
+            await self.report_link_store.aadd_local_path(company, fname)
         except DownloadError as e:
             logging.error(e, exc_info=True)
         except Exception as e:
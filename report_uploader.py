@@ -1,9 +1,10 @@
 import os
+import asyncio
 import logging
 
 import valkey_stores
 
-from models import AnnualReportLinkWithPaths
+from models import AnnualReportLink, AnnualReportLinkWithPaths
 from gcs_utils import GCSBatchUploader
 
 
@@ -46,24 +47,11 @@ class ReportUploader:
         """
         logging.info('Started report uploads')
         companies = self.report_link_store.get_companies()
-        reports = []
-        for c in companies:
-            reports.append(self.report_link_store.get(c))
+        reports = self.report_link_store.get_many(companies)
 
         report_info = []
         for company, report in zip(companies, reports):
-            if not isinstance(report, AnnualReportLinkWithPaths):
-                logging.warning(
-                    f'Skipping upload of report for company {company}, not available locally'
-                )
-                continue
-            if report.gcs_link is not None:
-                logging.warning(f'Skipping upload for company {company} as it has a gcs link')
-                continue
-            if report.local_path is None:
-                logging.error(
-                    f'Local path is unexpectedly missing from database for company {company}, skipping upload'
-                )
+            if not ReportUploader.__should_upload(company, report):
                 continue
             report_info.append(
                 (
@@ -88,3 +76,54 @@ class ReportUploader:
             self.report_link_store.add_gcs_link(company, res)
 
         logging.info('Finished report uploads')
+
+    async def process_company(
+        self,
+        company: str,
+    ) -> None:
+        """Uploads the report of a single company, without blocking the event loop.
+
+        Used by the streaming pipeline, where reports are uploaded one by one as
+        soon as they are downloaded instead of in one batch after all downloads.
+
+        Args:
+            company: The name of the company to process.
+        """
+        report = await self.report_link_store.aget(company)
+        if not ReportUploader.__should_upload(company, report):
+            return
+        res = await asyncio.to_thread(
+            self.uploader.upload_blob,
+            report.local_path,
+            os.path.basename(report.local_path),
+        )
+        if type(res) is not str:
+            logging.error(f'Failed to upload report of company {company}, error: {res}')
+            return
+        await self.report_link_store.aadd_gcs_link(company, res)
+
+    @staticmethod
+    def __should_upload(company: str, report: AnnualReportLink | None) -> bool:
+        """Checks whether a stored report is available locally and not uploaded yet.
+
+        Args:
+            company: The name of the company (for logging).
+            report: The stored report link of the company.
+
+        Returns:
+            bool: True if the report should be uploaded.
+        """
+        if not isinstance(report, AnnualReportLinkWithPaths):
+            logging.warning(
+                f'Skipping upload of report for company {company}, not available locally'
+            )
+            return False
+        if report.gcs_link is not None:
+            logging.warning(f'Skipping upload for company {company} as it has a gcs link')
+            return False
+        if report.local_path is None:
+            logging.error(
+                f'Local path is unexpectedly missing from database for company {company}, skipping upload'
+            )
+            return False
+        return True
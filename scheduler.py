@@ -0,0 +1,215 @@
+import time
+import asyncio
+import logging
+import contextlib
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Generic, Iterable, TypeVar
+
+from valkey_utils import ConfigurationError
+
+T = TypeVar('T')
+
+
+class StageStats:
+    """Runtime counters of a single pipeline stage driven by a WorkScheduler."""
+
+    def __init__(self, name: str) -> None:
+        """Initializes empty counters for a stage.
+
+        Args:
+            name: The human readable name of the stage (used in log lines).
+        """
+        self.name = name
+        self.started_at = time.monotonic()
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def throughput(self) -> float:
+        """Finished items (completed + failed) per minute since the stage started."""
+        elapsed = time.monotonic() - self.started_at
+        if elapsed <= 0:
+            return 0.0
+        return (self.completed + self.failed) / elapsed * 60
+
+    def summary(self) -> str:
+        """Formats the counters as a single log friendly line.
+
+        Returns:
+            str: e.g. 'find-reports: queued=3 in_flight=10 completed=52 failed=1 (12.3/min)'.
+        """
+        return (
+            f'{self.name}: queued={self.queued} in_flight={self.in_flight} '
+            f'completed={self.completed} failed={self.failed} ({self.throughput:.1f}/min)'
+        )
+
+
+class WorkScheduler(Generic[T]):
+    """
+    Bounded-concurrency sliding-window scheduler.
+
+    Unlike batching with asyncio.gather, a new item is started as soon as any
+    in-flight item finishes, so exactly `concurrency` items are in flight as long
+    as there is work left, regardless of how uneven the per-item latency is.
+
+    Exceptions raised while processing an item do not propagate to the caller of
+    `run`: they are logged and counted in `StageStats.failed`, and the remaining
+    items are still processed. Workers that need to react to a failure have to
+    handle it themselves.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        report_interval_sec: float = 60,
+    ) -> None:
+        """Initializes the WorkScheduler.
+
+        Args:
+            name: Name of the stage, used for logging the stage statistics.
+            concurrency: Maximum number of items processed at the same time. Must be >= 1.
+            report_interval_sec: Interval of the periodic statistics log line. A value <= 0
+                                 disables periodic reporting (a summary is still logged at the end).
+
+        Raises:
+            ConfigurationError: If `concurrency` is less than 1.
+        """
+        if concurrency < 1:
+            raise ConfigurationError('concurrency must be >= 1')
+        self.name = name
+        self.concurrency = concurrency
+        self.report_interval_sec = report_interval_sec
+        self.stats = StageStats(name)
+
+    async def run(
+        self,
+        items: Iterable[T] | AsyncIterable[T],
+        worker: Callable[[T], Awaitable[None]],
+    ) -> StageStats:
+        """Processes every item with `worker`, keeping up to `concurrency` items in flight.
+
+        Exceptions raised by the worker are logged and counted as failures, they
+        never stop the processing of the remaining items.
+
+        Args:
+            items: The items to process. Async iterables are consumed lazily, which
+                   allows feeding the scheduler from another (still running) stage.
+            worker: Coroutine function called once per item.
+
+        Returns:
+            StageStats: The final statistics of the stage.
+        """
+        self.stats = StageStats(self.name)
+        queue: asyncio.Queue[T] = asyncio.Queue(maxsize=self.concurrency)
+        workers = [asyncio.create_task(self.__work(queue, worker)) for _ in range(self.concurrency)]
+        reporter = None
+        if self.report_interval_sec > 0:
+            reporter = asyncio.create_task(self.__report())
+        try:
+            if isinstance(items, AsyncIterable):
+                async for item in items:
+                    await self.__enqueue(queue, item)
+            else:
+                for item in items:
+                    await self.__enqueue(queue, item)
+            await queue.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            if reporter is not None:
+                reporter.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        logging.info(f'Stage finished, {self.stats.summary()}')
+        return self.stats
+
+    async def __enqueue(self, queue: asyncio.Queue[T], item: T) -> None:
+        """Puts an item on the work queue, waiting while the queue is full."""
+        await queue.put(item)
+        self.stats.queued = queue.qsize()
+
+    async def __work(
+        self,
+        queue: asyncio.Queue[T],
+        worker: Callable[[T], Awaitable[None]],
+    ) -> None:
+        """Single worker loop, pulls items from the queue until cancelled."""
+        while True:
+            item = await queue.get()
+            self.stats.queued = queue.qsize()
+            self.stats.in_flight += 1
+            try:
+                await worker(item)
+                self.stats.completed += 1
+            except Exception as e:
+                self.stats.failed += 1
+                logging.error(f'{self.name} failed to process {item}, cause: {e}', exc_info=True)
+            finally:
+                self.stats.in_flight -= 1
+                queue.task_done()
+
+    async def __report(self) -> None:
+        """Periodically logs the stage statistics until cancelled."""
+        while True:
+            await asyncio.sleep(self.report_interval_sec)
+            logging.info(self.stats.summary())
+
+
+class MemoryBudget:
+    """
+    Admission control for memory heavy work items.
+
+    Work reserves its estimated memory before it starts and is admitted only while
+    the total reservation stays within the budget, so the peak memory usage is bounded
+    by the budget instead of by concurrency times the largest item. Items are admitted
+    in arrival order (large items are not starved by small ones), an item larger than
+    the whole budget is admitted alone.
+    """
+
+    def __init__(self, limit_bytes: int) -> None:
+        """Initializes the MemoryBudget.
+
+        Args:
+            limit_bytes: The total amount of memory that can be reserved at the same time.
+
+        Raises:
+            ConfigurationError: If `limit_bytes` is less than 1.
+        """
+        if limit_bytes < 1:
+            raise ConfigurationError('limit_bytes must be >= 1')
+        self.limit_bytes = limit_bytes
+        self.reserved_bytes = 0
+        self.peak_bytes = 0
+        self.condition = asyncio.Condition()
+        self.__issued = 0
+        self.__admitted = 0
+
+    @contextlib.asynccontextmanager
+    async def reserve(self, nbytes: int) -> AsyncIterator[None]:
+        """Waits until `nbytes` fit into the budget and holds them for the duration of the block.
+
+        Args:
+            nbytes: The estimated memory usage of the work.
+        """
+        async with self.condition:
+            ticket = self.__issued
+            self.__issued += 1
+            await self.condition.wait_for(
+                lambda: (
+                    self.__admitted == ticket
+                    and (
+                        self.reserved_bytes == 0 or self.reserved_bytes + nbytes <= self.limit_bytes
+                    )
+                )
+            )
+            self.__admitted += 1
+            self.reserved_bytes += nbytes
+            self.peak_bytes = max(self.peak_bytes, self.reserved_bytes)
+            self.condition.notify_all()
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.reserved_bytes -= nbytes
+                self.condition.notify_all()
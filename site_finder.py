@@ -5,7 +5,7 @@ import genai_utils
 import datetime as dt
 
 from google.genai import types
-from utils import batched
+from scheduler import WorkScheduler
 from valkey_stores import ConversationStore, CompanySiteStore
 from models import SiteDiscoveryResponse
 from valkey_utils import ConfigurationError
@@ -24,6 +24,7 @@ class SiteFinder:
         company_names: list[str],
         crawler: crawler.Crawler,
         concurrent_threads: int = 1,
+        link_validator: crawler.LinkValidator | None = None,
     ) -> None:
         """Initializes the SiteFinder.
 
@@ -35,6 +36,8 @@ class SiteFinder:
             crawler: An instance of the web crawler (crawler.Crawler) for validating links.
             concurrent_threads: Number of concurrent threads for processing companies.
                                 Must be >= 1.
+            link_validator: An optional validator checking links with HTTP requests
+                            instead of crawling them.
 
         Raises:
             ConfigurationError: If `concurrent_threads` is less than 1.
@@ -47,6 +50,7 @@ class SiteFinder:
             raise ConfigurationError('concurrent_threads must be larger than 1')
         self.concurrent_threads = concurrent_threads
         self.crawler = crawler
+        self.link_validator = link_validator
 
     async def run(self) -> None:
         """Runs the site finding workflow for all configured company names.
@@ -54,12 +58,11 @@ class SiteFinder:
         An AI model is prompted to find the official site and investor relations page
         for each company. The conversation with the AI, as well as the validated
         result (SiteDiscoveryResponse), is saved in the configured Valkey stores.
-        Companies are processed in batches concurrently.
+        Companies are processed concurrently, keeping `concurrent_threads` of them in flight.
         """
         logging.info('Site finding started')
-        for company_batch in batched(self.company_names, self.concurrent_threads):
-            tasks = [self.process_company(c) for c in company_batch]
-            await asyncio.gather(*tasks)
+        scheduler = WorkScheduler('find-sites', self.concurrent_threads)
+        await scheduler.run(self.company_names, self.process_company)
         logging.info('Site finding finished')
 
     async def process_company(
@@ -75,7 +78,7 @@ class SiteFinder:
         Args:
             company: The name of the company to process.
         """
-        site = self.company_site_store.get(company)
+        site = await self.company_site_store.aget(company)
         if site is not None and (
             site.official_website_link is not None or site.investor_relations_page is not None
         ):
@@ -83,7 +86,7 @@ class SiteFinder:
         logging.info(f'Starting site finding for: {company}')
         try:
             res = await self.find_site(company)
-            self.company_site_store.store(company, res)
+            await self.company_site_store.astore(company, res)
         except Exception as e:
             logging.error(
                 f'Failed to find site for company:{company} , cause: {e}',
@@ -131,7 +134,7 @@ class SiteFinder:
 
                     The current date is {today}."""
         contents = genai_utils.GenaiClient.get_simple_message(prompt)
-        self.conversation_store.store(company_name, 'site_find', contents)
+        await self.conversation_store.astore(company_name, 'site_find', contents)
         response = await self.genai_client.generate(
             contents=contents,
             thinking_budget=1024,
@@ -150,14 +153,14 @@ class SiteFinder:
             'The links previously retrieved by you were found to not be working anymore. Try again please, now with different queries. Use the date I provided to try to look for more recent results and do not return the same links.'
         )
 
-        self.conversation_store.store(company_name, 'site_find', contents)
+        await self.conversation_store.astore(company_name, 'site_find', contents)
         response = await self.genai_client.generate(
             contents=contents,
             thinking_budget=1024,
             google_search=True,
         )
         contents.append(response.candidates[0].content)
-        self.conversation_store.store(company_name, 'site_find', contents)
+        await self.conversation_store.astore(company_name, 'site_find', contents)
 
         disco_res = await self.extract_link_from_convo(company_name, contents)
 
@@ -200,13 +203,13 @@ class SiteFinder:
         )
         messages.append(response.candidates[0].content)
 
-        self.conversation_store.store(company_name, 'site_find', messages)
+        await self.conversation_store.astore(company_name, 'site_find', messages)
         return SiteDiscoveryResponse.model_validate_json(response.text)
 
     async def validate_result(
         self, site_response: SiteDiscoveryResponse
     ) -> SiteDiscoveryResponse | None:
-        """Validates the URLs in a SiteDiscoveryResponse by attempting to crawl them.
+        """Validates the URLs in a SiteDiscoveryResponse concurrently.
 
         If a URL cannot be successfully crawled (e.g., results in an error or
         timeout), it is removed (set to None) from the response object.
@@ -219,13 +222,15 @@ class SiteFinder:
                                           links removed. Returns None if both links become
                                           invalid after validation.
         """
-        valid_official = False
-        valid_investors = False
+
+        async def validate(link: str | None) -> bool:
+            return False if link is None else await self.validate_link(link)
+
         try:
-            if site_response.official_website_link is not None:
-                valid_official = await self.validate_link(site_response.official_website_link)
-            if site_response.investor_relations_page is not None:
-                valid_investors = await self.validate_link(site_response.investor_relations_page)
+            valid_official, valid_investors = await asyncio.gather(
+                validate(site_response.official_website_link),
+                validate(site_response.investor_relations_page),
+            )
             if not valid_official and not valid_investors:
                 return None
             if not valid_official:
@@ -240,7 +245,7 @@ class SiteFinder:
         return site_response
 
     async def validate_link(self, link: str) -> bool:
-        """Validates a single URL by attempting to crawl it.
+        """Validates a single URL with the link validator, or by crawling it if there is none.
 
         Args:
             link: The URL string to validate.
@@ -250,6 +255,8 @@ class SiteFinder:
                   False otherwise (e.g., HTTP error, timeout, invalid content).
         """
         try:
+            if self.link_validator is not None:
+                return await self.link_validator.validate(link)
             r = await self.crawler.crawl(link)
             return r.success
         except Exception:
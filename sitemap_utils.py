@@ -0,0 +1,220 @@
+import zlib
+import heapq
+import contextlib
+import logging
+import itertools
+import urllib.parse
+import xml.etree.ElementTree as ET
+
+import httpx
+
+import link_ranker
+
+# sitemaps tried when robots.txt does not name any
+DEFAULT_SITEMAP_PATHS = ('/sitemap.xml', '/sitemap_index.xml')
+GZIP_MAGIC = b'\x1f\x8b'
+# second level labels of country domains registered below them, e.g. example.co.uk
+SECOND_LEVEL_LABELS = ('co', 'com', 'org', 'net', 'gov', 'ac', 'edu')
+
+
+def site_domain(url: str) -> str:
+    """Approximates the registrable domain of a URL (e.g. 'ir.example.co.uk' -> 'example.co.uk').
+
+    Args:
+        url: An absolute URL.
+
+    Returns:
+        str: The lowercased registrable domain, or the whole host for IP addresses.
+    """
+    host = (urllib.parse.urlsplit(url).hostname or '').lower()
+    labels = host.split('.')
+    if labels[-1].isdigit():
+        return host
+    if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+class ByteBudget:
+    """The number of sitemap bytes a single discovery may still read."""
+
+    def __init__(self, remaining: int) -> None:
+        """Initializes the ByteBudget.
+
+        Args:
+            remaining: The number of bytes that may be read.
+        """
+        self.remaining = remaining
+
+
+class SitemapDiscovery:
+    """
+    Lists the PDF files of a website from its sitemaps, without rendering any page.
+
+    Sitemaps are found through robots.txt (or the default locations) and streamed
+    through an incremental XML parser, gzip compressed and nested sitemaps included.
+    Memory stays bounded: parsed elements are discarded right away, only the best
+    scoring PDF links are kept, and the number of sitemaps, URLs and bytes read is limited.
+    Nested sitemaps and PDFs outside the domains of the websites are ignored.
+    """
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        ranker: link_ranker.LinkRanker | None = None,
+        max_sitemaps: int = 20,
+        max_urls: int = 100_000,
+        max_bytes: int = 50 * 1024 * 1024,
+        max_total_bytes: int = 200 * 1024 * 1024,
+    ) -> None:
+        """Initializes the SitemapDiscovery.
+
+        Args:
+            http_client: The client sitemaps are fetched with (e.g. the crawler's pool).
+            ranker: The ranker scoring the PDF links. Defaults to a LinkRanker with the
+                    URL-only thresholds, as sitemap entries have no link text.
+            max_sitemaps: Maximum number of sitemaps read per discovery.
+            max_urls: Maximum number of URLs read per discovery.
+            max_bytes: Maximum number of (decompressed) bytes read per sitemap.
+            max_total_bytes: Maximum number of (decompressed) bytes read per discovery.
+        """
+        self.http_client = http_client
+        self.ranker = (
+            link_ranker.LinkRanker(
+                accept_score=link_ranker.URL_ONLY_ACCEPT_SCORE,
+                confirm_score=link_ranker.URL_ONLY_CONFIRM_SCORE,
+            )
+            if ranker is None
+            else ranker
+        )
+        self.max_sitemaps = max_sitemaps
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self.max_total_bytes = max_total_bytes
+
+    async def discover(self, start_urls: list[str], k: int = 5) -> list[link_ranker.RankedLink]:
+        """Finds the most likely annual report PDFs in the sitemaps of the given websites.
+
+        Args:
+            start_urls: URLs of the websites (e.g. official website and investor relations page).
+            k: The number of candidates returned.
+
+        Returns:
+            list[link_ranker.RankedLink]: Up to k PDF links, best first. Empty if the websites
+                                          have no (readable) sitemap.
+        """
+        best: list[tuple[float, int, link_ranker.RankedLink]] = []
+        order = itertools.count()
+        seen_urls = set()
+        read_urls = 0
+        budget = ByteBudget(self.max_total_bytes)
+        domains = {site_domain(url) for url in start_urls}
+        queue = []
+        # sitemaps named in robots.txt may live on other hosts (e.g. a CDN), their entries not
+        for origin in dict.fromkeys(self.__origin(url) for url in start_urls):
+            queue.extend(await self.__sitemaps_of(origin))
+        visited_sitemaps = set()
+        while (
+            queue
+            and len(visited_sitemaps) < self.max_sitemaps
+            and read_urls < self.max_urls
+            and budget.remaining > 0
+        ):
+            sitemap = queue.pop(0)
+            if sitemap in visited_sitemaps:
+                continue
+            visited_sitemaps.add(sitemap)
+            try:
+                async with contextlib.aclosing(self.__read_sitemap(sitemap, budget)) as entries:
+                    async for kind, loc in entries:
+                        if site_domain(loc) not in domains:
+                            continue
+                        if kind == 'sitemap':
+                            queue.append(loc)
+                            continue
+                        read_urls += 1
+                        if read_urls >= self.max_urls:
+                            break
+                        if not urllib.parse.urlsplit(loc).path.lower().endswith('.pdf'):
+                            continue
+                        if loc in seen_urls:
+                            continue
+                        seen_urls.add(loc)
+                        ranked = self.ranker.score(loc, '')
+                        item = (ranked.score, -next(order), ranked)
+                        if len(best) < k:
+                            heapq.heappush(best, item)
+                        elif item[:2] > best[0][:2]:
+                            heapq.heapreplace(best, item)
+            except (httpx.HTTPError, ET.ParseError, zlib.error) as e:
+                logging.info(f'Failed to read sitemap {sitemap}, cause: {e}')
+        logging.info(
+            f'Read {len(visited_sitemaps)} sitemaps, {read_urls} urls and '
+            f'{self.max_total_bytes - budget.remaining} bytes of {start_urls}, '
+            f'found {len(seen_urls)} pdfs'
+        )
+        return [item[2] for item in sorted(best, key=lambda i: i[:2], reverse=True)]
+
+    @staticmethod
+    def __origin(url: str) -> str:
+        """Returns the scheme and host part of a URL."""
+        parts = urllib.parse.urlsplit(url)
+        return urllib.parse.urlunsplit((parts.scheme or 'https', parts.netloc, '', '', ''))
+
+    async def __sitemaps_of(self, origin: str) -> list[str]:
+        """Lists the sitemaps named in robots.txt, or the default sitemap locations."""
+        sitemaps = []
+        try:
+            async with self.http_client.stream('GET', f'{origin}/robots.txt') as response:
+                if response.is_success:
+                    async for line in response.aiter_lines():
+                        key, _, value = line.partition(':')
+                        if key.strip().lower() == 'sitemap' and value.strip():
+                            sitemaps.append(urllib.parse.urljoin(origin, value.strip()))
+        except httpx.HTTPError as e:
+            logging.debug(f'Failed to read {origin}/robots.txt, cause: {e}')
+        return sitemaps or [f'{origin}{path}' for path in DEFAULT_SITEMAP_PATHS]
+
+    async def __read_sitemap(self, url: str, budget: ByteBudget):
+        """Streams the ('sitemap' | 'url', location) entries of a sitemap or sitemap index.
+
+        Reads at most `max_bytes` and what is left of the budget, which is charged with
+        the bytes read.
+
+        Raises:
+            httpx.HTTPError: If the sitemap can not be fetched.
+            xml.etree.ElementTree.ParseError: If the sitemap is not valid XML.
+            zlib.error: If a gzip compressed sitemap is corrupt.
+        """
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        root = None
+        decompressor = None
+        read = 0
+        limit = min(self.max_bytes, budget.remaining)
+        async with self.http_client.stream('GET', url) as response:
+            if not response.is_success:
+                return
+            async for chunk in response.aiter_bytes():
+                if decompressor is None and read == 0 and chunk.startswith(GZIP_MAGIC):
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                if decompressor is not None:
+                    chunk = decompressor.decompress(chunk, limit - read)
+                else:
+                    chunk = chunk[: limit - read]
+                read += len(chunk)
+                budget.remaining -= len(chunk)
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    if event == 'start':
+                        root = elem if root is None else root
+                        continue
+                    tag = elem.tag.rsplit('}', 1)[-1]
+                    if tag == 'sitemap' or tag == 'url':
+                        loc = elem.findtext('{*}loc')
+                        if loc:
+                            yield tag, loc.strip()
+                        # processed entries are dropped, so the tree never grows
+                        root.clear()
+                if read >= limit:
+                    logging.info(f'Sitemap {url} exceeds {limit} bytes, truncated')
+                    return
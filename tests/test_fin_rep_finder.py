@@ -0,0 +1,92 @@
+import types
+import asyncio
+
+import pytest
+
+pytest.importorskip('valkey')
+pytest.importorskip('crawl4ai')
+fakeredis = pytest.importorskip('fakeredis')
+
+import fin_rep_finder  # noqa: E402
+import valkey_stores  # noqa: E402
+from models import ModelActionResponseWithMetadata  # noqa: E402
+
+PAGE_A = 'https://example.com/'
+PAGE_B = 'https://example.com/investors'
+PAGE_C = 'https://example.com/reports'
+
+
+def make_store() -> valkey_stores.ModelActionStore:
+    server = fakeredis.FakeServer()
+    client = types.SimpleNamespace(client=fakeredis.FakeRedis(server=server, decode_responses=True))
+    async_client = types.SimpleNamespace(
+        client=fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    )
+    return valkey_stores.ModelActionStore(client, async_client)
+
+
+def make_finder(store, max_tries=10) -> fin_rep_finder.FinRepFinder:
+    return fin_rep_finder.FinRepFinder(
+        None, None, None, None, store, None, '.', max_tries_per_company=max_tries, resume=True
+    )
+
+
+def action(step: int, url: str, name: str, link_to_visit: str | None = None):
+    return ModelActionResponseWithMetadata(
+        action=name, link_to_visit=link_to_visit, taken_at_url=url, action_ts_ms=step
+    )
+
+
+async def store_back_then_visit(store):
+    # A visit B, B back, A visit C: the second action on A must not replace the first
+    await store.astore('acme', PAGE_A, action(1, PAGE_A, 'visit', PAGE_B))
+    await store.astore('acme', PAGE_B, action(2, PAGE_B, 'back'))
+    await store.astore('acme', PAGE_A, action(3, PAGE_A, 'visit', PAGE_C))
+
+
+def test_restore_state_after_back():
+    async def run():
+        store = make_store()
+        await store_back_then_visit(store)
+        steps = await store.aget_steps('acme')
+        state = await make_finder(store).restore_state('acme', PAGE_A)
+        return steps, state
+
+    steps, state = asyncio.run(run())
+    assert [s.action_ts_ms for s in steps] == [1, 2, 3]
+    assert state is not None
+    assert state.current_url == PAGE_C
+    assert state.url_history == [PAGE_A, PAGE_B, PAGE_A]
+    assert [a.action_ts_ms for a in state.action_history] == [1, 2, 3]
+
+
+def test_restore_state_starts_exhausted_crawls_over():
+    async def run():
+        store = make_store()
+        await store_back_then_visit(store)
+        return await make_finder(store, max_tries=3).restore_state('acme', PAGE_A)
+
+    assert asyncio.run(run()) is None
+
+
+def test_restore_state_skips_finished_and_foreign_crawls():
+    async def run():
+        store = make_store()
+        await store_back_then_visit(store)
+        finder = make_finder(store)
+        foreign = await finder.restore_state('acme', PAGE_B)
+        await store.astore('acme', PAGE_C, action(4, PAGE_C, 'abort'), True)
+        finished = await finder.restore_state('acme', PAGE_A)
+        return foreign, finished
+
+    assert asyncio.run(run()) == (None, None)
+
+
+def test_del_all_removes_steps():
+    async def run():
+        store = make_store()
+        await store_back_then_visit(store)
+        await store.adel_all('acme')
+        return await store.aget_steps('acme')
+
+    assert asyncio.run(run()) == []
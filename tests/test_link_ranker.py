@@ -0,0 +1,65 @@
+import link_ranker
+import markdown_utils
+
+
+def make_ranker():
+    return link_ranker.LinkRanker(current_year=2025)
+
+
+def test_score_annual_report_pdf():
+    ranked = make_ranker().score(
+        'https://example.com/ir/annual-report-2024.pdf', 'Annual Report 2024'
+    )
+    expected = (
+        link_ranker.PDF_SCORE
+        + link_ranker.KEYWORD_TEXT_SCORE
+        + link_ranker.KEYWORD_URL_SCORE
+        + link_ranker.RECENT_YEAR_SCORE
+    )
+    assert ranked.score == expected
+    assert ranked.year == 2024
+    assert ranked.is_pdf
+
+
+def test_score_native_language_keywords():
+    ranked = make_ranker().score('https://example.de/gb.pdf', 'Geschäftsbericht 2024 (PDF)')
+    assert ranked.score == (
+        link_ranker.PDF_SCORE
+        + link_ranker.PDF_TEXT_SCORE
+        + link_ranker.KEYWORD_TEXT_SCORE
+        + link_ranker.RECENT_YEAR_SCORE
+    )
+
+
+def test_score_penalizes_excluded_and_old_reports():
+    ranker = make_ranker()
+    annual = ranker.score('https://example.com/annual-report-2024.pdf', '')
+    interim = ranker.score('https://example.com/interim-report-2024.pdf', '')
+    old = ranker.score('https://example.com/annual-report-2019.pdf', '')
+    assert interim.score == annual.score - link_ranker.KEYWORD_URL_SCORE + link_ranker.EXCLUDE_SCORE
+    assert old.score == annual.score - link_ranker.RECENT_YEAR_SCORE + link_ranker.OLD_YEAR_SCORE
+
+
+def test_score_ignores_future_years_and_partial_words():
+    ranked = make_ranker().score('https://example.com/esgeneral-2031.html', 'Overview')
+    assert ranked.score == 0
+    assert ranked.year is None
+
+
+def test_rank_accept_and_candidates():
+    links = markdown_utils.LinkTable()
+    links.add('https://example.com/annual-report-2024.pdf', 'Annual Report 2024')
+    links.add('https://example.com/contact', 'Contact')
+    ranker = make_ranker()
+    ranked = ranker.rank(links)
+    assert ranked[0].url == 'https://example.com/annual-report-2024.pdf'
+    assert ranker.is_accepted(ranked)
+    assert [r.url for r in ranker.candidates(ranked)] == [ranked[0].url]
+
+
+def test_close_scores_are_not_accepted():
+    links = markdown_utils.LinkTable()
+    links.add('https://example.com/annual-report-2024.pdf', 'Annual Report 2024')
+    links.add('https://example.com/annual-report-2024-en.pdf', 'Annual Report 2024')
+    ranker = make_ranker()
+    assert not ranker.is_accepted(ranker.rank(links))
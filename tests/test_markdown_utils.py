@@ -0,0 +1,74 @@
+import markdown_utils
+
+BASE_URL = 'https://example.com/investors/'
+
+
+def test_prune_markdown_numbers_links_and_drops_images():
+    markdown = (
+        '# Investors\n\n'
+        '![logo](/logo.png)\n\n'
+        'Read the [Annual Report 2024](reports/ar-2024.pdf) and the '
+        '[half year report](/hy-2024.pdf).'
+    )
+    content, links = markdown_utils.prune_markdown(markdown, BASE_URL)
+    assert 'logo' not in content
+    assert 'Annual Report 2024 [1]' in content
+    assert 'half year report [2]' in content
+    assert links.urls == [
+        'https://example.com/investors/reports/ar-2024.pdf',
+        'https://example.com/hy-2024.pdf',
+    ]
+
+
+def test_prune_markdown_keeps_links_of_boilerplate():
+    markdown = (
+        'Our results.\n\n'
+        '© 2024 Example AG | [Annual Report](/ar-2024.pdf) | [Imprint](/imprint)\n\n'
+        'We use cookies. [Accept all](#accept)'
+    )
+    content, links = markdown_utils.prune_markdown(markdown, BASE_URL)
+    assert content == 'Our results.'
+    assert links.urls == ['https://example.com/ar-2024.pdf', 'https://example.com/imprint']
+
+
+def test_prune_markdown_keeps_links_of_menus_and_repeated_blocks():
+    menu = '- [Home](/)\n- [Investors](/investors/)\n- [Reports](/reports/)'
+    seen_blocks = {}
+    markdown_utils.prune_markdown(
+        f'{menu}\n\nFooter text [Contact](/contact)', 'https://example.com/', seen_blocks
+    )
+    content, links = markdown_utils.prune_markdown(
+        f'{menu}\n\nFooter text [Contact](/contact)\n\nNew content.', BASE_URL, seen_blocks
+    )
+    assert content == 'New content.'
+    assert 'https://example.com/reports/' in links.urls
+    assert 'https://example.com/contact' in links.urls
+
+
+def test_prune_markdown_skips_anchors_and_scripts():
+    markdown = '[Top](#top) [Mail](mailto:ir@example.com) [Open](javascript:void(0)) [IR](/ir)'
+    content, links = markdown_utils.prune_markdown(markdown, BASE_URL)
+    assert links.urls == ['https://example.com/ir']
+    assert content.startswith('Top Mail')
+
+
+def test_link_table_keeps_numbers_and_limit():
+    links = markdown_utils.LinkTable(max_links=2)
+    assert links.add('https://example.com/a', '') == 1
+    assert links.add('https://example.com/b', 'B') == 2
+    assert links.add('https://example.com/a', 'A') == 1
+    assert links.add('https://example.com/c', 'C') is None
+    assert links.texts == ['A', 'B']
+    assert links.format() == '[1] A: https://example.com/a\n[2] B: https://example.com/b'
+
+
+def test_link_table_resolve():
+    links = markdown_utils.LinkTable()
+    links.add('https://example.com/a.pdf', 'A')
+    links.add('https://example.com/b.pdf', 'B')
+    assert links.resolve('2') == 'https://example.com/b.pdf'
+    assert links.resolve(' [1] ') == 'https://example.com/a.pdf'
+    assert links.resolve('3') == '3'
+    assert links.resolve('0') == '0'
+    assert links.resolve('https://example.com/c.pdf') == 'https://example.com/c.pdf'
+    assert links.resolve(None) is None
@@ -0,0 +1,57 @@
+import pytest
+
+import normalizer
+
+
+@pytest.mark.parametrize(
+    'value, expected',
+    [
+        ('1,234,567', 1234567),
+        ('1.234.567', 1234567),
+        ('1 234 567', 1234567),
+        ("1'234", 1234),
+        ('1,234', 1234),
+        ('1.234', 1234),
+        ('€ 1.234,56', 1235),
+        ('12.5 million', 12500000),
+        ('3,4 Mrd', 3400000000),
+        ('1.2k', 1200),
+        (1234.4, 1234),
+        (None, None),
+        ('n/a', None),
+    ],
+)
+def test_parse_number(value, expected):
+    assert normalizer.parse_number(value) == expected
+
+
+@pytest.mark.parametrize(
+    'value, expected',
+    [
+        ('3.456 million', 3456000),
+        ('1.234 bn', 1234000000),
+        ('EUR 1,234 million', 1234000000),
+        ('1,234.5 million', 1234500000),
+    ],
+)
+def test_parse_number_fraction_before_multiplier(value, expected):
+    assert normalizer.parse_number(value) == expected
+
+
+@pytest.mark.parametrize(
+    'value, expected',
+    [
+        ('TEUR 1,234', 1234000),
+        ('EUR m 1,234', 1234000000),
+        ('EUR m 12.5', 12500000),
+        ('mn 7', 7000000),
+        ('in thousands of EUR 1,234', 1234000),
+        ('-1,234 TEUR', -1234000),
+    ],
+)
+def test_parse_number_prefix_units(value, expected):
+    assert normalizer.parse_number(value) == expected
+
+
+def test_parse_number_ignores_single_letter_prefix():
+    assert normalizer.parse_number('Class B 1,234') == 1234
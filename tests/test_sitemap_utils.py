@@ -0,0 +1,140 @@
+import gzip
+import asyncio
+
+import httpx
+
+import link_ranker
+import sitemap_utils
+
+NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def urlset(*locs: str) -> bytes:
+    entries = ''.join(f'<url><loc>{loc}</loc></url>' for loc in locs)
+    return f'<?xml version="1.0"?><urlset xmlns="{NS}">{entries}</urlset>'.encode()
+
+
+def sitemapindex(*locs: str) -> bytes:
+    entries = ''.join(f'<sitemap><loc>{loc}</loc></sitemap>' for loc in locs)
+    return f'<?xml version="1.0"?><sitemapindex xmlns="{NS}">{entries}</sitemapindex>'.encode()
+
+
+def discover(routes: dict[str, bytes], start_urls: list[str], **kwargs):
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        if str(request.url) in routes:
+            return httpx.Response(200, content=routes[str(request.url)])
+        return httpx.Response(404)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            ranker = link_ranker.LinkRanker(current_year=2025)
+            discovery = sitemap_utils.SitemapDiscovery(client, ranker, **kwargs)
+            return await discovery.discover(start_urls)
+
+    return asyncio.run(run()), requested
+
+
+def test_discover_ranks_pdfs_of_default_sitemap():
+    routes = {
+        'https://example.com/sitemap.xml': urlset(
+            'https://example.com/',
+            'https://example.com/ir/interim-report-2024.pdf',
+            'https://example.com/ir/annual-report-2024.pdf',
+        ),
+    }
+    found, _ = discover(routes, ['https://example.com/investors'])
+    assert [f.url for f in found] == [
+        'https://example.com/ir/annual-report-2024.pdf',
+        'https://example.com/ir/interim-report-2024.pdf',
+    ]
+
+
+def test_discover_follows_robots_and_nested_gzip_sitemaps():
+    routes = {
+        'https://example.com/robots.txt': b'User-agent: *\nSitemap: /sitemap-index.xml\n',
+        'https://example.com/sitemap-index.xml': sitemapindex(
+            'https://example.com/pages.xml.gz',
+        ),
+        'https://example.com/pages.xml.gz': gzip.compress(
+            urlset('https://example.com/annual-report-2024.pdf')
+        ),
+    }
+    found, requested = discover(routes, ['https://example.com/'])
+    assert [f.url for f in found] == ['https://example.com/annual-report-2024.pdf']
+    assert 'https://example.com/sitemap.xml' not in requested
+
+
+def test_discover_truncates_large_sitemaps():
+    locs = [f'https://example.com/doc-{i}.pdf' for i in range(1000)]
+    routes = {'https://example.com/sitemap.xml': urlset(*locs)}
+    found, _ = discover(routes, ['https://example.com/'], max_bytes=2048)
+    assert found
+    assert all(int(f.url.rsplit('-', 1)[1].removesuffix('.pdf')) < 100 for f in found)
+
+
+def test_discover_limits_sitemaps():
+    routes = {
+        'https://example.com/robots.txt': b'Sitemap: https://example.com/sitemap.xml\n',
+        'https://example.com/sitemap.xml': sitemapindex(
+            'https://example.com/a.xml', 'https://example.com/b.xml'
+        ),
+        'https://example.com/a.xml': urlset('https://example.com/annual-report-2024.pdf'),
+        'https://example.com/b.xml': urlset('https://example.com/annual-report-2023.pdf'),
+    }
+    found, requested = discover(routes, ['https://example.com/'], max_sitemaps=2)
+    assert [f.url for f in found] == ['https://example.com/annual-report-2024.pdf']
+    assert 'https://example.com/b.xml' not in requested
+
+
+def test_discover_without_sitemap():
+    found, _ = discover({}, ['https://example.com/'])
+    assert found == []
+
+
+def test_discover_ignores_other_domains():
+    routes = {
+        'https://www.example.com/sitemap.xml': sitemapindex(
+            'https://www.example.com/ir.xml', 'https://spam.test/sitemap.xml'
+        ),
+        'https://www.example.com/ir.xml': urlset(
+            'https://ir.example.com/annual-report-2024.pdf',
+            'https://other.test/annual-report-2024.pdf',
+        ),
+        'https://spam.test/sitemap.xml': urlset('https://spam.test/annual-report-2024.pdf'),
+    }
+    found, requested = discover(routes, ['https://www.example.com/'])
+    assert [f.url for f in found] == ['https://ir.example.com/annual-report-2024.pdf']
+    assert 'https://spam.test/sitemap.xml' not in requested
+
+
+def test_discover_limits_total_bytes():
+    routes = {
+        'https://example.com/robots.txt': b'Sitemap: https://example.com/sitemap.xml\n',
+        'https://example.com/sitemap.xml': sitemapindex(
+            'https://example.com/a.xml', 'https://example.com/b.xml'
+        ),
+        'https://example.com/a.xml': urlset(
+            *[f'https://example.com/doc-{i}.pdf' for i in range(100)]
+        ),
+        'https://example.com/b.xml': urlset('https://example.com/annual-report-2024.pdf'),
+    }
+    found, requested = discover(routes, ['https://example.com/'], max_total_bytes=2048)
+    assert 'https://example.com/b.xml' not in requested
+    assert 'https://example.com/annual-report-2024.pdf' not in [f.url for f in found]
+
+
+def test_site_domain():
+    assert sitemap_utils.site_domain('https://ir.example.co.uk/x') == 'example.co.uk'
+    assert sitemap_utils.site_domain('https://www.example.com') == 'example.com'
+    assert sitemap_utils.site_domain('http://10.0.0.1/a') == '10.0.0.1'
+
+
+def test_default_ranker_uses_url_only_thresholds():
+    ranker = sitemap_utils.SitemapDiscovery(httpx.AsyncClient()).ranker
+    report = ranker.score(f'https://example.com/annual-report-{ranker.current_year - 1}.pdf', '')
+    other = ranker.score('https://example.com/brochure.pdf', '')
+    assert ranker.is_accepted([report, other])
+    assert ranker.candidates([other]) == []
@@ -1,5 +1,7 @@
 import json
+import logging
 import pandas as pd
+import valkey.asyncio
 
 from models import (
     AnnualReportLink,
@@ -13,9 +15,89 @@ import valkey_utils
 
 from typing import Literal
 
+from utils import batched
+
 from google.genai import types
 from genai_utils import GenaiClient
 
+# Number of records requested in a single pipeline/MGET by the get_many methods.
+GET_MANY_BATCH_SIZE = 500
+
+# Set by build_indexes, once present the index sets are trusted to be complete.
+_INDEX_BUILT_KEY = 'index:built'
+
+
+def _scan_suffixes(client: valkey_utils.ValkeyClient, prefix: str) -> list[str]:
+    """Lists the part after `prefix` of every key starting with `prefix`.
+
+    Uses SCAN instead of KEYS, so the server is never blocked for the whole keyspace.
+
+    Args:
+        client: The ValkeyClient to use.
+        prefix: The key prefix to match (glob characters are not escaped).
+
+    Returns:
+        list[str]: The key suffixes (e.g. company names).
+    """
+    return [k.removeprefix(prefix) for k in client.client.scan_iter(match=f'{prefix}*', count=1000)]
+
+
+def _read_index(client: valkey_utils.ValkeyClient, index_key: str, prefix: str) -> list[str]:
+    """Reads the members of an index set, falling back to SCAN for databases without indexes.
+
+    Databases populated before the indexes existed are only trusted after `build_indexes`
+    has been run on them, until then every read scans the keyspace. Empty databases are
+    marked as indexed by `mark_indexes_built_if_empty` on startup.
+
+    Args:
+        client: The ValkeyClient to use.
+        index_key: The key of the index set.
+        prefix: The key prefix of the indexed records, used by the SCAN fallback.
+
+    Returns:
+        list[str]: The indexed members (e.g. company names).
+    """
+    p = client.client.pipeline()
+    p.exists(_INDEX_BUILT_KEY)
+    p.smembers(index_key)
+    built, members = p.execute()
+    if built:
+        return list(members)
+    logging.debug(f'Indexes were never built, falling back to SCAN for {index_key}')
+    return _scan_suffixes(client, prefix)
+
+
+def _rebuild_index(client: valkey_utils.ValkeyClient, index_key: str, prefix: str) -> int:
+    """Rebuilds an index set from the existing records using SCAN.
+
+    Args:
+        client: The ValkeyClient to use.
+        index_key: The key of the index set.
+        prefix: The key prefix of the indexed records.
+
+    Returns:
+        int: The number of indexed members.
+    """
+    members = _scan_suffixes(client, prefix)
+    p = client.client.pipeline()
+    p.delete(index_key)
+    if members:
+        p.sadd(index_key, *members)
+    p.execute()
+    return len(members)
+
+
+# the per group conversations of the fan-out extraction are named info_extract_{group}
+ConversationAction = Literal[
+    'site_find',
+    'report_find',
+    'info_extract',
+    'info_extract_financials',
+    'info_extract_headcount',
+    'info_extract_country_activity',
+    'nace_classify',
+]
+
 
 class ConversationStore:
     """
@@ -26,18 +108,21 @@ class ConversationStore:
     def __init__(
         self,
         client: valkey_utils.ValkeyClient,
+        async_client: valkey_utils.AsyncValkeyClient | None = None,
     ) -> None:
         """Initializes the ConversationStore with a Valkey client instance.
 
         Args:
             client: An initialized ValkeyClient instance for database interaction.
+            async_client: An optional AsyncValkeyClient, required by the awaitable methods.
         """
         self.client = client
+        self.async_client = async_client
 
     def store(
         self,
         company_name: str,
-        action: Literal['site_find', 'report_find', 'info_extract', 'nace_classify'],
+        action: ConversationAction,
         conversation_contents: list[types.Content],
     ) -> None:
         """Adds or updates a conversation history in the Valkey store.
@@ -53,10 +138,32 @@ class ConversationStore:
                                    compatible dictionaries representing the conversation messages.
         """
         k = ConversationStore.__create_key(company_name, action)
-        simple_contents = GenaiClient.get_simple_contents(conversation_contents)
+        self.client.client.hset(k, mapping=ConversationStore.__to_mapping(conversation_contents))
 
-        mapping = {f'message:{i}': json.dumps(c) for i, c in enumerate(simple_contents)}
-        self.client.client.hset(k, mapping=mapping)
+    async def astore(
+        self,
+        company_name: str,
+        action: ConversationAction,
+        conversation_contents: list[types.Content],
+    ) -> None:
+        """Awaitable version of `store`, does not block the event loop."""
+        k = ConversationStore.__create_key(company_name, action)
+        await _require_async(self.async_client).hset(
+            k, mapping=ConversationStore.__to_mapping(conversation_contents)
+        )
+
+    @staticmethod
+    def __to_mapping(conversation_contents: list[types.Content]) -> dict[str, str]:
+        """Serializes the conversation messages into the fields of the conversation hash.
+
+        Args:
+            conversation_contents: The conversation messages.
+
+        Returns:
+            dict[str, str]: The hash fields, one JSON serialized message per field.
+        """
+        simple_contents = GenaiClient.get_simple_contents(conversation_contents)
+        return {f'message:{i}': json.dumps(c) for i, c in enumerate(simple_contents)}
 
     @staticmethod
     def __create_key(company_name: str, action: str) -> str:
@@ -79,16 +186,21 @@ class CompanySiteStore:
     in Valkey.
     """
 
+    __INDEX_KEY = 'index:site_discovery'
+
     def __init__(
         self,
         client: valkey_utils.ValkeyClient,
+        async_client: valkey_utils.AsyncValkeyClient | None = None,
     ) -> None:
         """Initializes the CompanySiteStore with a Valkey client instance.
 
         Args:
             client: An initialized ValkeyClient instance for database interaction.
+            async_client: An optional AsyncValkeyClient, required by the awaitable methods.
         """
         self.client = client
+        self.async_client = async_client
 
     def store(
         self,
@@ -109,16 +221,53 @@ class CompanySiteStore:
             return
         k = CompanySiteStore.__create_key(company_name)
 
-        self.client.client.hset(k, mapping=site_discovery_result.model_dump(exclude_none=True))
+        p = self.client.client.pipeline()
+        p.hset(k, mapping=site_discovery_result.model_dump(exclude_none=True))
+        p.sadd(CompanySiteStore.__INDEX_KEY, company_name)
+        p.execute()
+
+    async def astore(
+        self,
+        company_name: str,
+        site_discovery_result: SiteDiscoveryResponse,
+    ) -> None:
+        """Awaitable version of `store`, does not block the event loop."""
+        if all([v is None for v in site_discovery_result.model_dump().values()]):
+            return
+        k = CompanySiteStore.__create_key(company_name)
+
+        p = _require_async(self.async_client).pipeline()
+        p.hset(k, mapping=site_discovery_result.model_dump(exclude_none=True))
+        p.sadd(CompanySiteStore.__INDEX_KEY, company_name)
+        await p.execute()
 
     def get_companies(self) -> list[str]:
         """Retrieves a list of all company names for which site discovery data is stored.
 
+        Reads the company index, or scans the keyspace if the index was never built.
+
         Returns:
             list[str]: A list of company names.
         """
-        keys = self.client.client.keys('site_discovery:*')
-        return [k.split(':')[-1] for k in keys]
+        return _read_index(
+            self.client, CompanySiteStore.__INDEX_KEY, CompanySiteStore.__create_key('')
+        )
+
+    async def aget_companies(self) -> list[str]:
+        """Awaitable version of `get_companies`, does not block the event loop."""
+        return await _aread_index(
+            self.async_client, CompanySiteStore.__INDEX_KEY, CompanySiteStore.__create_key('')
+        )
+
+    def rebuild_index(self) -> int:
+        """Rebuilds the company index from the stored site discovery records.
+
+        Returns:
+            int: The number of indexed companies.
+        """
+        return _rebuild_index(
+            self.client, CompanySiteStore.__INDEX_KEY, CompanySiteStore.__create_key('')
+        )
 
     def get(self, company: str) -> SiteDiscoveryResponse | None:
         """Retrieves the stored site discovery information for a specific company.
@@ -131,6 +280,59 @@ class CompanySiteStore:
                                           object, or None if not found or if the record is empty.
         """
         res = self.client.client.hgetall(CompanySiteStore.__create_key(company))
+        return CompanySiteStore.__from_hash(res)
+
+    async def aget(self, company: str) -> SiteDiscoveryResponse | None:
+        """Awaitable version of `get`, does not block the event loop."""
+        res = await _require_async(self.async_client).hgetall(
+            CompanySiteStore.__create_key(company)
+        )
+        return CompanySiteStore.__from_hash(res)
+
+    def get_many(
+        self,
+        companies: list[str],
+        batch_size: int = GET_MANY_BATCH_SIZE,
+    ) -> list[SiteDiscoveryResponse | None]:
+        """Retrieves the stored site discovery information for many companies at once.
+
+        Uses one pipelined round trip per `batch_size` companies instead of one per company.
+
+        Args:
+            companies: The names of the companies.
+            batch_size: Number of companies fetched in a single round trip.
+
+        Returns:
+            list[SiteDiscoveryResponse | None]: The site information of each company,
+                                                in the order of `companies`.
+        """
+        keys = [CompanySiteStore.__create_key(c) for c in companies]
+        return [
+            CompanySiteStore.__from_hash(r) for r in _hgetall_many(self.client, keys, batch_size)
+        ]
+
+    async def aget_many(
+        self,
+        companies: list[str],
+        batch_size: int = GET_MANY_BATCH_SIZE,
+    ) -> list[SiteDiscoveryResponse | None]:
+        """Awaitable version of `get_many`, does not block the event loop."""
+        keys = [CompanySiteStore.__create_key(c) for c in companies]
+        return [
+            CompanySiteStore.__from_hash(r)
+            for r in await _ahgetall_many(self.async_client, keys, batch_size)
+        ]
+
+    @staticmethod
+    def __from_hash(res: dict[str, str] | None) -> SiteDiscoveryResponse | None:
+        """Hydrates a stored site discovery hash.
+
+        Args:
+            res: The hash as returned by HGETALL.
+
+        Returns:
+            SiteDiscoveryResponse | None: The site information, or None if `res` is None.
+        """
         if res is None:
             return
         return SiteDiscoveryResponse(
@@ -156,18 +358,26 @@ class ModelActionStore:
     Stores and manages sequences of actions taken by an AI model during tasks
     like web crawling (e.g., finding financial reports). It tracks the actions,
     the URL navigation queue, and whether a task is considered "done".
+
+    The latest action per URL is kept in a hash, every action is also appended to a
+    per company list of steps, so revisited pages do not lose their earlier actions.
     """
 
+    __INDEX_PREFIX = 'index:model_action:'
+
     def __init__(
         self,
         valkey_client: valkey_utils.ValkeyClient,
+        async_client: valkey_utils.AsyncValkeyClient | None = None,
     ) -> None:
         """Initializes the ModelActionStore.
 
         Args:
             valkey_client: An initialized ValkeyClient instance.
+            async_client: An optional AsyncValkeyClient, required by the awaitable methods.
         """
         self.valkey_client = valkey_client
+        self.async_client = async_client
 
     def store(
         self,
@@ -178,7 +388,8 @@ class ModelActionStore:
     ) -> None:
         """Stores a model's action related to a specific company and URL.
 
-        - The `model_action` itself is stored in a hash keyed by company and URL.
+        - The `model_action` itself is stored in a hash keyed by company and URL, and
+          appended to the list of steps of the company.
         - If the action is 'visit', the target URL is added to a sorted set (`urlqueue`)
           representing the navigation history/path, scored by timestamp.
         - If the action is 'back', the most recent URL is removed from the `urlqueue`.
@@ -193,10 +404,17 @@ class ModelActionStore:
                        current crawling task. Defaults to False.
         """
         k = ModelActionStore.__create_key(company_name, url)
-        self.valkey_client.client.hset(
+        p = self.valkey_client.client.pipeline()
+        p.hset(
             k,
             mapping=model_action.model_dump(exclude_none=True),
         )
+        p.sadd(ModelActionStore.__create_index_key(company_name), url)
+        p.rpush(
+            ModelActionStore.__create_steps_key(company_name),
+            model_action.model_dump_json(exclude_none=True),
+        )
+        p.execute()
 
         urlq_k = ModelActionStore.__create_urlqueue_key(company_name)
         if model_action.action == 'visit':
@@ -211,6 +429,41 @@ class ModelActionStore:
         ck = ModelActionStore.__create_done_key(company_name)
         self.valkey_client.client.set(ck, k)
 
+    async def astore(
+        self,
+        company_name: str,
+        url: str,
+        model_action: ModelActionResponseWithMetadata,
+        mark_done: bool = False,
+    ) -> None:
+        """Awaitable version of `store`, does not block the event loop."""
+        client = _require_async(self.async_client)
+        k = ModelActionStore.__create_key(company_name, url)
+        p = client.pipeline()
+        p.hset(
+            k,
+            mapping=model_action.model_dump(exclude_none=True),
+        )
+        p.sadd(ModelActionStore.__create_index_key(company_name), url)
+        p.rpush(
+            ModelActionStore.__create_steps_key(company_name),
+            model_action.model_dump_json(exclude_none=True),
+        )
+        await p.execute()
+
+        urlq_k = ModelActionStore.__create_urlqueue_key(company_name)
+        if model_action.action == 'visit':
+            await client.zadd(urlq_k, mapping={url: model_action.action_ts_ms})
+        elif model_action.action == 'back':
+            current_url = await self.aget_current_url(company_name)
+            if current_url is not None:
+                await client.zrem(urlq_k, current_url)
+
+        if not mark_done:
+            return
+        ck = ModelActionStore.__create_done_key(company_name)
+        await client.set(ck, k)
+
     def get(self, company: str, url: str) -> ModelActionResponseWithMetadata | None:
         """Retrieves a specific model action for a company, URL, and timestamp.
 
@@ -224,8 +477,16 @@ class ModelActionStore:
         """
         k = ModelActionStore.__create_key(company, url)
         res = self.valkey_client.client.hgetall(k)
-        if res is None:
-            return res
+        if not res:
+            return None
+        return ModelActionResponseWithMetadata.model_validate(res)
+
+    async def aget(self, company: str, url: str) -> ModelActionResponseWithMetadata | None:
+        """Awaitable version of `get`, does not block the event loop."""
+        k = ModelActionStore.__create_key(company, url)
+        res = await _require_async(self.async_client).hgetall(k)
+        if not res:
+            return None
         return ModelActionResponseWithMetadata.model_validate(res)
 
     def get_all_actions(self, company: str) -> list[ModelActionResponseWithMetadata]:
@@ -238,25 +499,59 @@ class ModelActionStore:
             list[ModelActionResponseWithMetadata]: A list of all actions for the company,
                                                   chronologically sorted.
         """
-        ks = self.valkey_client.client.keys(ModelActionStore.__create_key(company, '*'))
+        ks = self.__get_action_keys(company)
         p = self.valkey_client.client.pipeline()
         for k in ks:
             p.hgetall(k)
         res = p.execute()
-        return [ModelActionResponseWithMetadata.model_validate(r) for r in res if r is not None]
+        actions = [ModelActionResponseWithMetadata.model_validate(r) for r in res if r]
+        return sorted(actions, key=lambda a: a.action_ts_ms)
+
+    async def aget_all_actions(self, company: str) -> list[ModelActionResponseWithMetadata]:
+        """Awaitable version of `get_all_actions`, does not block the event loop."""
+        ks = await self.__aget_action_keys(company)
+        p = _require_async(self.async_client).pipeline()
+        for k in ks:
+            p.hgetall(k)
+        res = await p.execute()
+        actions = [ModelActionResponseWithMetadata.model_validate(r) for r in res if r]
+        return sorted(actions, key=lambda a: a.action_ts_ms)
+
+    def get_steps(self, company: str) -> list[ModelActionResponseWithMetadata]:
+        """Retrieves every action of a company in the order they were stored.
+
+        Unlike `get_all_actions`, actions taken on a page visited more than once are all
+        kept, so the steps can be replayed to rebuild an interrupted crawl.
+
+        Args:
+            company: The name of the company.
+
+        Returns:
+            list[ModelActionResponseWithMetadata]: The actions in the order they were taken.
+        """
+        k = ModelActionStore.__create_steps_key(company)
+        res = self.valkey_client.client.lrange(k, 0, -1)
+        return [ModelActionResponseWithMetadata.model_validate_json(r) for r in res]
+
+    async def aget_steps(self, company: str) -> list[ModelActionResponseWithMetadata]:
+        """Awaitable version of `get_steps`, does not block the event loop."""
+        res = await _require_async(self.async_client).lrange(
+            ModelActionStore.__create_steps_key(company), 0, -1
+        )
+        return [ModelActionResponseWithMetadata.model_validate_json(r) for r in res]
 
     def del_all(
         self,
         company: str,
     ) -> None:
-        """Deletes all model actions, URL queue, and 'done' marker for a specific company.
+        """Deletes all model actions, steps, URL queue, and 'done' marker for a specific company.
 
         Useful for resetting the crawling state for a company before a new attempt.
 
         Args:
             company: The name of the company.
         """
-        ks = self.valkey_client.client.keys(ModelActionStore.__create_key(company, '*'))
+        ks = self.__get_action_keys(company)
         urlk = ModelActionStore.__create_urlqueue_key(company)
         donek = ModelActionStore.__create_done_key(company)
         p = self.valkey_client.client.pipeline()
@@ -264,7 +559,92 @@ class ModelActionStore:
             p.delete(k)
         p.zremrangebyrank(urlk, 0, -1)
         p.delete(donek)
+        p.delete(ModelActionStore.__create_index_key(company))
+        p.delete(ModelActionStore.__create_steps_key(company))
+        p.execute()
+
+    async def adel_all(
+        self,
+        company: str,
+    ) -> None:
+        """Awaitable version of `del_all`, does not block the event loop."""
+        ks = await self.__aget_action_keys(company)
+        urlk = ModelActionStore.__create_urlqueue_key(company)
+        donek = ModelActionStore.__create_done_key(company)
+        p = _require_async(self.async_client).pipeline()
+        for k in ks:
+            p.delete(k)
+        p.zremrangebyrank(urlk, 0, -1)
+        p.delete(donek)
+        p.delete(ModelActionStore.__create_index_key(company))
+        p.delete(ModelActionStore.__create_steps_key(company))
+        await p.execute()
+
+    def __get_action_keys(self, company: str) -> list[str]:
+        """Lists the keys of all stored actions of a company.
+
+        Reads the per company action index, or scans the keyspace if it was never built.
+
+        Args:
+            company: The name of the company.
+
+        Returns:
+            list[str]: The Valkey keys of the action hashes.
+        """
+        prefix = ModelActionStore.__create_key(company, '')
+        return [
+            prefix + url
+            for url in _read_index(
+                self.valkey_client,
+                ModelActionStore.__create_index_key(company),
+                prefix,
+            )
+        ]
+
+    async def __aget_action_keys(self, company: str) -> list[str]:
+        """Awaitable version of `__get_action_keys`."""
+        prefix = ModelActionStore.__create_key(company, '')
+        return [
+            prefix + url
+            for url in await _aread_index(
+                self.async_client,
+                ModelActionStore.__create_index_key(company),
+                prefix,
+            )
+        ]
+
+    def rebuild_index(self) -> int:
+        """Rebuilds the per company action indexes from the stored action hashes.
+
+        The company of an action key is recovered by stripping the URL stored in the
+        action itself, since both company names and URLs may contain colons.
+
+        Returns:
+            int: The number of indexed actions.
+        """
+        prefix = ModelActionStore.__create_key('', '').removesuffix(':')
+        keys = list(self.valkey_client.client.scan_iter(match=f'{prefix}*', count=1000))
+        p = self.valkey_client.client.pipeline()
+        for k in keys:
+            p.hget(k, 'taken_at_url')
+        urls = p.execute()
+
+        by_company: dict[str, list[str]] = {}
+        for k, url in zip(keys, urls):
+            if url is None:
+                continue
+            company = k.removeprefix(prefix).removesuffix(f':{url}')
+            by_company.setdefault(company, []).append(url)
+
+        p = self.valkey_client.client.pipeline()
+        for k in self.valkey_client.client.scan_iter(
+            match=f'{ModelActionStore.__INDEX_PREFIX}*', count=1000
+        ):
+            p.delete(k)
+        for company, company_urls in by_company.items():
+            p.sadd(ModelActionStore.__create_index_key(company), *company_urls)
         p.execute()
+        return sum(len(u) for u in by_company.values())
 
     def get_current_url(self, company: str) -> str | None:
         """Retrieves the most recent URL from the navigation stack (URL queue) for a company.
@@ -284,6 +664,14 @@ class ModelActionStore:
             return None
         return r[0]
 
+    async def aget_current_url(self, company: str) -> str | None:
+        """Awaitable version of `get_current_url`, does not block the event loop."""
+        urlq_k = ModelActionStore.__create_urlqueue_key(company)
+        r = await _require_async(self.async_client).zrevrange(urlq_k, 0, 0, False)
+        if not r:
+            return None
+        return r[0]
+
     def get_full_url_queue(self, company: str) -> None | list[str]:
         """Retrieves the entire navigation stack (URL queue) for a company, ordered by visit time.
 
@@ -300,6 +688,14 @@ class ModelActionStore:
             return None
         return r
 
+    async def aget_full_url_queue(self, company: str) -> None | list[str]:
+        """Awaitable version of `get_full_url_queue`, does not block the event loop."""
+        urlq_k = ModelActionStore.__create_urlqueue_key(company)
+        r = await _require_async(self.async_client).zrange(urlq_k, 0, -1, False)
+        if r is None:
+            return None
+        return r
+
     def get_done_action(self, company: str) -> ModelActionResponseWithMetadata | None:
         """Retrieves the action that was marked as 'done' or 'abort' for a company.
 
@@ -318,6 +714,15 @@ class ModelActionStore:
         res = self.valkey_client.client.hgetall(done_action_key)
         return ModelActionResponseWithMetadata.model_validate(res)
 
+    async def aget_done_action(self, company: str) -> ModelActionResponseWithMetadata | None:
+        """Awaitable version of `get_done_action`, does not block the event loop."""
+        client = _require_async(self.async_client)
+        done_action_key = await client.get(ModelActionStore.__create_done_key(company))
+        if not done_action_key:
+            return
+        res = await client.hgetall(done_action_key)
+        return ModelActionResponseWithMetadata.model_validate(res)
+
     @staticmethod
     def __create_key(company: str, url: str) -> str:
         """Creates a Valkey key for a specific model action.
@@ -341,6 +746,26 @@ class ModelActionStore:
         """
         return f'urlqueue:{company}'
 
+    @staticmethod
+    def __create_index_key(company: str) -> str:
+        """Creates the Valkey key of the set indexing the URLs with stored actions for a company.
+        Args:
+            company: Company name.
+        Returns:
+            str: Formatted Valkey key.
+        """
+        return f'{ModelActionStore.__INDEX_PREFIX}{company}'
+
+    @staticmethod
+    def __create_steps_key(company: str) -> str:
+        """Creates the Valkey key of the list of every action of a company, in order.
+        Args:
+            company: Company name.
+        Returns:
+            str: Formatted Valkey key.
+        """
+        return f'model_action_steps:{company}'
+
     @staticmethod
     def __create_done_key(company: str) -> str:
         """Creates the Valkey key for the 'done crawling' marker for a company.
@@ -359,16 +784,21 @@ class AnnualReportLinkStore:
     and GCS links once downloaded/uploaded.
     """
 
+    __INDEX_KEY = 'index:annual_report_link'
+
     def __init__(
         self,
         client: valkey_utils.ValkeyClient,
+        async_client: valkey_utils.AsyncValkeyClient | None = None,
     ) -> None:
         """Initializes the AnnualReportLinkStore.
 
         Args:
             client: An initialized ValkeyClient instance.
+            async_client: An optional AsyncValkeyClient, required by the awaitable methods.
         """
         self.client = client
+        self.async_client = async_client
 
     def store(
         self,
@@ -385,7 +815,22 @@ class AnnualReportLinkStore:
                                 object containing link, refyear, and optionally paths.
         """
         k = AnnualReportLinkStore.__create_key(company_name)
-        self.client.client.hset(k, mapping=annual_report_link.model_dump(exclude_none=True))
+        p = self.client.client.pipeline()
+        p.hset(k, mapping=annual_report_link.model_dump(exclude_none=True))
+        p.sadd(AnnualReportLinkStore.__INDEX_KEY, company_name)
+        p.execute()
+
+    async def astore(
+        self,
+        company_name: str,
+        annual_report_link: AnnualReportLink,
+    ) -> None:
+        """Awaitable version of `store`, does not block the event loop."""
+        k = AnnualReportLinkStore.__create_key(company_name)
+        p = _require_async(self.async_client).pipeline()
+        p.hset(k, mapping=annual_report_link.model_dump(exclude_none=True))
+        p.sadd(AnnualReportLinkStore.__INDEX_KEY, company_name)
+        await p.execute()
 
     def add_gcs_link(
         self,
@@ -407,6 +852,18 @@ class AnnualReportLinkStore:
             raise ValueError('Report entry does not exist in the db or is invalid')
         self.client.client.hset(k, 'gcs_link', gcs_link)
 
+    async def aadd_gcs_link(
+        self,
+        company_name: str,
+        gcs_link: str,
+    ) -> None:
+        """Awaitable version of `add_gcs_link`, does not block the event loop."""
+        k = AnnualReportLinkStore.__create_key(company_name)
+        rep = await self.aget(company_name)
+        if rep is None or rep.link is None:
+            raise ValueError('Report entry does not exist in the db or is invalid')
+        await _require_async(self.async_client).hset(k, 'gcs_link', gcs_link)
+
     def add_local_path(
         self,
         company_name: str,
@@ -427,6 +884,18 @@ class AnnualReportLinkStore:
         k = AnnualReportLinkStore.__create_key(company_name)
         self.client.client.hset(k, 'local_path', local_path)
 
+    async def aadd_local_path(
+        self,
+        company_name: str,
+        local_path: str,
+    ) -> None:
+        """Awaitable version of `add_local_path`, does not block the event loop."""
+        rep = await self.aget(company_name)
+        if rep is None or rep.link is None:
+            raise ValueError('Report entry does not exist in the db or is invalid')
+        k = AnnualReportLinkStore.__create_key(company_name)
+        await _require_async(self.async_client).hset(k, 'local_path', local_path)
+
     def get(self, company_name: str) -> AnnualReportLink | AnnualReportLinkWithPaths | None:
         """Retrieves annual report link information for a company.
 
@@ -442,6 +911,62 @@ class AnnualReportLinkStore:
         """
         k = AnnualReportLinkStore.__create_key(company_name)
         report = self.client.client.hgetall(k)
+        return AnnualReportLinkStore.__from_hash(report)
+
+    async def aget(self, company_name: str) -> AnnualReportLink | AnnualReportLinkWithPaths | None:
+        """Awaitable version of `get`, does not block the event loop."""
+        k = AnnualReportLinkStore.__create_key(company_name)
+        report = await _require_async(self.async_client).hgetall(k)
+        return AnnualReportLinkStore.__from_hash(report)
+
+    def get_many(
+        self,
+        companies: list[str],
+        batch_size: int = GET_MANY_BATCH_SIZE,
+    ) -> list[AnnualReportLink | AnnualReportLinkWithPaths | None]:
+        """Retrieves annual report link information for many companies at once.
+
+        Uses one pipelined round trip per `batch_size` companies instead of one per company.
+
+        Args:
+            companies: The names of the companies.
+            batch_size: Number of companies fetched in a single round trip.
+
+        Returns:
+            list[AnnualReportLink | AnnualReportLinkWithPaths | None]: The report link
+                information of each company, in the order of `companies`.
+        """
+        keys = [AnnualReportLinkStore.__create_key(c) for c in companies]
+        return [
+            AnnualReportLinkStore.__from_hash(r)
+            for r in _hgetall_many(self.client, keys, batch_size)
+        ]
+
+    async def aget_many(
+        self,
+        companies: list[str],
+        batch_size: int = GET_MANY_BATCH_SIZE,
+    ) -> list[AnnualReportLink | AnnualReportLinkWithPaths | None]:
+        """Awaitable version of `get_many`, does not block the event loop."""
+        keys = [AnnualReportLinkStore.__create_key(c) for c in companies]
+        return [
+            AnnualReportLinkStore.__from_hash(r)
+            for r in await _ahgetall_many(self.async_client, keys, batch_size)
+        ]
+
+    @staticmethod
+    def __from_hash(
+        report: dict[str, str] | None,
+    ) -> AnnualReportLink | AnnualReportLinkWithPaths | None:
+        """Hydrates a stored annual report link hash.
+
+        Args:
+            report: The hash as returned by HGETALL.
+
+        Returns:
+            AnnualReportLink | AnnualReportLinkWithPaths | None: The report link information,
+                                                                  or None if `report` is None.
+        """
         if report is None:
             return
         if report.get('gcs_link') is not None or report.get('local_path') is not None:
@@ -459,14 +984,32 @@ class AnnualReportLinkStore:
     def get_companies(self) -> list[str]:
         """Retrieves a list of all company names for which annual report links are stored.
 
+        Reads the company index, or scans the keyspace if the index was never built.
+
         Returns:
             list[str]: A list of company names.
         """
-        prefix = AnnualReportLinkStore.__create_key('')
-        return [
-            k.removeprefix(prefix)
-            for k in self.client.client.keys(AnnualReportLinkStore.__create_key('*'))
-        ]
+        return _read_index(
+            self.client, AnnualReportLinkStore.__INDEX_KEY, AnnualReportLinkStore.__create_key('')
+        )
+
+    async def aget_companies(self) -> list[str]:
+        """Awaitable version of `get_companies`, does not block the event loop."""
+        return await _aread_index(
+            self.async_client,
+            AnnualReportLinkStore.__INDEX_KEY,
+            AnnualReportLinkStore.__create_key(''),
+        )
+
+    def rebuild_index(self) -> int:
+        """Rebuilds the company index from the stored annual report links.
+
+        Returns:
+            int: The number of indexed companies.
+        """
+        return _rebuild_index(
+            self.client, AnnualReportLinkStore.__INDEX_KEY, AnnualReportLinkStore.__create_key('')
+        )
 
     def fill_solution_csv(self, path_to_csv: str, separator: str = ';') -> None:
         """Populates a CSV file with found annual report links and reference years.
@@ -513,16 +1056,21 @@ class AnnualReportInfoStore:
     (e.g., employee count, assets value, main activity) in Valkey.
     """
 
+    __INDEX_KEY = 'index:annual_report_info'
+
     def __init__(
         self,
         client: valkey_utils.ValkeyClient,
+        async_client: valkey_utils.AsyncValkeyClient | None = None,
     ) -> None:
         """Initializes the AnnualReportInfoStore.
 
         Args:
             client: An initialized ValkeyClient instance.
+            async_client: An optional AsyncValkeyClient, required by the awaitable methods.
         """
         self.client = client
+        self.async_client = async_client
 
     def store(
         self,
@@ -540,7 +1088,23 @@ class AnnualReportInfoStore:
         """
         k = AnnualReportInfoStore.__create_key(company_name)
         mapping = annual_report.model_dump(exclude_none=True)
-        self.client.client.hset(k, mapping=mapping)
+        p = self.client.client.pipeline()
+        p.hset(k, mapping=mapping)
+        p.sadd(AnnualReportInfoStore.__INDEX_KEY, company_name)
+        p.execute()
+
+    async def astore(
+        self,
+        company_name: str,
+        annual_report: AnnualReportInfo,
+    ) -> None:
+        """Awaitable version of `store`, does not block the event loop."""
+        k = AnnualReportInfoStore.__create_key(company_name)
+        mapping = annual_report.model_dump(exclude_none=True)
+        p = _require_async(self.async_client).pipeline()
+        p.hset(k, mapping=mapping)
+        p.sadd(AnnualReportInfoStore.__INDEX_KEY, company_name)
+        await p.execute()
 
     def get(
         self,
@@ -557,6 +1121,62 @@ class AnnualReportInfoStore:
         """
         k = AnnualReportInfoStore.__create_key(company_name)
         info = self.client.client.hgetall(k)
+        return AnnualReportInfoStore.__from_hash(info)
+
+    async def aget(
+        self,
+        company_name: str,
+    ) -> AnnualReportInfo | None:
+        """Awaitable version of `get`, does not block the event loop."""
+        k = AnnualReportInfoStore.__create_key(company_name)
+        info = await _require_async(self.async_client).hgetall(k)
+        return AnnualReportInfoStore.__from_hash(info)
+
+    def get_many(
+        self,
+        companies: list[str],
+        batch_size: int = GET_MANY_BATCH_SIZE,
+    ) -> list[AnnualReportInfo | None]:
+        """Retrieves extracted annual report information for many companies at once.
+
+        Uses one pipelined round trip per `batch_size` companies instead of one per company.
+
+        Args:
+            companies: The names of the companies.
+            batch_size: Number of companies fetched in a single round trip.
+
+        Returns:
+            list[AnnualReportInfo | None]: The report information of each company
+                                           (None if not found), in the order of `companies`.
+        """
+        keys = [AnnualReportInfoStore.__create_key(c) for c in companies]
+        return [
+            AnnualReportInfoStore.__from_hash(r)
+            for r in _hgetall_many(self.client, keys, batch_size)
+        ]
+
+    async def aget_many(
+        self,
+        companies: list[str],
+        batch_size: int = GET_MANY_BATCH_SIZE,
+    ) -> list[AnnualReportInfo | None]:
+        """Awaitable version of `get_many`, does not block the event loop."""
+        keys = [AnnualReportInfoStore.__create_key(c) for c in companies]
+        return [
+            AnnualReportInfoStore.__from_hash(r)
+            for r in await _ahgetall_many(self.async_client, keys, batch_size)
+        ]
+
+    @staticmethod
+    def __from_hash(info: dict[str, str] | None) -> AnnualReportInfo | None:
+        """Hydrates a stored annual report information hash.
+
+        Args:
+            info: The hash as returned by HGETALL.
+
+        Returns:
+            AnnualReportInfo | None: The report information, or None if `info` is empty.
+        """
         if not info:
             return None
         return AnnualReportInfo(
@@ -573,14 +1193,32 @@ class AnnualReportInfoStore:
     def get_companies(self) -> list[str]:
         """Retrieves a list of all company names for which annual report information is stored.
 
+        Reads the company index, or scans the keyspace if the index was never built.
+
         Returns:
             list[str]: A list of company names.
         """
-        prefix = AnnualReportInfoStore.__create_key('')
-        return [
-            k.removeprefix(prefix)
-            for k in self.client.client.keys(AnnualReportInfoStore.__create_key('*'))
-        ]
+        return _read_index(
+            self.client, AnnualReportInfoStore.__INDEX_KEY, AnnualReportInfoStore.__create_key('')
+        )
+
+    async def aget_companies(self) -> list[str]:
+        """Awaitable version of `get_companies`, does not block the event loop."""
+        return await _aread_index(
+            self.async_client,
+            AnnualReportInfoStore.__INDEX_KEY,
+            AnnualReportInfoStore.__create_key(''),
+        )
+
+    def rebuild_index(self) -> int:
+        """Rebuilds the company index from the stored annual report information.
+
+        Returns:
+            int: The number of indexed companies.
+        """
+        return _rebuild_index(
+            self.client, AnnualReportInfoStore.__INDEX_KEY, AnnualReportInfoStore.__create_key('')
+        )
 
     @staticmethod
     def __create_key(company: str) -> str:
@@ -602,13 +1240,16 @@ class NaceClassificationStore:
     def __init__(
         self,
         client: valkey_utils.ValkeyClient,
+        async_client: valkey_utils.AsyncValkeyClient | None = None,
     ) -> None:
         """Initializes the NaceClassificationStore.
 
         Args:
             client: An initialized ValkeyClient instance.
+            async_client: An optional AsyncValkeyClient, required by the awaitable methods.
         """
         self.client = client
+        self.async_client = async_client
 
     def store(
         self,
@@ -626,6 +1267,15 @@ class NaceClassificationStore:
         k = NaceClassificationStore.__create_key(company_name)
         self.client.client.set(k, nace_classification)
 
+    async def astore(
+        self,
+        company_name: str,
+        nace_classification: str,
+    ) -> None:
+        """Awaitable version of `store`, does not block the event loop."""
+        k = NaceClassificationStore.__create_key(company_name)
+        await _require_async(self.async_client).set(k, nace_classification)
+
     def get(self, company_name: str) -> str | None:
         """Retrieves the NACE classification code for a company.
 
@@ -639,6 +1289,47 @@ class NaceClassificationStore:
             NaceClassificationStore.__create_key(company_name),
         )
 
+    async def aget(self, company_name: str) -> str | None:
+        """Awaitable version of `get`, does not block the event loop."""
+        return await _require_async(self.async_client).get(
+            NaceClassificationStore.__create_key(company_name),
+        )
+
+    def get_many(
+        self,
+        companies: list[str],
+        batch_size: int = GET_MANY_BATCH_SIZE,
+    ) -> list[str | None]:
+        """Retrieves the NACE classification codes of many companies at once.
+
+        Uses one MGET per `batch_size` companies instead of one GET per company.
+
+        Args:
+            companies: The names of the companies.
+            batch_size: Number of companies fetched in a single MGET.
+
+        Returns:
+            list[str | None]: The NACE code of each company (None if not found),
+                              in the order of `companies`.
+        """
+        res = []
+        for company_batch in batched(companies, batch_size):
+            keys = [NaceClassificationStore.__create_key(c) for c in company_batch]
+            res.extend(self.client.client.mget(keys))
+        return res
+
+    async def aget_many(
+        self,
+        companies: list[str],
+        batch_size: int = GET_MANY_BATCH_SIZE,
+    ) -> list[str | None]:
+        """Awaitable version of `get_many`, does not block the event loop."""
+        res = []
+        for company_batch in batched(companies, batch_size):
+            keys = [NaceClassificationStore.__create_key(c) for c in company_batch]
+            res.extend(await _require_async(self.async_client).mget(keys))
+        return res
+
     @staticmethod
     def __create_key(company: str) -> str:
         """Retrieves a list of all company names for which NACE classifications are stored.
@@ -647,3 +1338,223 @@ class NaceClassificationStore:
             list[str]: A list of company names.
         """
         return f'nace_classification:{company}'
+
+
+class UploadedFileStore:
+    """
+    Stores the handles of files uploaded to the Gemini file API in Valkey.
+
+    Handles are keyed by the local path and the content hash of the uploaded
+    file, and expire together with the uploaded file.
+    """
+
+    def __init__(
+        self,
+        client: valkey_utils.ValkeyClient,
+        async_client: valkey_utils.AsyncValkeyClient | None = None,
+    ) -> None:
+        """Initializes the UploadedFileStore.
+
+        Args:
+            client: An initialized ValkeyClient instance.
+            async_client: An optional AsyncValkeyClient, required by the awaitable methods.
+        """
+        self.client = client
+        self.async_client = async_client
+
+    def store(
+        self,
+        local_path: str,
+        content_hash: str,
+        file: types.File,
+        ttl_sec: int,
+    ) -> None:
+        """Stores the handle of an uploaded file.
+
+        Args:
+            local_path: The local path of the uploaded file.
+            content_hash: The hash of the file contents.
+            file: The handle returned by the file API.
+            ttl_sec: How long the handle can be used, should end before the file expires.
+        """
+        k = UploadedFileStore.__create_key(local_path, content_hash)
+        p = self.client.client.pipeline()
+        p.hset(k, mapping=UploadedFileStore.__to_mapping(file))
+        p.expire(k, ttl_sec)
+        p.execute()
+
+    async def astore(
+        self,
+        local_path: str,
+        content_hash: str,
+        file: types.File,
+        ttl_sec: int,
+    ) -> None:
+        """Awaitable version of `store`, does not block the event loop."""
+        k = UploadedFileStore.__create_key(local_path, content_hash)
+        p = _require_async(self.async_client).pipeline()
+        p.hset(k, mapping=UploadedFileStore.__to_mapping(file))
+        p.expire(k, ttl_sec)
+        await p.execute()
+
+    def get(self, local_path: str, content_hash: str) -> types.File | None:
+        """Retrieves the handle of an uploaded file.
+
+        Args:
+            local_path: The local path of the uploaded file.
+            content_hash: The hash of the file contents.
+
+        Returns:
+            types.File | None: The handle, or None if the file was not uploaded or expired.
+        """
+        res = self.client.client.hgetall(UploadedFileStore.__create_key(local_path, content_hash))
+        return UploadedFileStore.__from_hash(res)
+
+    async def aget(self, local_path: str, content_hash: str) -> types.File | None:
+        """Awaitable version of `get`, does not block the event loop."""
+        res = await _require_async(self.async_client).hgetall(
+            UploadedFileStore.__create_key(local_path, content_hash)
+        )
+        return UploadedFileStore.__from_hash(res)
+
+    @staticmethod
+    def __to_mapping(file: types.File) -> dict[str, str]:
+        """Converts a file handle to the stored hash."""
+        return {'name': file.name, 'uri': file.uri, 'mime_type': file.mime_type}
+
+    @staticmethod
+    def __from_hash(res: dict[str, str]) -> types.File | None:
+        """Converts a stored hash to a file handle."""
+        if not res:
+            return None
+        return types.File(name=res['name'], uri=res['uri'], mime_type=res['mime_type'])
+
+    @staticmethod
+    def __create_key(local_path: str, content_hash: str) -> str:
+        """Creates the key of an uploaded file handle."""
+        return f'uploaded_file:{local_path}:{content_hash}'
+
+
+def _hgetall_many(
+    client: valkey_utils.ValkeyClient,
+    keys: list[str],
+    batch_size: int,
+) -> list[dict[str, str]]:
+    """Fetches many hashes with one pipelined round trip per batch.
+
+    Args:
+        client: The ValkeyClient to use.
+        keys: The keys of the hashes to fetch.
+        batch_size: Number of HGETALL commands sent in a single pipeline.
+
+    Returns:
+        list[dict[str, str]]: The hashes in the order of `keys` (empty dict for missing keys).
+    """
+    res = []
+    for key_batch in batched(keys, batch_size):
+        p = client.client.pipeline(transaction=False)
+        for k in key_batch:
+            p.hgetall(k)
+        res.extend(p.execute())
+    return res
+
+
+def _require_async(
+    client: valkey_utils.AsyncValkeyClient | None,
+) -> valkey.asyncio.Valkey:
+    """Returns the raw async client, failing if the store was created without one.
+
+    Args:
+        client: The AsyncValkeyClient passed to the store, if any.
+
+    Returns:
+        valkey.asyncio.Valkey: The underlying asyncio Valkey client.
+
+    Raises:
+        ConfigurationError: If no async client was configured for the store.
+    """
+    if client is None:
+        raise valkey_utils.ConfigurationError(
+            'The store was created without an AsyncValkeyClient, async methods are unavailable'
+        )
+    return client.client
+
+
+async def _ascan_suffixes(client: valkey_utils.AsyncValkeyClient | None, prefix: str) -> list[str]:
+    """Awaitable version of `_scan_suffixes`."""
+    return [
+        k.removeprefix(prefix)
+        async for k in _require_async(client).scan_iter(match=f'{prefix}*', count=1000)
+    ]
+
+
+async def _aread_index(
+    client: valkey_utils.AsyncValkeyClient | None,
+    index_key: str,
+    prefix: str,
+) -> list[str]:
+    """Awaitable version of `_read_index`."""
+    p = _require_async(client).pipeline()
+    p.exists(_INDEX_BUILT_KEY)
+    p.smembers(index_key)
+    built, members = await p.execute()
+    if built:
+        return list(members)
+    logging.debug(f'Indexes were never built, falling back to SCAN for {index_key}')
+    return await _ascan_suffixes(client, prefix)
+
+
+async def _ahgetall_many(
+    client: valkey_utils.AsyncValkeyClient | None,
+    keys: list[str],
+    batch_size: int,
+) -> list[dict[str, str]]:
+    """Awaitable version of `_hgetall_many`."""
+    res = []
+    for key_batch in batched(keys, batch_size):
+        p = _require_async(client).pipeline(transaction=False)
+        for k in key_batch:
+            p.hgetall(k)
+        res.extend(await p.execute())
+    return res
+
+
+def build_indexes(client: valkey_utils.ValkeyClient) -> dict[str, int]:
+    """Builds the membership indexes of every store from the existing records.
+
+    Needed once for databases populated before the indexes were introduced, after
+    that the stores keep the indexes up to date on every store() call.
+
+    Args:
+        client: The ValkeyClient to use.
+
+    Returns:
+        dict[str, int]: The number of indexed members per store.
+    """
+    counts = {
+        'site_discovery': CompanySiteStore(client).rebuild_index(),
+        'annual_report_link': AnnualReportLinkStore(client).rebuild_index(),
+        'annual_report_info': AnnualReportInfoStore(client).rebuild_index(),
+        'model_action': ModelActionStore(client).rebuild_index(),
+    }
+    client.client.set(_INDEX_BUILT_KEY, 1)
+    return counts
+
+
+def mark_indexes_built_if_empty(client: valkey_utils.ValkeyClient) -> bool:
+    """Marks the indexes as built if the database holds no keys yet.
+
+    Every record of a fresh database is written through store(), which keeps the indexes
+    up to date, so they can be trusted from the start without running `build_indexes`.
+
+    Args:
+        client: The ValkeyClient to use.
+
+    Returns:
+        bool: True if the indexes are marked as built (now or by an earlier run).
+    """
+    if client.client.dbsize() == 0:
+        client.client.set(_INDEX_BUILT_KEY, 1, nx=True)
+        logging.info('Empty database, indexes marked as built')
+        return True
+    return bool(client.client.exists(_INDEX_BUILT_KEY))
@@ -1,5 +1,6 @@
 import os
 import valkey
+import valkey.asyncio
 
 
 class ConfigurationError(ValueError):
@@ -82,32 +83,125 @@ class ValkeyClient:
                                or if the connection fails using these settings (rethrown from __init__).
         """
         try:
-            host = os.environ.get('VALKEY_HOST', 'localhost')
-            port_str = os.environ.get('VALKEY_PORT', '6379')
-            db_str = os.environ.get('VALKEY_DB', '0')
-            pw = os.environ.get('VALKEY_PW')  # Returns None if not set, which is fine
-
-            if not port_str.isdigit():
-                raise ConfigurationError(f"Invalid VALKEY_PORT: '{port_str}'. Must be an integer.")
-            port = int(port_str)
-
-            if not db_str.isdigit():
-                raise ConfigurationError(f"Invalid VALKEY_DB: '{db_str}'. Must be an integer.")
-            db = int(db_str)
-
-            return ValkeyClient(host=host, port=port, db=db, password=pw)
+            return ValkeyClient(**_settings_from_env())
         except ConnectionError as ce:
             raise ConfigurationError(
                 f'Failed to connect to Valkey with derived settings: {ce}'
             ) from ce
-        except ConfigurationError as conf_err:
-            raise conf_err
-        except ValueError as ve:
-            raise ConfigurationError(
-                f'Invalid numeric value provided in environment variable: {ve}'
-            ) from ve
 
     def close(self):
         """Closes the connection to the Valkey server."""
         if self.client:
             self.client.close()
+
+
+class AsyncValkeyClient:
+    """An asyncio-native client for a Valkey (or Redis) server, backed by a connection pool."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: int = 0,
+        password: str | None = None,
+        socket_timeout: int = 5,
+        socket_connect_timeout: int = 5,
+        max_connections: int = 50,
+    ) -> None:
+        """Initializes the async Valkey client.
+
+        No connection is opened here, use `connect` (or `AsyncValkeyClient.new`)
+        to verify that the server is reachable.
+
+        Args:
+            host: The hostname or IP address of the Valkey server.
+            port: The port number of the Valkey server.
+            db: The database number to connect to (default is 0).
+            password: The password for authentication (optional).
+            socket_timeout: Timeout in seconds for socket operations (default 5).
+            socket_connect_timeout: Timeout in seconds for establishing connection (default 5).
+            max_connections: Maximum number of pooled connections (default 50).
+        """
+        self.host = host
+        self.port = port
+        self.db = db
+        self.pool = valkey.asyncio.ConnectionPool(
+            host=host,
+            port=port,
+            db=db,
+            password=password,
+            decode_responses=True,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_connect_timeout,
+            health_check_interval=30,
+            max_connections=max_connections,
+        )
+        self.client = valkey.asyncio.Valkey(connection_pool=self.pool)
+
+    async def connect(self) -> None:
+        """Pings the server to verify it is reachable.
+
+        Raises:
+            ConnectionError: If the client fails to connect to or ping the Valkey instance.
+        """
+        try:
+            await self.client.ping()
+        except (valkey.ConnectionError, valkey.TimeoutError, valkey.AuthenticationError) as e:
+            raise ConnectionError(
+                f'Failed to connect to or ping Valkey instance at {self.host}:{self.port}'
+            ) from e
+
+    @staticmethod
+    async def new(max_connections: int = 50) -> 'AsyncValkeyClient':
+        """Creates and connects a new AsyncValkeyClient using settings from environment variables.
+
+        Reads the same variables as `ValkeyClient.new`.
+
+        Args:
+            max_connections: Maximum number of pooled connections (default 50).
+
+        Returns:
+            A configured and connected AsyncValkeyClient instance.
+
+        Raises:
+            ConfigurationError: If environment variables contain invalid values
+                                or if the connection fails using these settings.
+        """
+        client = AsyncValkeyClient(**_settings_from_env(), max_connections=max_connections)
+        try:
+            await client.connect()
+        except ConnectionError as ce:
+            await client.close()
+            raise ConfigurationError(
+                f'Failed to connect to Valkey with derived settings: {ce}'
+            ) from ce
+        return client
+
+    async def close(self) -> None:
+        """Closes the client and disconnects every pooled connection."""
+        await self.client.aclose()
+        await self.pool.disconnect()
+
+
+def _settings_from_env() -> dict:
+    """Reads the Valkey connection settings from environment variables.
+
+    Reads 'VALKEY_HOST', 'VALKEY_PORT', 'VALKEY_DB', and 'VALKEY_PW', providing
+    defaults for host ('localhost'), port (6379), and db (0).
+
+    Returns:
+        dict: The host, port, db and password keyword arguments of the clients.
+
+    Raises:
+        ConfigurationError: If environment variables contain invalid values (e.g., non-integer port).
+    """
+    host = os.environ.get('VALKEY_HOST', 'localhost')
+    port_str = os.environ.get('VALKEY_PORT', '6379')
+    db_str = os.environ.get('VALKEY_DB', '0')
+    pw = os.environ.get('VALKEY_PW')  # Returns None if not set, which is fine
+
+    if not port_str.isdigit():
+        raise ConfigurationError(f"Invalid VALKEY_PORT: '{port_str}'. Must be an integer.")
+    if not db_str.isdigit():
+        raise ConfigurationError(f"Invalid VALKEY_DB: '{db_str}'. Must be an integer.")
+    return {'host': host, 'port': int(port_str), 'db': int(db_str), 'password': pw}
@@ -0,0 +1,81 @@
+import os
+import hashlib
+import logging
+
+import numpy as np
+
+import genai_utils
+
+
+class VectorIndex:
+    """
+    In-memory cosine similarity index over a small, fixed set of labelled texts.
+
+    The vectors are normalized once, so a query is a single matrix-vector product.
+    """
+
+    def __init__(self, labels: list[str], vectors: np.ndarray) -> None:
+        """Initializes the VectorIndex.
+
+        Args:
+            labels: The label of every vector (e.g. NACE codes).
+            vectors: The vectors, one row per label.
+        """
+        self.labels = labels
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors = vectors / np.where(norms == 0, 1, norms)
+
+    def query(self, vector: list[float] | np.ndarray, k: int = 2) -> list[tuple[str, float]]:
+        """Finds the labels most similar to a vector.
+
+        Args:
+            vector: The query vector.
+            k: The number of matches returned.
+
+        Returns:
+            list[tuple[str, float]]: (label, cosine similarity) pairs, best match first.
+        """
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        scores = self.vectors @ (v / norm if norm > 0 else v)
+        top = np.argsort(scores)[::-1][:k]
+        return [(self.labels[i], float(scores[i])) for i in top]
+
+    @staticmethod
+    async def load_or_build(
+        path: str,
+        texts: dict[str, str],
+        gen_client: genai_utils.GenaiClient,
+        model: str = genai_utils.EMBEDDING,
+    ) -> 'VectorIndex':
+        """Loads a persisted index, embedding the texts and persisting the index if needed.
+
+        The persisted index is rebuilt when the texts or the embedding model change.
+
+        Args:
+            path: The .npz file the index is persisted to.
+            texts: The text to embed by label.
+            gen_client: The client used for embedding.
+            model: The embedding model.
+
+        Returns:
+            VectorIndex: The index over the texts.
+
+        Raises:
+            genai_utils.GenerationError: If embedding the texts fails.
+        """
+        labels = list(texts.keys())
+        fingerprint = hashlib.sha256(
+            '\x00'.join([model] + [f'{k}={v}' for k, v in texts.items()]).encode()
+        ).hexdigest()
+        if os.path.exists(path):
+            with np.load(path) as data:
+                if str(data['fingerprint']) == fingerprint:
+                    return VectorIndex(list(data['labels']), data['vectors'])
+            logging.info(f'Embedding index {path} is outdated, rebuilding')
+        embeddings = await gen_client.embed([texts[label] for label in labels], model=model)
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(path, labels=np.array(labels), vectors=vectors, fingerprint=np.array(fingerprint))
+        logging.info(f'Embedding index with {len(labels)} entries saved to {path}')
+        return VectorIndex(labels, vectors)